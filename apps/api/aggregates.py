@@ -0,0 +1,195 @@
+"""
+aggregates.py — Denormalized per-teacher counters for the admin dashboard
+
+    teacher_stats/{teacher_id}                 course_count, unique_students, open_doubts
+    teacher_stats/{teacher_id}/students/{uid}  course_ids (this teacher's courses the student is in)
+
+The counters are kept up to date by the write endpoints (course create/delete,
+enrollment, doubt asked/resolved), so `/admin/stats` is a single document
+read. `recompute_teacher_stats` rebuilds them from the source collections; run
+`python recompute_stats.py` to backfill. It also rebuilds each course's
+`student_count`, which enrollment.py maintains.
+"""
+
+from firebase_admin import firestore
+
+from firestore_bulk import chunked, run_concurrently
+from query_planner import count_in_chunks
+
+# Firestore allows at most 500 writes per batch
+_BATCH_LIMIT = 500
+
+
+def stats_ref(db, teacher_id: str):
+    return db.collection("teacher_stats").document(teacher_id)
+
+
+def student_ref(db, teacher_id: str, student_id: str):
+    return stats_ref(db, teacher_id).collection("students").document(student_id)
+
+
+def read_teacher_stats(db, teacher_id: str):
+    doc = stats_ref(db, teacher_id).get()
+    return doc.to_dict() if doc.exists else None
+
+
+# ─── Courses ──────────────────────────────────────────────────────────────────
+
+def course_created(batch, db, teacher_id: str):
+    """Add the course_count increment to the batch that creates the course."""
+    batch.set(stats_ref(db, teacher_id), {
+        "course_count": firestore.Increment(1),
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }, merge=True)
+
+
+class CourseNotEmpty(Exception):
+    """Students are still enrolled; unenroll them first (enrollment.py)."""
+
+
+def course_deleted(db, teacher_id: str, course_id: str) -> bool:
+    """Delete an empty course and take it and its open doubts off the
+    teacher's counters, in one transaction.
+
+    The open doubts are counted inside the transaction, so a doubt posted
+    meanwhile is either counted here or fails to update the deleted course.
+    Returns False if the course was already gone.
+    """
+    course_ref = db.collection("courses").document(course_id)
+    open_doubts = (db.collection("doubts")
+                   .where("course_id", "==", course_id)
+                   .where("status", "==", "open"))
+
+    @firestore.transactional
+    def txn(transaction):
+        if not course_ref.get(transaction=transaction).exists:
+            return False
+        if list(course_ref.collection("students").limit(1).stream(transaction=transaction)):
+            raise CourseNotEmpty(course_id)
+        count = open_doubts.count().get(transaction=transaction)[0][0].value
+        transaction.delete(course_ref)
+        transaction.set(stats_ref(db, teacher_id), {
+            "course_count": firestore.Increment(-1),
+            "open_doubts": firestore.Increment(-count),
+            "updated_at": firestore.SERVER_TIMESTAMP,
+        }, merge=True)
+        return True
+
+    return txn(db.transaction())
+
+
+# ─── Enrollment ───────────────────────────────────────────────────────────────
+
+def membership_changed(batch, db, teacher_id: str, course_id: str, snap, joining: bool) -> int:
+    """Stage the update of one student's course_ids (`snap` is their
+    teacher_stats entry); returns the change to unique_students (-1, 0 or 1)
+    for the caller to apply (see enrollment.py).
+
+    The write is conditional on `snap` still being current (create() if it
+    did not exist, its update_time otherwise), so the batch fails instead of
+    miscounting if the entry changed since it was read.
+    """
+    course_ids = snap.to_dict().get("course_ids", []) if snap.exists else []
+    if (course_id in course_ids) == joining:
+        return 0
+    if not snap.exists:
+        batch.create(snap.reference, {"course_ids": [course_id]})
+        return 1
+    option = db.write_option(last_update_time=snap.update_time)
+    if joining:
+        batch.update(snap.reference, {"course_ids": firestore.ArrayUnion([course_id])}, option=option)
+        return 0 if course_ids else 1
+    if len(course_ids) > 1:
+        batch.update(snap.reference, {"course_ids": firestore.ArrayRemove([course_id])}, option=option)
+        return 0
+    batch.delete(snap.reference, option=option)
+    return -1
+
+
+# ─── Doubts ───────────────────────────────────────────────────────────────────
+
+def doubt_opened(batch, db, teacher_id: str):
+    """Add the open_doubts increment to the batch that records the doubt."""
+    batch.set(stats_ref(db, teacher_id), {
+        "open_doubts": firestore.Increment(1),
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    }, merge=True)
+
+
+def resolve_doubt(db, doubt_id: str, update: dict):
+    """Apply `update` to an open doubt and decrement its teacher's open_doubts.
+
+    Returns False if the doubt does not exist. Resolving an already resolved
+    doubt re-applies the update but leaves the counter alone.
+    """
+    doubt_ref = db.collection("doubts").document(doubt_id)
+
+    @firestore.transactional
+    def txn(transaction):
+        doubt = doubt_ref.get(transaction=transaction)
+        if not doubt.exists:
+            return False
+        data = doubt.to_dict()
+        teacher_id = None
+        if data.get("status") == "open" and data.get("course_id"):
+            course = db.collection("courses").document(data["course_id"]).get(transaction=transaction)
+            if course.exists:
+                teacher_id = course.to_dict().get("teacher_id")
+        transaction.update(doubt_ref, update)
+        if teacher_id:
+            transaction.set(stats_ref(db, teacher_id), {
+                "open_doubts": firestore.Increment(-1),
+                "updated_at": firestore.SERVER_TIMESTAMP,
+            }, merge=True)
+        return True
+
+    return txn(db.transaction())
+
+
+# ─── Backfill ─────────────────────────────────────────────────────────────────
+
+def count_open_doubts(db, course_ids) -> int:
+    return count_in_chunks(db.collection("doubts"), "course_id", course_ids,
+                           filters=[("status", "==", "open")])
+
+
+def recompute_teacher_stats(db, teacher_id: str) -> dict:
+    """Rebuild teacher_stats/{teacher_id} (and its students) from scratch."""
+    course_ids = [c.id for c in db.collection("courses").where("teacher_id", "==", teacher_id).stream()]
+
+    rosters = run_concurrently(
+        lambda cid: [s.id for s in db.collection("courses").document(cid).collection("students").stream()],
+        course_ids,
+    )
+    memberships = {}
+    for cid, roster in zip(course_ids, rosters):
+        for uid in roster:
+            memberships.setdefault(uid, []).append(cid)
+
+    stats = {
+        "course_count": len(course_ids),
+        "unique_students": len(memberships),
+        "open_doubts": count_open_doubts(db, course_ids),
+    }
+
+    students_coll = stats_ref(db, teacher_id).collection("students")
+    stale = [s.reference for s in students_coll.stream() if s.id not in memberships]
+    writes = [("set", students_coll.document(uid), {"course_ids": cids})
+              for uid, cids in memberships.items()]
+    writes += [("delete", ref, None) for ref in stale]
+    # Maintained by enrollment.py; rebuilt here from the rosters just streamed
+    writes += [("merge", db.collection("courses").document(cid), {"student_count": len(roster)})
+               for cid, roster in zip(course_ids, rosters)]
+    for chunk in chunked(writes, _BATCH_LIMIT):
+        batch = db.batch()
+        for op, ref, data in chunk:
+            if op == "set":
+                batch.set(ref, data)
+            elif op == "merge":
+                batch.set(ref, data, merge=True)
+            else:
+                batch.delete(ref)
+        batch.commit()
+
+    stats_ref(db, teacher_id).set({**stats, "updated_at": firestore.SERVER_TIMESTAMP})
+    return stats
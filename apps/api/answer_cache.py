@@ -0,0 +1,260 @@
+"""
+answer_cache.py — Semantic cache for Gemini answers to student doubts
+
+Lookups try, in order:
+
+* an exact match on the normalized question;
+* a question with the same words once filler is dropped, in any order
+  ("what is recursion" vs "explain recursion simply"), from a dict keyed by
+  the token set;
+* the nearest cached question by TF-IDF cosine similarity, shortlisted
+  through an inverted token index (rarest tokens first, at most
+  _MAX_CANDIDATES scored). It must share at least _MIN_SHARED_TOKENS words
+  and use the same intent words ("why", "example", "difference", ...), so
+  "give an example of recursion" never reuses the answer to "what is
+  recursion".
+
+Entries are evicted LRU-first and expire after a TTL. The cache can be
+snapshotted to a JSON file so it survives restarts.
+"""
+
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "2000"))
+ANSWER_CACHE_TTL = float(os.getenv("ANSWER_CACHE_TTL", str(7 * 24 * 3600)))
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.85"))
+ANSWER_CACHE_PATH = os.getenv("ANSWER_CACHE_PATH", "")
+
+# Filler and phrasing that do not change what is being asked ("what is X",
+# "explain X simply"). Question words ("why", "how"), "example", "difference",
+# "vs" and the like do, so they stay.
+_STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "be", "to", "of", "in", "on",
+    "for", "and", "with", "does", "do", "can", "could", "you", "me", "my", "i",
+    "please", "tell", "it", "this", "that", "what", "explain", "simply",
+    "briefly", "define", "describe", "meaning", "mean",
+}
+
+# Words that change the kind of answer wanted; a near match must have the same ones
+_INTENT_WORDS = {
+    "why", "how", "when", "where", "which", "who", "example", "difference",
+    "between", "vs", "versus", "compare", "advantage", "disadvantage", "code",
+    "implement", "implementation",
+}
+
+# Near matches (TF-IDF) must share this many words...
+_MIN_SHARED_TOKENS = 2
+# ...and at most this many cached questions are scored per lookup
+_MAX_CANDIDATES = 64
+
+_WORD_RE = re.compile(r"[a-z0-9+#]+")
+
+# Save the snapshot after this many new entries
+_SAVE_EVERY = 20
+
+
+def normalize(question: str) -> str:
+    return " ".join(_WORD_RE.findall(question.lower()))
+
+
+def tokenize(question: str) -> list:
+    tokens = [t for t in _WORD_RE.findall(question.lower()) if t not in _STOPWORDS]
+    # Crude plural folding so "linked lists" matches "linked list"
+    return [t[:-1] if len(t) > 3 and t.endswith("s") and not t.endswith("ss") else t
+            for t in tokens]
+
+
+class AnswerCache:
+    def __init__(self, maxsize: int = ANSWER_CACHE_SIZE, ttl: float = ANSWER_CACHE_TTL,
+                 threshold: float = ANSWER_CACHE_SIMILARITY, path: str = ANSWER_CACHE_PATH):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.threshold = threshold
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # normalized question -> entry dict
+        self._index = {}               # token -> set of normalized questions
+        self._by_tokens = {}           # frozenset of tokens -> normalized question
+        self._df = Counter()           # token -> number of entries containing it
+        self._unsaved = 0
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    # ── Index maintenance ────────────────────────────────────────────────────
+
+    def _add(self, key: str, entry: dict):
+        self._entries[key] = entry
+        self._by_tokens[frozenset(entry["tf"])] = key
+        for token in entry["tf"]:
+            self._index.setdefault(token, set()).add(key)
+            self._df[token] += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        tokens = frozenset(entry["tf"])
+        if self._by_tokens.get(tokens) == key:
+            del self._by_tokens[tokens]
+        for token in entry["tf"]:
+            keys = self._index.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._index[token]
+            self._df[token] -= 1
+            if self._df[token] <= 0:
+                del self._df[token]
+
+    def _expired(self, entry: dict, now: float) -> bool:
+        return now - entry["created_at"] > self.ttl
+
+    # ── Similarity ───────────────────────────────────────────────────────────
+
+    def _vector(self, tf: dict) -> dict:
+        n = len(self._entries) + 1
+        return {t: c * (math.log(n / (1 + self._df.get(t, 0))) + 1) for t, c in tf.items()}
+
+    @staticmethod
+    def _cosine(a: dict, b: dict) -> float:
+        dot = sum(w * b.get(t, 0.0) for t, w in a.items())
+        if not dot:
+            return 0.0
+        norm = math.sqrt(sum(w * w for w in a.values())) * math.sqrt(sum(w * w for w in b.values()))
+        return dot / norm if norm else 0.0
+
+    def _nearest(self, tf: Counter, now: float):
+        """Key of the most similar cached question above the threshold, or None."""
+        if len(tf) < _MIN_SHARED_TOKENS:
+            return None
+        intent = tf.keys() & _INTENT_WORDS
+        candidates = {}  # used as an ordered set
+        # Rare tokens first: they say the most about the question
+        for token in sorted(tf, key=lambda t: self._df.get(t, 0)):
+            candidates.update(dict.fromkeys(self._index.get(token, ())))
+            if len(candidates) >= _MAX_CANDIDATES:
+                break
+
+        best_key, best_score = None, 0.0
+        query = None
+        for cand in list(candidates)[:_MAX_CANDIDATES]:
+            cand_entry = self._entries[cand]
+            cand_tf = cand_entry["tf"]
+            if (self._expired(cand_entry, now)
+                    or len(tf.keys() & cand_tf.keys()) < _MIN_SHARED_TOKENS
+                    or cand_tf.keys() & _INTENT_WORDS != intent):
+                continue
+            query = query or self._vector(tf)
+            score = self._cosine(query, self._vector(cand_tf))
+            if score > best_score:
+                best_key, best_score = cand, score
+        return best_key if best_score >= self.threshold else None
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    def get(self, question: str):
+        """Cached {"answer", "citations"} for this or a near-identical question."""
+        key = normalize(question)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry, now):
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return {"answer": entry["answer"], "citations": entry["citations"]}
+
+            tf = Counter(tokenize(question))
+            match = self._by_tokens.get(frozenset(tf)) if tf else None
+            if match is None or self._expired(self._entries[match], now):
+                match = self._nearest(tf, now)
+
+            if match is not None:
+                self._entries.move_to_end(match)
+                self.similar_hits += 1
+                entry = self._entries[match]
+                return {"answer": entry["answer"], "citations": entry["citations"]}
+
+            self.misses += 1
+            return None
+
+    def put(self, question: str, answer: str, citations: list):
+        key = normalize(question)
+        if not key or not answer:
+            return
+        entry = {
+            "question": question,
+            "answer": answer,
+            "citations": list(citations),
+            "tf": dict(Counter(tokenize(question))),
+            "created_at": time.time(),
+        }
+        with self._lock:
+            self._remove(key)
+            self._add(key, entry)
+            now = time.time()
+            while self._entries:
+                oldest_key, oldest = next(iter(self._entries.items()))
+                if len(self._entries) > self.maxsize or self._expired(oldest, now):
+                    self._remove(oldest_key)
+                else:
+                    break
+            self._unsaved += 1
+            should_save = self.path and self._unsaved >= _SAVE_EVERY
+        if should_save:
+            self.save()
+
+    # ── Persistence ──────────────────────────────────────────────────────────
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Could not load answer cache from {self.path}: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for key, entry in saved.items():
+                if not self._expired(entry, now):
+                    # Re-tokenize, in case the snapshot predates a stopword change
+                    entry["tf"] = dict(Counter(tokenize(entry["question"])))
+                    self._remove(key)
+                    self._add(key, entry)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            snapshot = dict(self._entries)
+            self._unsaved = 0
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(snapshot, f)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"⚠️  Could not save answer cache to {self.path}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self.exact_hits + self.similar_hits
+            total = hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "exact_hits": self.exact_hits,
+                "similar_hits": self.similar_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / total, 4) if total else 0.0,
+            }
@@ -0,0 +1,63 @@
+"""
+auth_cache.py — Verified-token and role caches in front of Firebase Auth
+
+`verify()` keeps decoded ID tokens keyed by a SHA-256 of the raw token until
+the token's own `exp`, so repeat calls skip the JWT signature check.
+`role()` caches `users/{uid}.role` for a short TTL, so admin checks skip the
+Firestore read.
+"""
+
+import hashlib
+import os
+import time
+
+from firebase_admin import auth
+
+from ttl_cache import TTLCache
+
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096"))
+AUTH_ROLE_CACHE_TTL = float(os.getenv("AUTH_ROLE_CACHE_TTL", "60"))
+
+# Stop serving a cached token slightly before it actually expires
+_EXP_LEEWAY_SECONDS = 30
+
+
+class AuthCache:
+    def __init__(self, db, token_cache_size: int = AUTH_TOKEN_CACHE_SIZE,
+                 role_ttl: float = AUTH_ROLE_CACHE_TTL):
+        self._db = db
+        self.tokens = TTLCache(maxsize=token_cache_size)
+        self.roles = TTLCache(maxsize=token_cache_size, ttl=role_ttl)
+
+    def verify(self, token: str) -> dict:
+        """Drop-in for `auth.verify_id_token`; raises on invalid tokens."""
+        key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+        decoded = self.tokens.get(key)
+        if decoded is not None:
+            return decoded
+
+        decoded = auth.verify_id_token(token)
+        ttl = decoded.get("exp", 0) - time.time() - _EXP_LEEWAY_SECONDS
+        self.tokens.set(key, decoded, ttl=ttl)
+        return decoded
+
+    def role(self, uid: str):
+        """The user's role, or None if the user document does not exist."""
+        cached = self.roles.get(uid)
+        if cached is not None:
+            return cached or None
+
+        doc = self._db.collection("users").document(uid).get()
+        role = doc.to_dict().get("role") if doc.exists else None
+        # Cache misses too ("" marks a missing user) so unknown uids stay cheap
+        self.roles.set(uid, role or "")
+        return role
+
+    def is_admin(self, uid: str) -> bool:
+        return self.role(uid) == "admin"
+
+    def set_role(self, uid: str, role: str):
+        self.roles.set(uid, role or "")
+
+    def stats(self) -> dict:
+        return {"tokens": self.tokens.stats(), "roles": self.roles.stats()}
@@ -0,0 +1,485 @@
+"""
+benchmark.py — Endpoint benchmarks against a synthetic institution
+
+Generates N teachers, M courses, S students (each enrolled in a few courses)
+and D doubts, loads them into the in-memory data store (memory_store.py),
+then drives the API in-process at a fixed concurrency. Gemini is replaced by
+a mock client with a fixed latency and Firebase Auth by a token stub, so no
+network or credentials are needed.
+
+For every scenario it reports p50/p95/p99 latency, throughput and the
+Firestore round trips, reads, writes and queries per request, as JSON:
+
+    python benchmark.py --scale 0.01 --output bench.json
+    python benchmark.py --output new.json --compare bench.json
+
+`--compare` prints the change against an earlier report and exits non-zero
+if any scenario's p95 regressed by more than `--max-regression` percent.
+
+Scenarios run with the response cache (http_cache.py) switched off, so the
+handlers are measured. The `*_cached` scenarios keep it on and measure
+repeat requests answered from it.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+# Must be set before main (and datastore) are imported
+os.environ["DATASTORE_BACKEND"] = "memory"
+
+import httpx
+
+import auth_cache as auth_cache_module
+import main
+
+SUBJECTS = [
+    "Data Structures", "Operating Systems", "Computer Networks", "DBMS",
+    "Machine Learning", "Compiler Design", "Discrete Maths", "Digital Logic",
+]
+TOPICS = [
+    "deadlocks", "paging", "B-trees", "normalization", "TCP handshake",
+    "gradient descent", "red-black trees", "hashing", "semaphores", "LR parsing",
+    "graph coloring", "Karnaugh maps", "virtual memory", "joins", "routing",
+]
+QUESTION_TEMPLATES = [
+    "Can you explain {topic} with an example?",
+    "How does {topic} work in {subject}?",
+    "Why is {topic} important for {subject}?",
+    "What are common exam questions on {topic}?",
+]
+
+
+# ─── Synthetic Dataset ────────────────────────────────────────────────────────
+
+def _question(rng):
+    return rng.choice(QUESTION_TEMPLATES).format(topic=rng.choice(TOPICS), subject=rng.choice(SUBJECTS))
+
+
+def generate_dataset(client, teachers: int, courses: int, students: int, doubts: int,
+                     enrollments: int, open_ratio: float, seed: int) -> dict:
+    """Load a synthetic institution into `client` (a MemoryClient)."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+
+    teacher_ids = [f"teacher_{i}" for i in range(teachers)]
+    client.load("users", ((tid, {
+        "uid": tid,
+        "email": f"{tid}@manan.ai",
+        "role": "admin",
+        "profile": {"name": f"Teacher {i}"},
+        "created_at": now,
+    }) for i, tid in enumerate(teacher_ids)))
+
+    course_ids = [f"course_{i}" for i in range(courses)]
+    course_teacher = {cid: teacher_ids[i % teachers] for i, cid in enumerate(course_ids)}
+    course_docs = []
+    for i, cid in enumerate(course_ids):
+        course_docs.append((cid, {
+            "title": f"{SUBJECTS[i % len(SUBJECTS)]} {i}",
+            "description": "Synthetic benchmark course",
+            "teacher_id": course_teacher[cid],
+            "teacher_name": course_teacher[cid],
+            "created_at": now - timedelta(days=rng.randint(0, 365)),
+            "student_count": 0,
+            "doubts_count": 0,
+        }))
+
+    student_ids = [f"student_{i}" for i in range(students)]
+    client.load("users", ((uid, {
+        "uid": uid,
+        "email": f"{uid}@manan.ai",
+        "role": "student",
+        "profile": {"name": f"Student {i}", "roll_number": f"R{i:06d}"},
+        "academic_stats": {
+            "attendance_percent": rng.randint(40, 100),
+            "cgpa": round(rng.uniform(4, 10), 2),
+            "risk_status": "Safe",
+        },
+        "created_at": now,
+    }) for i, uid in enumerate(student_ids)))
+
+    # Enrollments: courses/{cid}/students/{uid} and users/{uid}/enrolled_courses/{cid}
+    rosters = {cid: [] for cid in course_ids}
+    memberships = {}  # teacher_id -> {uid: [course_ids]}
+    for uid in student_ids:
+        picked = rng.sample(course_ids, min(enrollments, courses))
+        client.load(f"users/{uid}/enrolled_courses",
+                    ((cid, {"enrolled_at": now, "course_id": cid}) for cid in picked))
+        for cid in picked:
+            rosters[cid].append(uid)
+            memberships.setdefault(course_teacher[cid], {}).setdefault(uid, []).append(cid)
+    for cid, roster in rosters.items():
+        client.load(f"courses/{cid}/students",
+                    ((uid, {"enrolled_at": now, "uid": uid}) for uid in roster))
+
+    # Doubts, spread over the last 180 days
+    doubts_per_course = dict.fromkeys(course_ids, 0)
+    open_per_teacher = dict.fromkeys(teacher_ids, 0)
+
+    def doubt_docs():
+        for i in range(doubts):
+            cid = rng.choice(course_ids)
+            roster = rosters[cid]
+            uid = rng.choice(roster) if roster else rng.choice(student_ids)
+            is_open = rng.random() < open_ratio
+            doubts_per_course[cid] += 1
+            if is_open:
+                open_per_teacher[course_teacher[cid]] += 1
+            yield f"doubt_{i}", {
+                "course_id": cid,
+                "student_id": uid,
+                "student_email": f"{uid}@manan.ai",
+                "question": _question(rng),
+                "status": "open" if is_open else "resolved",
+                "created_at": now - timedelta(seconds=rng.randint(0, 180 * 86400)),
+            }
+
+    client.load("doubts", doubt_docs())
+
+    for cid, data in course_docs:
+        data["student_count"] = len(rosters[cid])
+        data["doubts_count"] = doubts_per_course[cid]
+    client.load("courses", course_docs)
+
+    # Per-teacher aggregates, as recompute_stats.py would leave them
+    course_count = {}
+    for tid in course_teacher.values():
+        course_count[tid] = course_count.get(tid, 0) + 1
+    for tid in teacher_ids:
+        students_of = memberships.get(tid, {})
+        client.load(f"teacher_stats/{tid}/students",
+                    ((uid, {"course_ids": cids}) for uid, cids in students_of.items()))
+        client.load("teacher_stats", [(tid, {
+            "course_count": course_count.get(tid, 0),
+            "unique_students": len(students_of),
+            "open_doubts": open_per_teacher[tid],
+            "updated_at": now,
+        })])
+
+    return {
+        "teacher_ids": teacher_ids,
+        "course_ids": course_ids,
+        "student_ids": student_ids,
+        "rosters": rosters,
+    }
+
+
+# ─── Mocks ────────────────────────────────────────────────────────────────────
+
+class _StubAuth:
+    """Stands in for firebase_admin.auth: the token is "bench:<uid>"."""
+
+    @staticmethod
+    def verify_id_token(token):
+        if not token.startswith("bench:"):
+            raise ValueError("Invalid token")
+        uid = token.split(":", 1)[1]
+        return {"uid": uid, "email": f"{uid}@manan.ai", "exp": time.time() + 3600}
+
+
+class _MockResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class _MockModels:
+    def __init__(self, latency: float):
+        self._latency = latency
+
+    def generate_content(self, model, contents):
+        time.sleep(self._latency)
+        return _MockResponse(f"Mock answer to: {contents}")
+
+
+class _MockAsyncModels:
+    def __init__(self, latency: float):
+        self._latency = latency
+
+    async def generate_content_stream(self, model, contents):
+        async def chunks():
+            for word in f"Mock answer to: {contents}".split():
+                await asyncio.sleep(self._latency / 10)
+                yield _MockResponse(word + " ")
+        return chunks()
+
+
+class _MockAio:
+    def __init__(self, latency: float):
+        self.models = _MockAsyncModels(latency)
+
+    async def aclose(self):
+        pass
+
+
+class MockGeminiClient:
+    """Fixed-latency replacement for genai.Client (sync and streaming)."""
+
+    def __init__(self, latency: float):
+        self.models = _MockModels(latency)
+        self.aio = _MockAio(latency)
+
+    def close(self):
+        pass
+
+
+# ─── Scenarios ────────────────────────────────────────────────────────────────
+
+def _token(uid):
+    return f"bench:{uid}"
+
+
+def build_scenarios(data: dict) -> dict:
+    """name -> function(rng) returning (method, path, kwargs) for one request."""
+    teachers, courses, students = data["teacher_ids"], data["course_ids"], data["student_ids"]
+    rosters = data["rosters"]
+
+    def teacher_body(rng):
+        tid = rng.choice(teachers)
+        return {"teacher_id": tid, "token": _token(tid)}
+
+    def enrolled(rng):
+        cid = rng.choice(courses)
+        roster = rosters[cid]
+        return cid, (rng.choice(roster) if roster else rng.choice(students))
+
+    def ask_doubt(rng):
+        cid, uid = enrolled(rng)
+        return "POST", "/courses/doubts", {"json": {
+            "course_id": cid, "student_id": uid, "question": _question(rng), "token": _token(uid)}}
+
+    def solve_doubt(rng):
+        cid, uid = enrolled(rng)
+        return "POST", "/solve-doubt", {"json": {
+            "course_id": cid, "student_id": uid, "question_text": _question(rng)}}
+
+    return {
+        "admin_stats": lambda rng: ("POST", "/admin/stats", {"json": teacher_body(rng)}),
+        "admin_doubts": lambda rng: ("POST", "/admin/doubts", {"json": teacher_body(rng)}),
+        "teacher_students": lambda rng: ("POST", "/teacher/students", {"json": teacher_body(rng)}),
+        "admin_students": lambda rng: ("POST", "/admin/students", {"json": {"token": _token(rng.choice(teachers))}}),
+        "courses": lambda rng: ("GET", "/courses", {}),
+        "courses_cached": lambda rng: ("GET", "/courses", {}),
+        "course": lambda rng: ("GET", f"/courses/{rng.choice(courses)}", {}),
+        "course_cached": lambda rng: ("GET", f"/courses/{rng.choice(courses)}", {}),
+        "course_doubts": lambda rng: ("GET", f"/courses/{rng.choice(courses)}/doubts", {}),
+        "student_profile": lambda rng: ("GET", "/student/profile", {"params": {"uid": rng.choice(students)}}),
+        "notifications": lambda rng: ("GET", "/notifications", {}),
+        "solve_doubt": solve_doubt,
+        "ask_doubt": ask_doubt,
+    }
+
+
+# ─── Runner ───────────────────────────────────────────────────────────────────
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def _is_error(response) -> bool:
+    if response.status_code >= 400:
+        return True
+    try:
+        body = response.json()
+    except ValueError:
+        return False
+    return isinstance(body, dict) and (body.get("status") == "error" or "error" in body)
+
+
+async def run_scenario(client, store, make_request, requests: int, concurrency: int,
+                       warmup: int, seed: int) -> dict:
+    rng = random.Random(seed)
+
+    for _ in range(warmup):
+        method, path, kwargs = make_request(rng)
+        await client.request(method, path, **kwargs)
+
+    store.raw.reset_stats()
+    latencies = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, path, kwargs = make_request(rng)
+            started = time.perf_counter()
+            response = await client.request(method, path, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if _is_error(response):
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    ops = store.raw.stats()
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "duration_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(ms, 50), 3),
+            "p95": round(percentile(ms, 95), 3),
+            "p99": round(percentile(ms, 99), 3),
+            "mean": round(sum(ms) / len(ms), 3) if ms else 0.0,
+            "max": round(ms[-1], 3) if ms else 0.0,
+        },
+        "firestore_per_request": {
+            k: round(v / len(latencies), 2) if latencies else 0.0 for k, v in ops.items()
+        },
+    }
+
+
+async def run_benchmarks(args, data) -> dict:
+    scenarios = build_scenarios(data)
+    names = args.scenarios.split(",") if args.scenarios else list(scenarios)
+    unknown = [n for n in names if n not in scenarios]
+    if unknown:
+        raise SystemExit(f"Unknown scenario(s): {', '.join(unknown)}; choose from {', '.join(scenarios)}")
+
+    results = {}
+    cache_ttl = main.response_cache.ttl
+    transport = httpx.ASGITransport(app=main.app)
+    async with main.app.router.lifespan_context(main.app):
+        main.gemini.client = MockGeminiClient(args.llm_latency_ms / 1000)
+        main.store.raw.latency = args.latency_ms / 1000
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for i, name in enumerate(names):
+                # ttl=0 stores nothing, so every request reaches the handler
+                main.response_cache.clear()
+                main.response_cache.ttl = cache_ttl if name.endswith("_cached") else 0
+                result = await run_scenario(client, main.store, scenarios[name], args.requests,
+                                            args.concurrency, args.warmup, args.seed + i)
+                results[name] = result
+                lat = result["latency_ms"]
+                print(f"  {name:<18} p50 {lat['p50']:>8.2f} ms  p95 {lat['p95']:>8.2f} ms  "
+                      f"p99 {lat['p99']:>8.2f} ms  {result['throughput_rps']:>8.1f} req/s  "
+                      f"{result['firestore_per_request']['reads']:>8.1f} reads/req  "
+                      f"{result['errors']} errors", file=sys.stderr)
+    main.response_cache.ttl = cache_ttl
+    return results
+
+
+# ─── Reporting ────────────────────────────────────────────────────────────────
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL,
+                                       text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(report: dict, baseline: dict, max_regression: float) -> bool:
+    """Print per-scenario deltas; returns False if any p95 regressed too much."""
+    ok = True
+    print(f"\nCompared with {baseline.get('meta', {}).get('commit') or 'baseline'}:", file=sys.stderr)
+    for name, result in report["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            continue
+        old_p95, new_p95 = old["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        change = (new_p95 - old_p95) / old_p95 * 100 if old_p95 else 0.0
+        reads = result["firestore_per_request"]["reads"] - old["firestore_per_request"]["reads"]
+        flag = ""
+        if change > max_regression:
+            flag = "  REGRESSION"
+            ok = False
+        print(f"  {name:<18} p95 {old_p95:>8.2f} -> {new_p95:>8.2f} ms ({change:+.1f}%)  "
+              f"reads/req {reads:+.1f}{flag}", file=sys.stderr)
+    return ok
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description="Benchmark API endpoints on a synthetic dataset")
+    parser.add_argument("--teachers", type=int, default=200)
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--students", type=int, default=100_000)
+    parser.add_argument("--doubts", type=int, default=1_000_000)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="Multiply every dataset size (e.g. 0.01 for a quick run)")
+    parser.add_argument("--enrollments", type=int, default=4, help="Courses per student")
+    parser.add_argument("--open-ratio", type=float, default=0.3, help="Share of doubts still open")
+    parser.add_argument("--scenarios", default="", help="Comma-separated subset to run (default: all)")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="Simulated Firestore round trip")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0, help="Mock Gemini call latency")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="Earlier JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0,
+                        help="Allowed p95 increase in percent before --compare fails")
+    args = parser.parse_args()
+
+    sizes = {
+        "teachers": max(1, int(args.teachers * args.scale)),
+        "courses": max(1, int(args.courses * args.scale)),
+        "students": max(1, int(args.students * args.scale)),
+        "doubts": max(0, int(args.doubts * args.scale)),
+    }
+
+    auth_cache_module.auth = _StubAuth()
+
+    print(f"Generating dataset {sizes} ...", file=sys.stderr)
+    started = time.perf_counter()
+    data = generate_dataset(main.store.raw, enrollments=args.enrollments,
+                            open_ratio=args.open_ratio, seed=args.seed, **sizes)
+    load_seconds = time.perf_counter() - started
+    print(f"Loaded in {load_seconds:.1f}s; running scenarios ...", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "config": {
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "firestore_latency_ms": args.latency_ms,
+            "llm_latency_ms": args.llm_latency_ms,
+            "seed": args.seed,
+        },
+        "dataset": {**sizes, "enrollments_per_student": args.enrollments,
+                    "open_ratio": args.open_ratio, "load_seconds": round(load_seconds, 2)},
+        "scenarios": asyncio.run(run_benchmarks(args, data)),
+    }
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(payload)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if not compare(report, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,44 @@
+"""
+course_cache.py — Process-local cache of course metadata (title, teacher_id)
+
+Posting a doubt only needs the course's title and teacher, which almost never
+change, so `get()` serves them from memory instead of reading the course
+document each time. Enrollment (enrollment.py) uses it for the teacher too. `create_course`, `delete_course` and syllabus updates
+call `invalidate()`. Other workers pick up those changes once
+COURSE_CACHE_TTL expires. A course that no longer exists makes the write
+batch fail with NotFound, and the caller then invalidates the entry and
+retries.
+"""
+
+import os
+
+from ttl_cache import TTLCache
+
+COURSE_CACHE_SIZE = int(os.getenv("COURSE_CACHE_SIZE", "2048"))
+COURSE_CACHE_TTL = float(os.getenv("COURSE_CACHE_TTL", "300"))
+
+FIELDS = ("title", "teacher_id")
+
+
+class CourseCache:
+    def __init__(self, db, maxsize: int = COURSE_CACHE_SIZE, ttl: float = COURSE_CACHE_TTL):
+        self._db = db
+        self.courses = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, course_id: str):
+        """{"title", "teacher_id"} of the course, or None if it does not exist."""
+        cached = self.courses.get(course_id)
+        if cached is not None:
+            return cached or None
+
+        doc = self._db.collection("courses").document(course_id).get(field_paths=list(FIELDS))
+        meta = {field: doc.to_dict().get(field) for field in FIELDS} if doc.exists else None
+        # Cache misses too ({} marks a missing course) so bad ids stay cheap
+        self.courses.set(course_id, meta or {})
+        return meta
+
+    def invalidate(self, course_id: str):
+        self.courses.invalidate(course_id)
+
+    def stats(self) -> dict:
+        return self.courses.stats()
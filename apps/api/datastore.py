@@ -0,0 +1,127 @@
+"""
+datastore.py — Data-access layer shared by every endpoint
+
+`DataStore` wraps a Firestore-compatible client and exposes one `Repository`
+per top-level collection (users, courses, doubts, notifications,
+placement_progress, system, teacher_stats, jobs, inbox). Handlers go through the
+repositories instead of a module-level `db`, so the backend can be swapped:
+
+    DATASTORE_BACKEND=firestore   real Firestore via firebase_admin (default)
+    DATASTORE_BACKEND=memory      in-process store (memory_store.py) with
+                                  MEMORY_STORE_LATENCY_MS of simulated
+                                  round-trip latency per RPC
+
+Helpers that take a raw client (aggregates, pagination, caches) are given
+`store.client`, which both backends implement. Unless FIRESTORE_ACCOUNTING=0,
+`store.client` is wrapped to count operations per request
+(firestore_accounting.py); the unwrapped client is `store.raw`.
+
+The Firestore client is created on first use, normally by `store.connect()`
+in the FastAPI lifespan warm-up, so importing main.py does not initialize
+Firebase.
+"""
+
+import os
+import threading
+
+from firestore_accounting import AccountedClient, FIRESTORE_ACCOUNTING
+
+DATASTORE_BACKEND = os.getenv("DATASTORE_BACKEND", "firestore").lower()
+MEMORY_STORE_LATENCY_MS = float(os.getenv("MEMORY_STORE_LATENCY_MS", "0"))
+
+COLLECTIONS = (
+    "users",
+    "courses",
+    "doubts",
+    "notifications",
+    "placement_progress",
+    "system",
+    "teacher_stats",
+    "jobs",
+    "inbox",
+)
+
+
+class Repository:
+    """Thin accessor for one top-level collection."""
+
+    def __init__(self, client, name: str):
+        self.client = client
+        self.name = name
+
+    @property
+    def collection(self):
+        return self.client.collection(self.name)
+
+    def document(self, doc_id: str = None):
+        """Reference to `doc_id`, or to a new auto-id document if omitted."""
+        return self.collection.document(doc_id) if doc_id else self.collection.document()
+
+    def get(self, doc_id: str):
+        """The document's data, or None if it does not exist."""
+        doc = self.document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def where(self, field: str, op: str, value):
+        return self.collection.where(field, op, value)
+
+    def add(self, data: dict):
+        """Create a document with an auto id; returns its reference."""
+        _, ref = self.collection.add(data)
+        return ref
+
+
+class _LazyClient:
+    """Calls `factory()` for the real client the first time it is used."""
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._client = None
+        self._lock = threading.Lock()
+
+    def connect(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._factory()
+        return self._client
+
+    def __getattr__(self, name):
+        return getattr(self.connect(), name)
+
+
+class DataStore:
+    def __init__(self, client, backend: str = "firestore", accounting: bool = FIRESTORE_ACCOUNTING):
+        self.raw = client
+        self.client = AccountedClient(client) if accounting else client
+        self.backend = backend
+        for name in COLLECTIONS:
+            setattr(self, name, Repository(self.client, name))
+
+    @classmethod
+    def from_env(cls):
+        if DATASTORE_BACKEND == "memory":
+            return cls.memory(MEMORY_STORE_LATENCY_MS / 1000)
+        if DATASTORE_BACKEND != "firestore":
+            raise ValueError(f"Unknown DATASTORE_BACKEND: {DATASTORE_BACKEND}")
+        from firebase_config import get_db
+        return cls(_LazyClient(get_db), "firestore")
+
+    @classmethod
+    def memory(cls, latency: float = 0.0):
+        from memory_store import MemoryClient
+        return cls(MemoryClient(latency), "memory")
+
+    def connect(self):
+        """Create the backend client now rather than on first use."""
+        if isinstance(self.raw, _LazyClient):
+            self.raw.connect()
+
+    def batch(self):
+        return self.client.batch()
+
+    def transaction(self):
+        return self.client.transaction()
+
+    def get_all(self, refs):
+        return self.client.get_all(list(refs))
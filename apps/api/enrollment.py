@@ -0,0 +1,145 @@
+"""
+enrollment.py — Enroll and unenroll students in one batched write per call
+
+    courses/{course_id}                          student_count
+    courses/{course_id}/students/{uid}           enrolled_at, uid
+    users/{uid}/enrolled_courses/{course_id}     enrolled_at, course_id
+    teacher_stats/{teacher_id}/students/{uid}    course_ids (see aggregates.py)
+
+The course's teacher comes from the course cache (course_cache.py). One
+`get_all` then reads the students' roster entries and their teacher_stats
+entries, and one batch writes everything: both membership documents, the
+course's `student_count` increment and the teacher's unique_students
+aggregate. That is two round trips, one read and one commit (plus a read
+of the course when it is not cached).
+
+There is no transaction. Each write is conditional on what was read
+instead: a new roster entry uses create(), which fails if the student was
+enrolled meanwhile, and a removed entry, like the teacher_stats entries,
+is guarded by its update_time. If another request got there first, the
+whole batch fails with nothing applied, and the students are re-read and
+the batch rebuilt. The `student_count` update also fails once the course
+is deleted. Enrolling a student who is already in the course, or
+unenrolling one who is not, writes nothing, so retries are safe and
+`student_count` stays exact; `python recompute_stats.py` rebuilds it from
+the rosters.
+
+`delete_course` unenrolls the roster this way, chunk by chunk, before the
+course itself is deleted. A failure part-way leaves every counter matching
+the students still enrolled, and calling it again finishes the job.
+"""
+
+import os
+
+from firebase_admin import firestore
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition, NotFound
+
+import aggregates
+from firestore_bulk import chunked
+
+# Students per batch: up to three writes each, plus the two counters,
+# within Firestore's 500-write limit
+ENROLL_BATCH_SIZE = min(int(os.getenv("ENROLL_BATCH_SIZE", "150")), 165)
+ENROLL_MAX_STUDENTS = int(os.getenv("ENROLL_MAX_STUDENTS", "2000"))
+
+# Re-reads after a batch lost a race with another enrollment
+_MAX_ATTEMPTS = 5
+
+
+class CourseNotFound(Exception):
+    pass
+
+
+def _apply(db, courses, course_id: str, student_ids: list, joining: bool) -> list:
+    """Enroll (or unenroll) `student_ids`; returns those whose membership changed."""
+    course_ref = db.collection("courses").document(course_id)
+    roster = course_ref.collection("students")
+
+    for attempt in range(_MAX_ATTEMPTS):
+        course = courses.get(course_id)
+        if course is None:
+            raise CourseNotFound(course_id)
+        teacher_id = course.get("teacher_id")
+
+        refs = [roster.document(uid) for uid in student_ids]
+        if teacher_id:
+            refs += [aggregates.student_ref(db, teacher_id, uid) for uid in student_ids]
+        snaps = {snap.reference.path: snap for snap in db.get_all(refs)}
+
+        changed = [uid for uid in student_ids
+                   if snaps[roster.document(uid).path].exists != joining]
+        if not changed:
+            return []
+
+        batch = db.batch()
+        unique_students = 0
+        for uid in changed:
+            entry = snaps[roster.document(uid).path]
+            enrolled_ref = db.collection("users").document(uid).collection("enrolled_courses").document(course_id)
+            if joining:
+                batch.create(entry.reference, {"enrolled_at": firestore.SERVER_TIMESTAMP, "uid": uid})
+                batch.set(enrolled_ref, {"enrolled_at": firestore.SERVER_TIMESTAMP, "course_id": course_id})
+            else:
+                batch.delete(entry.reference, option=db.write_option(last_update_time=entry.update_time))
+                batch.delete(enrolled_ref)
+            if teacher_id:
+                teacher_entry = snaps[aggregates.student_ref(db, teacher_id, uid).path]
+                unique_students += aggregates.membership_changed(
+                    batch, db, teacher_id, course_id, teacher_entry, joining)
+
+        batch.update(course_ref, {"student_count": firestore.Increment(len(changed) if joining else -len(changed))})
+        if unique_students:
+            batch.set(aggregates.stats_ref(db, teacher_id), {
+                "unique_students": firestore.Increment(unique_students),
+                "updated_at": firestore.SERVER_TIMESTAMP,
+            }, merge=True)
+        try:
+            batch.commit()
+            return changed
+        except (AlreadyExists, FailedPrecondition):
+            if attempt == _MAX_ATTEMPTS - 1:
+                raise
+        except NotFound:
+            # The course was deleted since it was cached; look it up again
+            courses.invalidate(course_id)
+            if attempt == _MAX_ATTEMPTS - 1:
+                raise
+
+
+def enroll(db, courses, course_id: str, student_ids) -> list:
+    """Enroll students in a course; returns the ids that were not already enrolled.
+
+    `courses` is the CourseCache. Raises CourseNotFound. Large lists are
+    split into batches of ENROLL_BATCH_SIZE students, each applied atomically.
+    """
+    added = []
+    for chunk in chunked(dict.fromkeys(student_ids), ENROLL_BATCH_SIZE):
+        added += _apply(db, courses, course_id, chunk, joining=True)
+    return added
+
+
+def unenroll(db, courses, course_id: str, student_ids) -> list:
+    """Reverse of `enroll`; returns the ids that were enrolled."""
+    removed = []
+    for chunk in chunked(dict.fromkeys(student_ids), ENROLL_BATCH_SIZE):
+        removed += _apply(db, courses, course_id, chunk, joining=False)
+    return removed
+
+
+def delete_course(db, courses, course_id: str, teacher_id: str, attempts: int = 3) -> bool:
+    """Unenroll everyone, then delete the course (aggregates.course_deleted).
+
+    Returns False if the course does not exist. Students who enroll while
+    the course is being deleted are unenrolled on the next attempt.
+    """
+    roster = db.collection("courses").document(course_id).collection("students")
+    for attempt in range(attempts):
+        student_ids = [snap.id for snap in roster.select([]).stream()]
+        try:
+            unenroll(db, courses, course_id, student_ids)
+            return aggregates.course_deleted(db, teacher_id, course_id)
+        except CourseNotFound:
+            return False
+        except aggregates.CourseNotEmpty:
+            if attempt == attempts - 1:
+                raise
@@ -0,0 +1,62 @@
+"""
+fast_json.py — orjson responses and pre-encoded static payloads
+
+`FastJSONResponse` is the app's default response class. List endpoints
+return it directly with raw Firestore values, which skips FastAPI's
+`jsonable_encoder` pass and the per-item `isoformat()` loops. Timestamps
+come out as ISO 8601 and NumPy arrays are written natively.
+
+`static_payloads` holds bodies that never change (canned doubt answers, the
+quiz bank, placement drives). They are encoded once when main.py is imported
+and served as bytes.
+"""
+
+import datetime
+
+import orjson
+from starlette.responses import Response
+
+_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+def _default(value):
+    # Firestore timestamps are datetime subclasses, which orjson leaves to us
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    if hasattr(value, "model_dump"):
+        return value.model_dump()
+    # GeoPoint, DocumentReference, ...
+    return str(value)
+
+
+def dumps(content) -> bytes:
+    return orjson.dumps(content, default=_default, option=_OPTIONS)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        return dumps(content)
+
+
+class StaticPayloads:
+    """JSON bodies encoded once, by key."""
+
+    def __init__(self):
+        self._bodies = {}
+
+    def register(self, key: str, content):
+        self._bodies[key] = dumps(content)
+        return content
+
+    def response(self, key: str) -> Response:
+        return Response(self._bodies[key], media_type="application/json")
+
+    def __contains__(self, key) -> bool:
+        return key in self._bodies
+
+
+static_payloads = StaticPayloads()
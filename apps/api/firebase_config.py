@@ -10,7 +10,7 @@ def initialize_firebase():
     if not firebase_admin._apps:
         # Check for service account file
         service_account_path = os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH", "nova-scholar-f10d5-firebase-adminsdk-fbsvc-9ac6252f8f.json")
-        
+
         if os.path.exists(service_account_path):
             cred = credentials.Certificate(service_account_path)
             firebase_admin.initialize_app(cred)
@@ -22,8 +22,22 @@ def initialize_firebase():
             except Exception as e:
                 print(f"Failed to initialize Firebase Admin: {e}")
                 pass
-    
+
     return firestore.client()
 
-db = initialize_firebase()
+_db = None
+
+def get_db():
+    """The process-wide Firestore client, created on first use."""
+    global _db
+    if _db is None:
+        _db = initialize_firebase()
+    return _db
+
+# `from firebase_config import db` still works, but no longer connects at import time
+def __getattr__(name):
+    if name == "db":
+        return get_db()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 auth = firebase_auth
@@ -0,0 +1,475 @@
+"""
+firestore_accounting.py — Per-request Firestore operation accounting
+
+`AccountedClient` wraps a Firestore client (or the in-memory stand-in) and
+records every RPC the app makes through it: documents read, queries issued,
+documents written, round trips and wall time. `FirestoreAccountingMiddleware`
+opens a fresh tally for each HTTP request (carried in a contextvar, so reads
+made from the threadpool or `run_concurrently` are attributed correctly),
+returns it as `X-Firestore-*` response headers, optionally logs it as one
+JSON line, and keeps running totals per route.
+
+Each RPC is also recorded under its *shape*: the collection path with ids
+replaced by `*`, plus the filter fields and operators. A request that issues
+the same shape more than `FIRESTORE_N_PLUS_ONE_THRESHOLD` times (a per-item
+read in a loop) is flagged as an N+1 in the headers and the log.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+from metrics import FIRESTORE_DOCUMENTS, FIRESTORE_DURATION
+
+FIRESTORE_ACCOUNTING = os.getenv("FIRESTORE_ACCOUNTING", "1") == "1"
+FIRESTORE_OPS_LOG = os.getenv("FIRESTORE_OPS_LOG", "0") == "1"
+FIRESTORE_N_PLUS_ONE_THRESHOLD = int(os.getenv("FIRESTORE_N_PLUS_ONE_THRESHOLD", "5"))
+
+_current = contextvars.ContextVar("firestore_request_ops", default=None)
+
+
+class RequestOps:
+    """Firestore operations made while handling one request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+        self.queries = 0
+        self.round_trips = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def record(self, shape: str, reads=0, writes=0, queries=0, seconds=0.0):
+        with self._lock:
+            self.reads += reads
+            self.writes += writes
+            self.queries += queries
+            self.round_trips += 1
+            self.seconds += seconds
+            self.shapes[shape] += 1
+
+    def repeated_shapes(self, threshold: int = FIRESTORE_N_PLUS_ONE_THRESHOLD) -> dict:
+        with self._lock:
+            return {shape: n for shape, n in self.shapes.items() if n > threshold}
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "reads": self.reads,
+                "writes": self.writes,
+                "queries": self.queries,
+                "round_trips": self.round_trips,
+                "firestore_ms": round(self.seconds * 1000, 2),
+            }
+
+
+def current_ops():
+    """The tally for the request being handled, or None outside a request."""
+    return _current.get()
+
+
+def _record(shape: str, started: float, **counts):
+    seconds = time.perf_counter() - started
+    op, _, path = shape.partition(" ")
+    collection = path.split(" ", 1)[0].split(",", 1)[0].split("/", 1)[0]
+    FIRESTORE_DURATION.observe(seconds, op=op, collection=collection)
+    if counts.get("reads"):
+        FIRESTORE_DOCUMENTS.inc(counts["reads"], kind="read", collection=collection)
+    if counts.get("writes"):
+        FIRESTORE_DOCUMENTS.inc(counts["writes"], kind="write", collection=collection)
+
+    ops = _current.get()
+    if ops is not None:
+        ops.record(shape, seconds=seconds, **counts)
+
+
+# ─── Client proxies ───────────────────────────────────────────────────────────
+
+def _collection_shape(path: str) -> str:
+    # users/abc/enrolled_courses -> users/*/enrolled_courses
+    parts = path.strip("/").split("/")
+    return "/".join("*" if i % 2 else part for i, part in enumerate(parts))
+
+
+def _unwrap(value):
+    return value._target if isinstance(value, _Proxy) else value
+
+
+def _unwrap_kwargs(kwargs: dict) -> dict:
+    return {k: _unwrap(v) for k, v in kwargs.items()}
+
+
+class _Proxy:
+    __slots__ = ("_target",)
+
+    def __init__(self, target):
+        object.__setattr__(self, "_target", target)
+
+    def __getattr__(self, name):
+        return getattr(self._target, name)
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def __eq__(self, other):
+        return self._target == _unwrap(other)
+
+    def __hash__(self):
+        return hash(self._target)
+
+
+class _Snapshot(_Proxy):
+    __slots__ = ()
+
+    @property
+    def reference(self):
+        return _Document(self._target.reference)
+
+
+def _snapshots(snaps):
+    return [_Snapshot(s) for s in snaps]
+
+
+class _Document(_Proxy):
+    __slots__ = ()
+
+    @property
+    def parent(self):
+        return _Query(self._target.parent, self._shape)
+
+    @property
+    def _shape(self) -> str:
+        return _collection_shape(self._target.path.rsplit("/", 1)[0])
+
+    def collection(self, name: str):
+        return _Query(self._target.collection(name), f"{self._shape}/*/{name}")
+
+    def get(self, *args, **kwargs):
+        started = time.perf_counter()
+        snap = self._target.get(*args, **_unwrap_kwargs(kwargs))
+        _record(f"get {self._shape}", started, reads=1)
+        return _Snapshot(snap)
+
+    def _write(self, method: str, *args, **kwargs):
+        started = time.perf_counter()
+        result = getattr(self._target, method)(*args, **kwargs)
+        _record(f"{method} {self._shape}", started, writes=1)
+        return result
+
+    def set(self, *args, **kwargs):
+        return self._write("set", *args, **kwargs)
+
+    def create(self, *args, **kwargs):
+        return self._write("create", *args, **kwargs)
+
+    def update(self, *args, **kwargs):
+        return self._write("update", *args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        return self._write("delete", *args, **kwargs)
+
+
+class _Aggregation(_Proxy):
+    __slots__ = ("_shape",)
+
+    def __init__(self, target, shape: str):
+        super().__init__(target)
+        object.__setattr__(self, "_shape", shape)
+
+    def get(self, *args, **kwargs):
+        started = time.perf_counter()
+        result = self._target.get(*args, **_unwrap_kwargs(kwargs))
+        # Billed as one read per batch of up to 1000 index entries
+        _record(f"count {self._shape}", started, reads=1, queries=1)
+        return result
+
+
+class _Query(_Proxy):
+    __slots__ = ("_shape",)
+
+    def __init__(self, target, shape: str):
+        super().__init__(target)
+        object.__setattr__(self, "_shape", shape)
+
+    def _refine(self, method: str, suffix: str, *args, **kwargs):
+        result = getattr(self._target, method)(*args, **_unwrap_kwargs(kwargs))
+        return _Query(result, f"{self._shape}{suffix}")
+
+    def where(self, field_path=None, op_string=None, value=None, **kwargs):
+        if "filter" in kwargs:
+            flt = kwargs["filter"]
+            label = f" {getattr(flt, 'field_path', '?')} {getattr(flt, 'op_string', '?')}"
+            return self._refine("where", label, filter=flt)
+        return self._refine("where", f" {field_path} {op_string}", field_path, op_string, value)
+
+    def order_by(self, field_path, direction="ASCENDING"):
+        desc = " desc" if str(direction).upper().endswith("DESCENDING") else ""
+        return self._refine("order_by", f" order:{field_path}{desc}", field_path, direction=direction)
+
+    def limit(self, count):
+        return self._refine("limit", "", count)
+
+    def offset(self, num_to_skip):
+        return self._refine("offset", "", num_to_skip)
+
+    def select(self, field_paths):
+        return self._refine("select", "", field_paths)
+
+    def start_after(self, document_fields):
+        return self._refine("start_after", "", _unwrap(document_fields))
+
+    def start_at(self, document_fields):
+        return self._refine("start_at", "", _unwrap(document_fields))
+
+    def end_before(self, document_fields):
+        return self._refine("end_before", "", _unwrap(document_fields))
+
+    def end_at(self, document_fields):
+        return self._refine("end_at", "", _unwrap(document_fields))
+
+    def count(self, *args, **kwargs):
+        return _Aggregation(self._target.count(*args, **kwargs), self._shape)
+
+    def document(self, *args, **kwargs):
+        return _Document(self._target.document(*args, **kwargs))
+
+    def add(self, document_data, *args, **kwargs):
+        started = time.perf_counter()
+        update_time, ref = self._target.add(document_data, *args, **kwargs)
+        _record(f"add {self._shape}", started, writes=1)
+        return update_time, _Document(ref)
+
+    def stream(self, *args, **kwargs):
+        started = time.perf_counter()
+        snaps = list(self._target.stream(*args, **_unwrap_kwargs(kwargs)))
+        # An empty result is still billed as one read
+        _record(f"query {self._shape}", started, reads=max(1, len(snaps)), queries=1)
+        return iter(_snapshots(snaps))
+
+    def get(self, *args, **kwargs):
+        return list(self.stream(*args, **kwargs))
+
+    def list_documents(self, *args, **kwargs):
+        started = time.perf_counter()
+        refs = list(self._target.list_documents(*args, **kwargs))
+        _record(f"list {self._shape}", started, reads=max(1, len(refs)), queries=1)
+        return [_Document(r) for r in refs]
+
+
+class _WriteBatch(_Proxy):
+    """Batch or transaction; counts its writes when they are committed."""
+
+    __slots__ = ("_pending",)
+
+    def __init__(self, target):
+        super().__init__(target)
+        object.__setattr__(self, "_pending", [])
+
+    def _stage(self, method: str, reference, *args, **kwargs):
+        reference = _unwrap(reference)
+        self._pending.append(_collection_shape(reference.path.rsplit("/", 1)[0]))
+        getattr(self._target, method)(reference, *args, **kwargs)
+        return self
+
+    def set(self, reference, *args, **kwargs):
+        return self._stage("set", reference, *args, **kwargs)
+
+    def create(self, reference, *args, **kwargs):
+        return self._stage("create", reference, *args, **kwargs)
+
+    def update(self, reference, *args, **kwargs):
+        return self._stage("update", reference, *args, **kwargs)
+
+    def delete(self, reference, *args, **kwargs):
+        return self._stage("delete", reference, *args, **kwargs)
+
+    def _committed(self, method: str):
+        started = time.perf_counter()
+        try:
+            return getattr(self._target, method)()
+        finally:
+            pending, self._pending[:] = list(self._pending), []
+            if pending:
+                shape = "commit " + ",".join(sorted(set(pending)))
+                _record(shape, started, writes=len(pending))
+
+    def commit(self):
+        return self._committed("commit")
+
+    # Called by @firestore.transactional. BeginTransaction and Rollback are
+    # round trips of their own, with no documents read or written
+    def _begin(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._target._begin(*args, **kwargs)
+        finally:
+            _record("begin_transaction", started)
+
+    def _commit(self):
+        return self._committed("_commit")
+
+    def _rollback(self):
+        self._pending[:] = []
+        started = time.perf_counter()
+        try:
+            return self._target._rollback()
+        finally:
+            _record("rollback", started)
+
+
+class _BulkWriter(_WriteBatch):
+    """BulkWriter; writes are counted when flushed (it also sends on its own
+    as batches fill, so the count can lag until the next flush/close)."""
+
+    __slots__ = ()
+
+    def _stage(self, method: str, reference, *args, **kwargs):
+        super()._stage(method, reference, *args, **kwargs)
+        return None
+
+    def flush(self):
+        return self._committed("flush")
+
+    def close(self):
+        return self._committed("close")
+
+
+class AccountedClient(_Proxy):
+    """Firestore client wrapper that attributes RPCs to the current request."""
+
+    __slots__ = ()
+
+    @property
+    def raw(self):
+        return self._target
+
+    def collection(self, path: str):
+        return _Query(self._target.collection(path), _collection_shape(path))
+
+    def document(self, path: str):
+        return _Document(self._target.document(path))
+
+    def batch(self):
+        return _WriteBatch(self._target.batch())
+
+    def transaction(self, **kwargs):
+        return _WriteBatch(self._target.transaction(**kwargs))
+
+    def bulk_writer(self, *args, **kwargs):
+        return _BulkWriter(self._target.bulk_writer(*args, **kwargs))
+
+    def get_all(self, references, *args, **kwargs):
+        refs = [_unwrap(r) for r in references]
+        started = time.perf_counter()
+        snaps = list(self._target.get_all(refs, *args, **_unwrap_kwargs(kwargs)))
+        shapes = sorted({_collection_shape(r.path.rsplit("/", 1)[0]) for r in refs})
+        _record(f"get_all {','.join(shapes)}", started, reads=len(snaps))
+        return _snapshots(snaps)
+
+
+# ─── Middleware ───────────────────────────────────────────────────────────────
+
+class RouteTotals:
+    """Running Firestore totals per route template, for read-billing by route."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def add(self, route: str, ops: dict, n_plus_one: bool):
+        with self._lock:
+            totals = self._routes.setdefault(route, {
+                "requests": 0, "reads": 0, "writes": 0, "queries": 0,
+                "round_trips": 0, "firestore_ms": 0.0, "n_plus_one": 0,
+            })
+            totals["requests"] += 1
+            for key in ("reads", "writes", "queries", "round_trips", "firestore_ms"):
+                totals[key] += ops[key]
+            totals["n_plus_one"] += int(n_plus_one)
+
+    def stats(self) -> dict:
+        with self._lock:
+            result = {}
+            for route, totals in self._routes.items():
+                n = totals["requests"]
+                result[route] = {
+                    **totals,
+                    "firestore_ms": round(totals["firestore_ms"], 2),
+                    "reads_per_request": round(totals["reads"] / n, 2),
+                }
+            return result
+
+
+route_totals = RouteTotals()
+
+
+class FirestoreAccountingMiddleware:
+    """ASGI middleware: one RequestOps per HTTP request, reported in
+    `X-Firestore-*` headers and (with FIRESTORE_OPS_LOG=1) a JSON log line."""
+
+    def __init__(self, app, threshold: int = FIRESTORE_N_PLUS_ONE_THRESHOLD,
+                 log: bool = FIRESTORE_OPS_LOG):
+        self.app = app
+        self.threshold = threshold
+        self.log = log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ops = RequestOps()
+        token = _current.set(ops)
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                summary = ops.to_dict()
+                headers = list(message.get("headers", []))
+                headers += [
+                    (b"x-firestore-reads", str(summary["reads"]).encode()),
+                    (b"x-firestore-writes", str(summary["writes"]).encode()),
+                    (b"x-firestore-queries", str(summary["queries"]).encode()),
+                    (b"x-firestore-round-trips", str(summary["round_trips"]).encode()),
+                    (b"x-firestore-time-ms", str(summary["firestore_ms"]).encode()),
+                ]
+                repeated = ops.repeated_shapes(self.threshold)
+                if repeated:
+                    worst = max(repeated, key=repeated.get)
+                    headers.append((b"x-firestore-n-plus-one",
+                                    f"{repeated[worst]}x {worst}".encode("utf-8", "replace")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _current.reset(token)
+            self._report(scope, ops, status["code"], time.perf_counter() - started)
+
+    def _report(self, scope, ops: RequestOps, status_code: int, elapsed: float):
+        route = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+        summary = ops.to_dict()
+        repeated = ops.repeated_shapes(self.threshold)
+        route_totals.add(f"{scope.get('method', '')} {route}", summary, bool(repeated))
+
+        if repeated:
+            print(f"⚠️  N+1 Firestore pattern in {scope.get('method')} {route}: "
+                  + "; ".join(f"{n}x {shape}" for shape, n in repeated.items()))
+        if self.log:
+            print(json.dumps({
+                "event": "firestore_ops",
+                "method": scope.get("method"),
+                "route": route,
+                "path": scope.get("path"),
+                "status": status_code,
+                "duration_ms": round(elapsed * 1000, 2),
+                **summary,
+                "n_plus_one": repeated,
+            }))
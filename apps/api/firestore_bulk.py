@@ -0,0 +1,69 @@
+"""
+firestore_bulk.py — Bulk reads for Firestore
+
+`get_documents` replaces per-document `.get()` loops with `db.get_all` in
+chunks (one round trip per chunk), optionally fetching chunks concurrently.
+`run_concurrently` fans a per-item function (e.g. streaming a subcollection
+per course) out over the same small shared thread pool.
+"""
+
+import contextvars
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+GET_ALL_CHUNK_SIZE = int(os.getenv("FIRESTORE_GET_ALL_CHUNK_SIZE", "100"))
+BULK_MAX_WORKERS = int(os.getenv("FIRESTORE_BULK_MAX_WORKERS", "4"))
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=BULK_MAX_WORKERS,
+                                       thread_name_prefix="firestore-bulk")
+    return _executor
+
+
+def chunked(items, size: int):
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def run_concurrently(fn, items, concurrent: bool = True) -> list:
+    """[fn(item) for item in items], run on the shared pool; keeps input order."""
+    items = list(items)
+    if not concurrent or len(items) <= 1:
+        return [fn(item) for item in items]
+    # Each item runs in a copy of the caller's context, so per-request state
+    # (e.g. Firestore op accounting) follows the work onto the pool
+    executor = _get_executor()
+    futures = [executor.submit(contextvars.copy_context().run, fn, item) for item in items]
+    return [f.result() for f in futures]
+
+
+def get_documents(db, refs, chunk_size: int = GET_ALL_CHUNK_SIZE,
+                  concurrent: bool = True) -> dict:
+    """Fetch DocumentReferences in `get_all` chunks.
+
+    Returns {doc_id: snapshot} for the documents that exist.
+    """
+    refs = list(refs)
+    if not refs:
+        return {}
+
+    def fetch(chunk):
+        return [snap for snap in db.get_all(chunk) if snap.exists]
+
+    found = {}
+    for snaps in run_concurrently(fetch, chunked(refs, chunk_size), concurrent):
+        for snap in snaps:
+            found[snap.id] = snap
+    return found
+
+
+def get_documents_by_id(db, collection: str, ids, **kwargs) -> dict:
+    """{doc_id: data} for the ids in `collection` that exist."""
+    coll = db.collection(collection)
+    snaps = get_documents(db, [coll.document(i) for i in dict.fromkeys(ids)], **kwargs)
+    return {doc_id: snap.to_dict() for doc_id, snap in snaps.items()}
@@ -0,0 +1,70 @@
+"""
+fuzzy_index.py — Precompiled fuzzy matcher for the canned answer/quiz banks
+
+Keys are normalized once, when the index is built. Each key is indexed by its
+tokens and their character trigrams, so a query only scores the keys it
+shares at least one trigram with (typos still hit, unrelated keys are never
+scored). Scores are identical to `fuzz.token_set_ratio` on the raw strings.
+
+thefuzz is imported and the index built on first use (or by `build()` during
+warm-up), not when the module defining the index is imported.
+"""
+
+import threading
+
+
+def _grams(text: str) -> set:
+    grams = set()
+    for token in text.split():
+        grams.add(token)
+        padded = f" {token} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class FuzzyIndex:
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self._normalized = None
+        self._index = None  # gram -> set of key positions
+        self._lock = threading.Lock()
+
+    def build(self):
+        if self._index is not None:
+            return
+        from thefuzz import utils
+        with self._lock:
+            if self._index is not None:
+                return
+            normalized = [utils.full_process(k, force_ascii=True) for k in self.keys]
+            index = {}
+            for pos, text in enumerate(normalized):
+                for gram in _grams(text):
+                    index.setdefault(gram, set()).add(pos)
+            self._normalized = normalized
+            self._index = index
+
+    def candidates(self, processed_query: str) -> set:
+        self.build()
+        found = set()
+        for gram in _grams(processed_query):
+            found |= self._index.get(gram, set())
+        return found
+
+    def best(self, query: str, threshold: int = 0):
+        """(key, score) of the best match scoring >= threshold, else (None, 0)."""
+        from thefuzz import fuzz, utils
+        self.build()
+        processed = utils.full_process(query, force_ascii=True)
+        best_pos, best_score = None, 0
+        # Sorted so ties resolve to the earliest key, as a linear scan would
+        for pos in sorted(self.candidates(processed)):
+            score = fuzz.token_set_ratio(processed, self._normalized[pos], full_process=False)
+            if score > best_score:
+                best_pos, best_score = pos, score
+        if best_pos is None or best_score < threshold:
+            return None, 0
+        return self.keys[best_pos], best_score
+
+    def best_many(self, queries, threshold: int = 0) -> list:
+        return [self.best(q, threshold) for q in queries]
@@ -0,0 +1,191 @@
+"""
+gemini_pool.py — Application-lifetime Gemini client with bounded concurrency
+
+One `genai.Client` is created in the FastAPI lifespan and reused for every
+doubt, so HTTP connections and TLS sessions are pooled. A semaphore caps the
+number of in-flight Gemini calls; requests beyond that wait in a bounded queue
+and are rejected once it is full, so a latency spike cannot tie up every
+worker thread.
+
+The SDK itself (`google.genai`, the slowest import in the app) is imported
+by `start()`, which the lifespan runs in the background, not when this
+module is imported.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+from metrics import GEMINI_DURATION, GEMINI_REJECTED
+
+GEMINI_MODEL = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+GEMINI_MAX_QUEUE = int(os.getenv("GEMINI_MAX_QUEUE", "32"))
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "30"))
+
+
+class GeminiUnavailable(Exception):
+    """Raised when the call queue is full or a slot is not freed in time."""
+
+
+class GeminiPool:
+    def __init__(self, model: str = GEMINI_MODEL,
+                 max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+                 max_queue: int = GEMINI_MAX_QUEUE,
+                 timeout: float = GEMINI_TIMEOUT):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.client = None
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+
+    # ── Lifecycle ────────────────────────────────────────────────────────────
+
+    def start(self):
+        """Create the shared client. Returns False if no API key is set."""
+        with self._lock:
+            if self.client is not None:
+                return True
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if not api_key:
+                return False
+            from google import genai
+            from google.genai import types
+            self.client = genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(timeout=int(self.timeout * 1000)),
+            )
+            return True
+
+    async def aclose(self):
+        with self._lock:
+            client, self.client = self.client, None
+        if client is not None:
+            try:
+                await client.aio.aclose()
+                client.close()
+            except Exception:
+                pass
+
+    # ── Calls ────────────────────────────────────────────────────────────────
+
+    def _enter_queue(self):
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.rejected += 1
+                GEMINI_REJECTED.inc()
+                raise GeminiUnavailable("Ask Manan is busy right now, please try again shortly.")
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def _acquired(self, ok: bool):
+        with self._lock:
+            self.waiting -= 1
+            if ok:
+                self.in_flight += 1
+            else:
+                self.rejected += 1
+        if not ok:
+            GEMINI_REJECTED.inc()
+            raise GeminiUnavailable("Ask Manan is busy right now, please try again shortly.")
+
+    def _release(self, started: float, ok: bool, mode: str = "generate"):
+        self._slots.release()
+        GEMINI_DURATION.observe(time.perf_counter() - started, mode=mode,
+                                outcome="ok" if ok else "error")
+        with self._lock:
+            self.in_flight -= 1
+            self.total_seconds += time.perf_counter() - started
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+
+    def generate(self, contents) -> str:
+        """Blocking `generate_content` that respects the concurrency limit."""
+        if not self.start():
+            raise RuntimeError("GOOGLE_API_KEY not found in environment variables.")
+
+        self._enter_queue()
+        self._acquired(self._slots.acquire(timeout=self.timeout))
+
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = self.client.models.generate_content(
+                model=self.model,
+                contents=contents,
+            )
+            ok = True
+            return response.text
+        finally:
+            self._release(started, ok)
+
+    async def _acquire_async(self) -> bool:
+        # threading.Semaphore is shared with the sync path, so poll it instead
+        # of parking a thread on acquire()
+        deadline = time.monotonic() + self.timeout
+        delay = 0.005
+        while not self._slots.acquire(blocking=False):
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.1)
+        return True
+
+    async def stream(self, contents):
+        """Async generator of answer text chunks from the streaming API."""
+        # start() may import the SDK, so keep it off the event loop
+        if self.client is None and not await asyncio.to_thread(self.start):
+            raise RuntimeError("GOOGLE_API_KEY not found in environment variables.")
+
+        self._enter_queue()
+        try:
+            acquired = await self._acquire_async()
+        except BaseException:
+            # Cancelled while queued (e.g. the SSE client went away): give the
+            # queue place back. _acquire_async never yields while holding a
+            # slot, so there is none to release here.
+            with self._lock:
+                self.waiting -= 1
+            raise
+        self._acquired(acquired)
+
+        started = time.perf_counter()
+        ok = False
+        try:
+            chunks = await self.client.aio.models.generate_content_stream(
+                model=self.model,
+                contents=contents,
+            )
+            async for chunk in chunks:
+                if chunk.text:
+                    yield chunk.text
+            ok = True
+        finally:
+            self._release(started, ok, mode="stream")
+
+    def stats(self) -> dict:
+        with self._lock:
+            calls = self.completed + self.failed
+            return {
+                "model": self.model,
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "queue_depth": self.waiting,
+                "max_queue_depth": self.max_waiting,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "avg_seconds": round(self.total_seconds / calls, 4) if calls else 0.0,
+            }
@@ -0,0 +1,213 @@
+"""
+http_cache.py — ETags, 304s and an in-process response cache for read-mostly GETs
+
+`ConditionalGetMiddleware` serves the GET routes listed in its `rules`:
+
+* successful JSON bodies get a strong ETag (a SHA-256 of the body) and the
+  rule's Cache-Control header, and `If-None-Match` is answered with 304;
+* the body is kept in `response_cache` under the path and query string, so a
+  repeat request, conditional or not, is answered without running the handler
+  or touching Firestore. Rules with `ttl=0` skip this step and only get
+  ETags, for routes whose handler must run on every request (e.g. to check
+  the caller's token).
+
+Entries are tagged ("courses", "settings", ...). Write paths call
+`response_cache.invalidate(tag)`, and a tag's generation is captured before
+the handler runs, so a response computed from data that changed mid-request
+is never served. Other workers' writes are only seen once HTTP_CACHE_TTL
+expires. Because ETags are content hashes, they agree across workers and a
+304 is still possible after a miss.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+HTTP_CACHE_SIZE = int(os.getenv("HTTP_CACHE_SIZE", "1024"))
+HTTP_CACHE_TTL = float(os.getenv("HTTP_CACHE_TTL", "30"))
+
+# Larger bodies still get an ETag but are not kept in memory
+_MAX_CACHED_BODY = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class CacheRule:
+    tags: tuple
+    cache_control: str = "no-cache"
+    ttl: float = None
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = HTTP_CACHE_SIZE, ttl: float = HTTP_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (expires_at, generations, etag, body)
+        self._generations = {}         # tag -> int
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    def generations(self, tags) -> tuple:
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def invalidate(self, *tags):
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+
+    def get(self, key, tags):
+        """(etag, body) if cached, fresh and not invalidated since; else None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            current = tuple(self._generations.get(tag, 0) for tag in tags)
+            if entry is None or entry[0] <= now or entry[1] != current:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2], entry[3]
+
+    def set(self, key, generations: tuple, etag: str, body: bytes, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or len(body) > _MAX_CACHED_BODY:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, generations, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+response_cache = ResponseCache()
+
+
+def etag_for(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison: W/"x" matches "x"
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _is_error(body: bytes) -> bool:
+    # Handlers report failures as {"status": "error", ...} with HTTP 200
+    return b'"status":"error"' in body[:64] or b'"status": "error"' in body[:64]
+
+
+class ConditionalGetMiddleware:
+    """ASGI middleware applying `rules` (route template -> CacheRule) to GETs."""
+
+    def __init__(self, app, router, rules: dict, cache: ResponseCache = response_cache):
+        self.app = app
+        self.router = router
+        self.rules = rules
+        self.cache = cache
+
+    def _rule(self, scope):
+        from starlette.routing import Match
+        for route in self.router.routes:
+            path = getattr(route, "path", None)
+            if path in self.rules and route.matches(scope)[0] == Match.FULL:
+                return self.rules[path]
+        return None
+
+    async def _send_cached(self, send, status, etag, rule, body=b""):
+        headers = [
+            (b"etag", etag.encode("latin-1")),
+            (b"cache-control", rule.cache_control.encode("latin-1")),
+        ]
+        if status == 200:
+            headers += [(b"content-type", b"application/json"),
+                        (b"content-length", str(len(body)).encode("latin-1"))]
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        rule = self._rule(scope)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        if_none_match = ""
+        for name, value in scope.get("headers", []):
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+        key = (scope["path"], scope.get("query_string", b""))
+
+        cached = self.cache.get(key, rule.tags) if rule.ttl != 0 else None
+        if cached is not None:
+            etag, body = cached
+            if if_none_match and _matches(if_none_match, etag):
+                self.cache.not_modified += 1
+                await self._send_cached(send, 304, etag, rule)
+            else:
+                await self._send_cached(send, 200, etag, rule, body)
+            return
+
+        generations = self.cache.generations(rule.tags)
+        start = {}
+        chunks = []
+
+        async def buffer(message):
+            # Hold the response until the whole body is known, to hash it
+            if message["type"] == "http.response.start":
+                start.update(message)
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    await self._finish(send, start, b"".join(chunks), rule, key,
+                                       generations, if_none_match)
+            else:
+                await send(message)
+
+        await self.app(scope, receive, buffer)
+
+    async def _finish(self, send, start, body, rule, key, generations, if_none_match):
+        headers = list(start.get("headers", []))
+        content_type = next((v for n, v in headers if n == b"content-type"), b"")
+        if start.get("status") != 200 or not content_type.startswith(b"application/json") or _is_error(body):
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        etag = etag_for(body)
+        self.cache.set(key, generations, etag, body, rule.ttl)
+        if if_none_match and _matches(if_none_match, etag):
+            self.cache.not_modified += 1
+            await self._send_cached(send, 304, etag, rule)
+            return
+        headers += [(b"etag", etag.encode("latin-1")),
+                    (b"cache-control", rule.cache_control.encode("latin-1"))]
+        await send({**start, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
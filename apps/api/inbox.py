@@ -0,0 +1,245 @@
+"""
+inbox.py — Per-user notification inbox with maintained unread counters
+
+    notifications/{id}              target_uid (a uid, or "all" for broadcasts), read,
+                                    seq (broadcasts only: 1, 2, 3, ...)
+    inbox/{uid}                     unread (targeted notifications not yet read),
+                                    broadcasts_read (highest broadcast seq read)
+    system/notification_counters    broadcasts (seq of the latest broadcast)
+
+A user's feed is one indexed query, `target_uid in [uid, "all"]` ordered by
+created_at, and the unread badge is two document reads in one `get_all`:
+targeted unread plus broadcasts newer than `broadcasts_read`. Broadcasts are
+written once rather than fanned out to every student, so reading one marks
+it and every older broadcast as read.
+
+Counters are updated in the same batch as the notification they count, and
+marking read decrements them by the number of documents actually flipped, in
+the same batch as the flip. Each flip is conditional on the notification's
+update_time, so when two requests mark the same notification, one batch
+fails and is rebuilt from a fresh read instead of decrementing twice.
+`python recompute_inbox.py` rebuilds the counters from scratch if they ever
+drift, and gives notifications written before the inbox existed their
+target_uid, seq and read fields.
+"""
+
+from firebase_admin import firestore
+from google.api_core.exceptions import FailedPrecondition
+
+from firestore_bulk import chunked
+from pagination import paginate
+
+BROADCAST = "all"
+
+# Firestore allows at most 500 writes per batch
+_BATCH_LIMIT = 500
+
+# Re-reads after a mark-read batch lost a race with another one
+_MAX_ATTEMPTS = 5
+
+
+def inbox_ref(db, uid: str):
+    return db.collection("inbox").document(uid)
+
+
+def counters_ref(db):
+    return db.collection("system").document("notification_counters")
+
+
+# ─── Writes ───────────────────────────────────────────────────────────────────
+
+def notify(batch, db, uid: str, data: dict, ref=None):
+    """Add a notification for `uid` and its unread increment to the batch.
+
+    Pass `ref` to write to a known document id (e.g. for idempotent retries).
+    It is created, not overwritten, so replaying a batch that already landed
+    fails with AlreadyExists instead of counting it twice. Returns the
+    notification's reference.
+    """
+    write = batch.create if ref is not None else batch.set
+    ref = ref or db.collection("notifications").document()
+    write(ref, {
+        **data,
+        "target_uid": uid,
+        "read": False,
+        "created_at": firestore.SERVER_TIMESTAMP,
+    })
+    batch.set(inbox_ref(db, uid), {"unread": firestore.Increment(1)}, merge=True)
+    return ref
+
+
+def broadcast(db, data: dict):
+    """Write a notification for everyone; returns its reference."""
+    ref = db.collection("notifications").document()
+    counters = counters_ref(db)
+
+    @firestore.transactional
+    def txn(transaction):
+        snap = counters.get(transaction=transaction)
+        seq = (snap.to_dict().get("broadcasts", 0) if snap.exists else 0) + 1
+        transaction.set(counters, {"broadcasts": seq}, merge=True)
+        transaction.set(ref, {
+            **data,
+            "target_uid": BROADCAST,
+            "seq": seq,
+            "created_at": firestore.SERVER_TIMESTAMP,
+        })
+
+    txn(db.transaction())
+    return ref
+
+
+# ─── Reads ────────────────────────────────────────────────────────────────────
+
+def _counter_state(db, uid: str):
+    """(inbox dict, broadcasts sent) from one get_all round trip."""
+    inbox, counters = {}, {}
+    for snap in db.get_all([inbox_ref(db, uid), counters_ref(db)]):
+        if snap.exists:
+            if snap.reference.id == uid:
+                inbox = snap.to_dict()
+            else:
+                counters = snap.to_dict()
+    return inbox, counters.get("broadcasts", 0)
+
+
+def unread_count(inbox: dict, broadcasts: int) -> int:
+    unread_broadcasts = max(0, broadcasts - inbox.get("broadcasts_read", 0))
+    return max(0, inbox.get("unread", 0)) + unread_broadcasts
+
+
+def is_read(data: dict, inbox: dict) -> bool:
+    if data.get("target_uid") == BROADCAST:
+        return data.get("seq", 0) <= inbox.get("broadcasts_read", 0)
+    return bool(data.get("read", False))
+
+
+def read_inbox(db, uid: str, page_size: int = None, cursor: str = None):
+    """(snapshots, inbox dict, unread count, next_cursor) for one page of a user's feed."""
+    query = db.collection("notifications").where("target_uid", "in", [uid, BROADCAST])
+    snaps, next_cursor = paginate(query, order_by="created_at", descending=True,
+                                  page_size=page_size, cursor=cursor)
+    inbox, broadcasts = _counter_state(db, uid)
+    return snaps, inbox, unread_count(inbox, broadcasts), next_cursor
+
+
+# ─── Mark read ────────────────────────────────────────────────────────────────
+
+def _flip(db, uid: str, snaps: list) -> int:
+    """Set read on the unread ones among `snaps` (the user's targeted
+    notifications) and decrement `unread` by as many in the same batch;
+    returns how many were flipped."""
+    flipped = 0
+    for chunk in chunked(snaps, _BATCH_LIMIT - 1):
+        for attempt in range(_MAX_ATTEMPTS):
+            unread = [snap for snap in chunk if snap.exists and not snap.to_dict().get("read", False)]
+            if not unread:
+                break
+            batch = db.batch()
+            for snap in unread:
+                # Fails if another request flipped (or otherwise changed) it since
+                batch.update(snap.reference, {"read": True},
+                             option=db.write_option(last_update_time=snap.update_time))
+            batch.set(inbox_ref(db, uid), {"unread": firestore.Increment(-len(unread))}, merge=True)
+            try:
+                batch.commit()
+                flipped += len(unread)
+                break
+            except FailedPrecondition:
+                if attempt == _MAX_ATTEMPTS - 1:
+                    raise
+                chunk = list(db.get_all([snap.reference for snap in chunk]))
+    return flipped
+
+
+def mark_read(db, uid: str, notification_ids) -> int:
+    """Mark the user's notifications read; returns how many were unread."""
+    refs = [db.collection("notifications").document(i) for i in dict.fromkeys(notification_ids)]
+    targeted, latest_broadcast = [], 0
+    inbox, _ = _counter_state(db, uid)
+    for snap in db.get_all(refs):
+        if not snap.exists:
+            continue
+        data = snap.to_dict()
+        if data.get("target_uid") == uid:
+            targeted.append(snap)
+        elif data.get("target_uid") == BROADCAST and not is_read(data, inbox):
+            latest_broadcast = max(latest_broadcast, data.get("seq", 0))
+
+    flipped = _flip(db, uid, targeted)
+    if latest_broadcast:
+        inbox_ref(db, uid).set({"broadcasts_read": firestore.Maximum(latest_broadcast)}, merge=True)
+    broadcasts_marked = max(0, latest_broadcast - inbox.get("broadcasts_read", 0))
+    return flipped + broadcasts_marked
+
+
+def mark_all_read(db, uid: str) -> int:
+    """Mark every notification read and reset the user's counters.
+
+    Relies on every targeted notification having a `read` field, which
+    recompute_inbox.py backfills for ones written before the inbox existed.
+    """
+    inbox, broadcasts = _counter_state(db, uid)
+    unread = list(
+        db.collection("notifications")
+        .where("target_uid", "==", uid)
+        .where("read", "==", False)
+        .select(["read"])
+        .stream()
+    )
+    # Decrement rather than write 0: a notification arriving after the query
+    # is not marked, so it must stay counted
+    flipped = _flip(db, uid, unread)
+    inbox_ref(db, uid).set({"broadcasts_read": firestore.Maximum(broadcasts)}, merge=True)
+    return flipped + max(0, broadcasts - inbox.get("broadcasts_read", 0))
+
+
+# ─── Backfill ─────────────────────────────────────────────────────────────────
+
+def _timestamp(value) -> float:
+    return value.timestamp() if hasattr(value, "timestamp") else 0.0
+
+
+def recompute_inbox_counters(db) -> dict:
+    """Number legacy broadcasts, backfill `read` and rebuild every user's
+    unread counter.
+
+    Notifications written before the inbox existed with no target_uid field
+    were broadcasts, so they get target_uid "all" and a seq in created_at
+    order. Targeted ones without a `read` field get read: False, so
+    mark_all_read's query finds them. A target_uid of None (a doubt whose
+    course could not be found) has no recipient; those are counted as
+    orphaned and left alone.
+    """
+    snaps = list(db.collection("notifications").select(["target_uid", "read", "seq", "created_at"]).stream())
+    broadcasts = sorted(
+        (s for s in snaps if s.to_dict().get("target_uid", BROADCAST) == BROADCAST),
+        key=lambda s: _timestamp(s.to_dict().get("created_at")),
+    )
+    unread, missing_read, orphaned = {}, [], 0
+    for snap in snaps:
+        data = snap.to_dict()
+        uid = data.get("target_uid", BROADCAST)
+        if uid == BROADCAST:
+            continue
+        if uid is None:
+            orphaned += 1
+            continue
+        if "read" not in data:
+            missing_read.append(snap.reference)
+        if not data.get("read", False):
+            unread[uid] = unread.get(uid, 0) + 1
+
+    writes = [(s.reference, {"target_uid": BROADCAST, "seq": seq}) for seq, s in enumerate(broadcasts, 1)]
+    writes += [(ref, {"read": False}) for ref in missing_read]
+    writes += [(inbox_ref(db, uid), {"unread": count}) for uid, count in unread.items()]
+    # Users with nothing unread any more
+    writes += [(ref, {"unread": 0}) for ref in db.collection("inbox").list_documents()
+               if ref.id not in unread]
+    writes.append((counters_ref(db), {"broadcasts": len(broadcasts)}))
+    for chunk in chunked(writes, _BATCH_LIMIT):
+        batch = db.batch()
+        for ref, values in chunk:
+            batch.set(ref, values, merge=True)
+        batch.commit()
+    return {"broadcasts": len(broadcasts), "users_with_unread": len(unread), "orphaned": orphaned}
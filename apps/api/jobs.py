@@ -0,0 +1,187 @@
+"""
+jobs.py — Resumable background jobs with progress in Firestore
+
+A job is a function registered under a `kind` and run on a small thread
+pool. Its state lives in `jobs/{job_id}` (status, counters, a resume
+`cursor`, timestamps), so any worker can report progress and an interrupted
+job can be resumed from its last checkpoint:
+
+    runner.register("risk_recompute", recompute_risk_statuses)
+    job_id = runner.start("risk_recompute", {"attendance_threshold": 75})
+    runner.status(job_id)   # {"status": "running", "processed": 1200, ...}
+
+Job functions receive a `Job` and should call `job.checkpoint(...)` after
+each durable unit of work and return early when `job.cancelled` is set.
+"""
+
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from firebase_admin import firestore
+
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "2"))
+
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobNotFound(KeyError):
+    pass
+
+
+class Job:
+    def __init__(self, ref, state: dict):
+        self.ref = ref
+        self.id = ref.id
+        self.state = state
+        self._cancel = threading.Event()
+
+    @property
+    def params(self) -> dict:
+        return self.state.get("params", {})
+
+    @property
+    def cursor(self):
+        return self.state.get("cursor")
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _save(self, values: dict):
+        self.state.update(values)
+        self.ref.set({**values, "updated_at": firestore.SERVER_TIMESTAMP}, merge=True)
+
+    def checkpoint(self, cursor=None, **progress):
+        """Persist progress; `cursor` is where a resumed run picks up."""
+        values = dict(progress)
+        if cursor is not None:
+            values["cursor"] = cursor
+        self._save(values)
+
+
+class JobRunner:
+    def __init__(self, db, max_workers: int = JOBS_MAX_WORKERS):
+        self._db = db
+        self._handlers = {}
+        self._active = {}  # job_id -> Job, for jobs running in this process
+        self._lock = threading.Lock()
+        self._max_workers = max_workers
+        self._executor = None
+
+    @property
+    def _coll(self):
+        return self._db.collection("jobs")
+
+    def register(self, kind: str, fn):
+        self._handlers[kind] = fn
+
+    def _submit(self, job: Job, fn):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self._max_workers,
+                                                    thread_name_prefix="jobs")
+            self._active[job.id] = job
+        self._executor.submit(self._run, job, fn)
+
+    def _run(self, job: Job, fn):
+        started = time.monotonic()
+        try:
+            result = fn(job) or {}
+            status = CANCELLED if job.cancelled else COMPLETED
+            job._save({**result, "status": status, "finished_at": firestore.SERVER_TIMESTAMP,
+                       "elapsed_seconds": round(time.monotonic() - started, 2)})
+        except Exception as e:
+            traceback.print_exc()
+            print(f"⚠️  Job {job.id} ({job.state.get('kind')}) failed: {e}")
+            try:
+                job._save({"status": FAILED, "error": str(e)})
+            except Exception:
+                pass
+        finally:
+            with self._lock:
+                self._active.pop(job.id, None)
+
+    def start(self, kind: str, params: dict = None, supersede: bool = False) -> str:
+        """Start a new job; with `supersede`, cancel running jobs of the same kind here."""
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+        if supersede:
+            with self._lock:
+                for active in self._active.values():
+                    if active.state.get("kind") == kind:
+                        active.cancel()
+
+        ref = self._coll.document(uuid.uuid4().hex)
+        state = {"kind": kind, "params": params or {}, "status": RUNNING, "cursor": None}
+        job = Job(ref, state)
+        ref.set({**state, "created_at": firestore.SERVER_TIMESTAMP,
+                 "updated_at": firestore.SERVER_TIMESTAMP})
+        self._submit(job, self._handlers[kind])
+        return job.id
+
+    def resume(self, job_id: str) -> str:
+        """Restart a failed, cancelled or interrupted job from its last checkpoint."""
+        with self._lock:
+            if job_id in self._active:
+                return job_id
+        doc = self._coll.document(job_id).get()
+        if not doc.exists:
+            raise JobNotFound(job_id)
+        state = doc.to_dict()
+        if state.get("status") == COMPLETED:
+            raise ValueError("Job already completed")
+        kind = state.get("kind")
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind: {kind}")
+
+        job = Job(doc.reference, state)
+        job._save({"status": RUNNING, "error": None, "resumed_at": firestore.SERVER_TIMESTAMP})
+        self._submit(job, self._handlers[kind])
+        return job.id
+
+    def cancel(self, job_id: str) -> bool:
+        """Ask a job running in this process to stop at its next checkpoint."""
+        with self._lock:
+            job = self._active.get(job_id)
+        if job is None:
+            return False
+        job.cancel()
+        return True
+
+    def status(self, job_id: str) -> dict:
+        doc = self._coll.document(job_id).get()
+        if not doc.exists:
+            raise JobNotFound(job_id)
+        state = doc.to_dict()
+        state["id"] = job_id
+        state["active_here"] = job_id in self._active
+        # List params (e.g. the fan-out's student_ids, up to 20000) are
+        # reported as counts so progress polls stay small
+        params = state.get("params") or {}
+        state["params"] = {
+            (f"{key}_count" if isinstance(value, list) else key): (len(value) if isinstance(value, list) else value)
+            for key, value in params.items()
+        }
+        for key in ("created_at", "updated_at", "finished_at", "resumed_at"):
+            if state.get(key) is not None and hasattr(state[key], "isoformat"):
+                state[key] = state[key].isoformat()
+        return state
+
+    def shutdown(self):
+        """Cancel jobs in this process; they can be resumed later."""
+        with self._lock:
+            for job in self._active.values():
+                job.cancel()
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
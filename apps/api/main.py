@@ -1,37 +1,86 @@
-
-import os
+import startup  # first, so its clock starts before the heavy imports
+import json
 import random
+from contextlib import asynccontextmanager
 from typing import Optional, List
 from fastapi import FastAPI, UploadFile, File, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from google import genai
-import firebase_admin
-from firebase_admin import credentials, firestore, auth
-from thefuzz import fuzz
+from firebase_admin import firestore
+from datastore import DataStore
+from fuzzy_index import FuzzyIndex
+from firestore_bulk import get_documents_by_id, run_concurrently
+import aggregates
+import inbox
+import enrollment
+from enrollment import CourseNotFound
+from query_planner import chunk_queries
+from pagination import paginate, DOCUMENT_ID, MAX_PAGE_SIZE
+from settings_cache import SettingsCache, DEFAULT_SETTINGS
+from auth_cache import AuthCache
+from gemini_pool import GeminiPool, GeminiUnavailable
+from answer_cache import AnswerCache
+from firestore_accounting import FirestoreAccountingMiddleware, route_totals
+import metrics
+import risk
+import risk_recompute
+import notification_fanout
+from jobs import JobRunner, JobNotFound
+from resume_analyzer import (ResumeAnalyzerPool, ResumeUnreadable, AnalysisTimeout,
+                             AnalyzerUnavailable, RESUME_MAX_BYTES)
+from resume_cache import ResumeCache
+from uploads import read_upload, UploadTooLarge, UploadSizeLimitMiddleware
+from http_cache import CacheRule, ConditionalGetMiddleware, response_cache
+from fast_json import FastJSONResponse, static_payloads
+from course_cache import CourseCache
+from google.api_core.exceptions import NotFound
 
 load_dotenv()
 
-# ─── Initialize Firebase Admin SDK ────────────────────────────────────────────
-_service_account_path = os.getenv(
-    "FIREBASE_SERVICE_ACCOUNT_PATH",
-    "nova-scholar-f10d5-firebase-adminsdk-fbsvc-9ac6252f8f.json"
-)
-
-if not firebase_admin._apps:
-    if os.path.exists(_service_account_path):
-        _cred = credentials.Certificate(_service_account_path)
-        firebase_admin.initialize_app(_cred)
-        print(f"✅ Firebase Admin initialized with: {_service_account_path}")
-    else:
-        print(f"⚠️  Service account not found: {_service_account_path}")
-
-db = firestore.client()
+# ─── Data Store ───────────────────────────────────────────────────────────────
+# Firestore by default; DATASTORE_BACKEND=memory for offline runs (see datastore.py)
+store = DataStore.from_env()
+settings_cache = SettingsCache(store.client,
+                               on_change=lambda: response_cache.invalidate("settings"))
+auth_cache = AuthCache(store.client)
+gemini = GeminiPool()
+answer_cache = AnswerCache()
+resume_pool = ResumeAnalyzerPool()
+resume_cache = ResumeCache()
+course_cache = CourseCache(store.client)
+job_runner = JobRunner(store.client)
+job_runner.register(risk_recompute.JOB_KIND, risk_recompute.make_job(store.client))
+job_runner.register(notification_fanout.JOB_KIND, notification_fanout.make_job(store.client))
+warmup = startup.Warmup()
 
 # ─── FastAPI App ──────────────────────────────────────────────────────────────
 
-app = FastAPI(title="Manan API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Creating the Firebase app and client is cheap; the first RPC (channel,
+    # TLS, auth token) is not, so that happens in the background warm-up
+    store.connect()
+    answer_cache.load()
+    warmup.start([
+        ("firestore", settings_cache.start),
+        ("settings", settings_cache.get_all),
+        ("fuzzy_index", lambda: (_doubt_index.build(), _quiz_index.build())),
+        ("gemini", gemini.start),
+        ("resume_pool", resume_pool.start),
+    ], required=("firestore", "settings", "fuzzy_index"))
+    yield
+    warmup.join(timeout=5)
+    answer_cache.save()
+    await gemini.aclose()
+    resume_pool.shutdown()
+    job_runner.shutdown()
+    settings_cache.stop()
+
+
+app = FastAPI(title="Manan API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
 # CORS Configuration
 origins = [
@@ -39,20 +88,94 @@ origins = [
     "https://manan-iota.vercel.app",
 ]
 
+# Oversized uploads get a 413 before their multipart body is parsed
+# (added before CORS so the 413 still carries CORS headers)
+app.add_middleware(UploadSizeLimitMiddleware, limits={"/analyze-resume": RESUME_MAX_BYTES})
+# ETags, 304s and cached bodies for read-mostly GETs; write paths call
+# response_cache.invalidate(tag) (see http_cache.py)
+app.add_middleware(ConditionalGetMiddleware, router=app.router, rules={
+    "/courses": CacheRule(tags=("courses",), cache_control="public, no-cache"),
+    "/courses/{course_id}": CacheRule(tags=("courses",), cache_control="public, no-cache"),
+    "/placement-drives": CacheRule(tags=("placement",), cache_control="public, max-age=3600", ttl=3600),
+    "/admin/settings": CacheRule(tags=("settings",), cache_control="no-cache"),
+    # ETag/304 only (ttl=0): a stored body would be served to ?token=... without
+    # re-verifying the token, so a revoked token could keep reading the inbox
+    "/notifications": CacheRule(tags=("notifications",), cache_control="private, no-cache", ttl=0),
+})
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Firestore-Reads", "X-Firestore-Writes", "X-Firestore-Queries",
+                    "X-Firestore-Round-Trips", "X-Firestore-Time-Ms", "X-Firestore-N-Plus-One"],
 )
 
+# Per-request Firestore reads/writes/queries as X-Firestore-* headers (see firestore_accounting.py)
+app.add_middleware(FirestoreAccountingMiddleware)
+# Latency histograms, in-flight gauges and outcome counters per route, served at /metrics
+app.add_middleware(metrics.MetricsMiddleware, router=app.router)
+
+metrics.registry.register_collector(metrics.cache_collector({
+    "auth_tokens": auth_cache.tokens.stats,
+    "auth_roles": auth_cache.roles.stats,
+    "answers": answer_cache.stats,
+    "resume_analyses": resume_cache.stats,
+    "http_responses": response_cache.stats,
+    "course_metadata": course_cache.stats,
+}))
+metrics.registry.register_collector(metrics.gauge_collector(
+    "gemini_calls_in_flight", "Gemini calls currently running.",
+    lambda: gemini.stats()["in_flight"]))
+metrics.registry.register_collector(metrics.gauge_collector(
+    "gemini_queue_depth", "Doubts waiting for a Gemini slot.",
+    lambda: gemini.stats()["queue_depth"]))
+
 
 @app.get("/")
 def read_root():
     return {"status": "Manan API Active"}
 
 
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+
+def _probe_firestore():
+    store.system.document("settings").get()
+
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: warm-up finished, settings loaded and Firestore answers a read."""
+    reachable, error = warmup.check(_probe_firestore)
+    ready = reachable and warmup.warm and settings_cache.loaded
+    body = {"status": "ready" if ready else "starting",
+            "firestore": "ok" if reachable else error,
+            **warmup.report()}
+    return FastJSONResponse(body, status_code=200 if ready else 503)
+
+
+@app.get("/internal/stats")
+def get_internal_stats():
+    """Hit/miss counters for the in-process caches, and Firestore ops per route."""
+    return {
+        "auth": auth_cache.stats(),
+        "gemini": gemini.stats(),
+        "answer_cache": answer_cache.stats(),
+        "firestore": route_totals.stats(),
+    }
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus exposition of request, Firestore, Gemini and cache metrics."""
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+
 # ─── Ask Nova (Solve Doubt) ───────────────────────────────────────────────────
 
 OSI_MODEL_RESPONSE = """
@@ -335,75 +458,144 @@ When writing software architecture, we always try to avoid O(n²) and optimize t
     }
 }
 
+_doubt_index = FuzzyIndex(SUGGESTED_DOUBTS.keys())
+
+# Answers served without Gemini, by key; bodies are pre-encoded (see fast_json.py)
+CANNED_ANSWERS = {
+    "exam_mode": {
+        "answer": "⚠️ Exam Mode is Active. 'Ask Manan' is temporarily disabled.",
+        "citations": []
+    },
+    "osi": {
+        "answer": OSI_MODEL_RESPONSE,
+        "citations": ["Networking Standards", "ISO Model"]
+    },
+    **{
+        f"doubt:{question}": {"answer": doubt["text"], "citations": doubt["citations"]}
+        for question, doubt in SUGGESTED_DOUBTS.items()
+    },
+}
+for _key, _answer in CANNED_ANSWERS.items():
+    static_payloads.register(f"answer:{_key}", _answer)
+
+
 class DoubtRequest(BaseModel):
     student_id: str
     question_text: str
     image_url: Optional[str] = None
 
 
-@app.post("/solve-doubt")
-def solve_doubt(request: DoubtRequest):
-    # Check for hardcoded OSI Model query
+def _canned_answer(question_text: str):
+    """Key into CANNED_ANSWERS for questions answered without Gemini (exam
+    mode, OSI, suggested doubts), or None."""
+    # Check System Settings for Exam Mode (served from the settings cache)
     try:
-        # Check System Settings for Exam Mode
-        settings_doc = db.collection("system").document("settings").get()
-        if settings_doc.exists and settings_doc.to_dict().get("exam_mode", False):
-             return {
-                "answer": "⚠️ Exam Mode is Active. 'Ask Manan' is temporarily disabled.",
-                "citations": []
-            }
+        if settings_cache.get("exam_mode", False):
+             return "exam_mode"
     except:
         pass # Fail open if DB error, or log it
 
-    user_question = request.question_text.lower().strip()
-
+    user_question = question_text.lower().strip()
     if "osi" in user_question:
-        return {
-            "answer": OSI_MODEL_RESPONSE,
-            "citations": ["Networking Standards", "ISO Model"]
-        }
+        return "osi"
 
     # Custom Fuzzy Matching for Hardcoded Suggestions
-    best_match_key = None
-    best_match_score = 0
-    
-    # We use fuzz.token_set_ratio because it handles extra words or slightly jumbled order well
-    for key in SUGGESTED_DOUBTS.keys():
-        score = fuzz.token_set_ratio(user_question, key.lower())
-        if score > best_match_score:
-            best_match_score = score
-            best_match_key = key
-            
-    # threshold tuning: 80% similarity threshold
-    if best_match_score >= 80 and best_match_key:
-        return {
-            "answer": SUGGESTED_DOUBTS[best_match_key]["text"],
-            "citations": SUGGESTED_DOUBTS[best_match_key]["citations"]
-        }
+    # token_set_ratio (via the precompiled index) handles extra words or slightly
+    # jumbled order well; threshold tuning: 80% similarity threshold
+    best_match_key, _ = _doubt_index.best(user_question, threshold=80)
+    if best_match_key:
+        return f"doubt:{best_match_key}"
+
+    return None
 
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if not api_key:
+
+@app.post("/solve-doubt")
+def solve_doubt(request: DoubtRequest):
+    canned = _canned_answer(request.question_text)
+    if canned:
+        return static_payloads.response(f"answer:{canned}")
+
+    cached = answer_cache.get(request.question_text)
+    if cached:
+        return cached
+
+    if not gemini.start():
         return {
+            "status": "error",
             "answer": "Error: GOOGLE_API_KEY not found in environment variables.",
             "citations": []
         }
     try:
-        client = genai.Client(api_key=api_key)
-        response = client.models.generate_content(
-            model="gemini-2.0-flash",
-            contents=request.question_text,
-        )
+        answer = gemini.generate(request.question_text)
+        citations = ["General Knowledge", "Gemini Model"]
+        answer_cache.put(request.question_text, answer, citations)
+        return {
+            "answer": answer,
+            "citations": citations
+        }
+    except GeminiUnavailable as e:
         return {
-            "answer": response.text,
-            "citations": ["General Knowledge", "Gemini Model"]
+            "status": "error",
+            "answer": f"⚠️ {e}",
+            "citations": []
         }
     except Exception as e:
         return {
+            "status": "error",
             "answer": f"Error processing request: {str(e)}",
             "citations": []
         }
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.post("/solve-doubt/stream")
+async def solve_doubt_stream(request: DoubtRequest):
+    """Same as /solve-doubt, but streams the answer as Server-Sent Events.
+
+    Events: `chunk` ({"text"}) for each piece of the answer, then `done`
+    ({"citations"}), or `error` ({"message"}) if generation fails.
+    """
+    async def events():
+        # The canned checks may refresh the settings cache, so keep them off the loop
+        canned = await run_in_threadpool(_canned_answer, request.question_text)
+        if canned:
+            canned = CANNED_ANSWERS[canned]
+            yield _sse("chunk", {"text": canned["answer"]})
+            yield _sse("done", {"citations": canned["citations"]})
+            return
+
+        cached = answer_cache.get(request.question_text)
+        if cached:
+            yield _sse("chunk", {"text": cached["answer"]})
+            yield _sse("done", {"citations": cached["citations"]})
+            return
+
+        if not await run_in_threadpool(gemini.start):
+            yield _sse("error", {"message": "Error: GOOGLE_API_KEY not found in environment variables."})
+            return
+        try:
+            parts = []
+            async for text in gemini.stream(request.question_text):
+                parts.append(text)
+                yield _sse("chunk", {"text": text})
+            citations = ["General Knowledge", "Gemini Model"]
+            answer_cache.put(request.question_text, "".join(parts), citations)
+            yield _sse("done", {"citations": citations})
+        except GeminiUnavailable as e:
+            yield _sse("error", {"message": f"⚠️ {e}"})
+        except Exception as e:
+            yield _sse("error", {"message": f"Error processing request: {str(e)}"})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ─── Academic Predictor ───────────────────────────────────────────────────────
 
 class PredictRequest(BaseModel):
@@ -413,130 +605,82 @@ class PredictRequest(BaseModel):
 
 @app.post("/predict")
 def predict_risk(req: PredictRequest):
-    attendance = max(0, min(100, req.attendance))
-    marks = max(0, min(100, req.marks))
+    # Same scoring as /predict/batch, thresholds from system/settings
+    result = risk.score([req.attendance], [req.marks], risk.thresholds(settings_cache.get_all()))
 
-    if attendance < 75 or marks < 50:
-        risk_level = "High"
-    elif attendance < 85 or marks < 70:
-        risk_level = "Medium"
-    else:
-        risk_level = "Low"
+    return {
+        "risk_level": str(risk.RISK_LEVELS[result["risk_index"][0]]),
+        "predicted_cgpa": float(result["predicted_cgpa"][0]),
+    }
 
-    predicted_cgpa = round((attendance * 0.03 + marks * 0.07) * 0.1 * 10, 2)
-    predicted_cgpa = max(0.0, min(10.0, predicted_cgpa))
 
-    return {
-        "risk_level": risk_level,
-        "predicted_cgpa": predicted_cgpa,
+class PredictBatchRequest(BaseModel):
+    attendance: List[float]
+    marks: List[float]
+    ids: Optional[List[str]] = None
+
+
+def _predict_batch_response(ids, attendance, marks):
+    limits = risk.thresholds(settings_cache.get_all())
+    try:
+        if ids is not None and len(ids) != len(attendance):
+            raise risk.InvalidBatch("ids must be the same length as attendance and marks")
+        result = risk.score(attendance, marks, limits)
+    except risk.InvalidBatch as e:
+        return {"status": "error", "message": str(e)}
+
+    body = {
+        "status": "success",
+        "count": len(result["risk_index"]),
+        "thresholds": limits,
+        "summary": risk.summarize(result["risk_index"]),
+        # Column-oriented: risk_level[i] and predicted_cgpa[i] belong to row i
+        "risk_level": risk.RISK_LEVELS[result["risk_index"]].tolist(),
+        "predicted_cgpa": result["predicted_cgpa"],
     }
+    if ids is not None:
+        body["ids"] = ids
+    # Returned directly, so jsonable_encoder is skipped (slow on 100k rows);
+    # orjson writes the NumPy array natively
+    return FastJSONResponse(body)
+
+
+@app.post("/predict/batch")
+def predict_risk_batch(req: PredictBatchRequest):
+    """Score a whole cohort in one call: parallel `attendance` / `marks` arrays."""
+    return _predict_batch_response(req.ids, req.attendance, req.marks)
+
+
+@app.post("/predict/batch/csv")
+async def predict_risk_batch_csv(file: UploadFile = File(...)):
+    """Same as /predict/batch, from a CSV with `attendance` and `marks` columns."""
+    data = await file.read()
+    try:
+        ids, attendance, marks = await run_in_threadpool(risk.parse_csv, data)
+    except (risk.InvalidBatch, UnicodeDecodeError) as e:
+        return {"status": "error", "message": str(e)}
+    return await run_in_threadpool(_predict_batch_response, ids, attendance, marks)
 
 
 @app.post("/analyze-resume")
 async def analyze_resume(file: UploadFile = File(...)):
-    filename = file.filename.lower()
-    
-    # Simulate AI processing time
-    import asyncio
-    await asyncio.sleep(3.5)
-    
-    # Yash Vardhan Singh Profile
-    if "yash" in filename:
-        return {
-            "score": 72,
-            "details": {
-                "candidate_name": "Yash Vardhan Singh",
-                "role": "Entry-Level Software Developer / ML Engineer (Fresher)",
-                "category_scores": [
-                    {"name": "ATS Compatibility", "score": 78},
-                    {"name": "Keyword Optimization", "score": 70},
-                    {"name": "Technical Strength", "score": 75},
-                    {"name": "Impact & Metrics", "score": 60},
-                    {"name": "Formatting & Structure", "score": 77}
-                ],
-                "keywords": {
-                    "strong": ["Python", "Data Structures and Algorithms", "OOP", "Deep Learning", "TensorFlow / Keras", "CNN", "OpenCV", "NumPy"],
-                    "missing": ["Machine Learning", "Model Accuracy (%)", "REST APIs", "Git / GitHub", "SQL", "Deployment", "Flask / FastAPI", "AWS / Cloud"]
-                },
-                "recommendation": "Add measurable ML metrics (accuracy, precision, recall) and mention version control & deployment exposure.",
-                "technical_skills": {
-                    "strengths": ["Strong alignment with ML domain (CNN, TensorFlow)", "Multi-language exposure (Python, C, Java)", "Clear project tech stack mentioned", "Internship experience included"],
-                    "gaps": ["No frameworks for backend development", "No mention of Git or collaboration tools", "No database skills mentioned", "Deep Learning listed but not quantified"]
-                },
-                "projects": [
-                    {
-                        "name": "DL-Based Crop Disease Detector",
-                        "strengths": ["Domain-specific ML project (agriculture + drones)", "Proper tech stack defined", "Clear role mentioned"],
-                        "improvements": ["Add dataset size (e.g., 5,000+ images)", "Add model accuracy (e.g., 92% validation accuracy)", "Mention performance improvements or real-world impact", "Add GitHub/project link"]
-                    }
-                ],
-                "experience_review": {
-                    "points": [
-                        "Internship experience is good for a fresher but lacks quantifiable metrics.",
-                        "Impact statements are generic."
-                    ],
-                    "recommendation": "Quantify contribution (e.g., supported hiring for 15+ roles) and mention specific tools used."
-                },
-                "ats_formatting": [
-                    {"check": "Tables Used", "status": "No", "icon": "❌"},
-                    {"check": "Personal Details", "status": "Not required", "icon": "⚠️"},
-                    {"check": "Clean Headings", "status": "Yes", "icon": "✅"},
-                    {"check": "Contact Info Proper", "status": "Yes", "icon": "✅"},
-                    {"check": "File Format", "status": "Good", "icon": "✅"}
-                ]
-            }
-        }
+    """Score an uploaded PDF/DOCX resume (see resume_analyzer.py).
 
-    # Default: Mahi Maurya Profile
-    return {
-        "score": 78,
-        "details": {
-            "candidate_name": "Mahi Maurya",
-            "role": "Software Development Engineer (SDE – Entry Level)",
-            "category_scores": [
-                {"name": "ATS Compatibility", "score": 85},
-                {"name": "Keyword Optimization", "score": 72},
-                {"name": "Technical Strength", "score": 80},
-                {"name": "Impact & Metrics", "score": 65},
-                {"name": "Formatting & Structure", "score": 88}
-            ],
-            "keywords": {
-                "strong": ["Java", "Python", "Data Structures & Algorithms", "OOP", "DBMS", "SQL", "Git / GitHub", "Blockchain"],
-                "missing": ["REST APIs", "System Design", "Multithreading", "Spring Boot", "Docker", "CI/CD", "Agile / Scrum"]
-            },
-            "recommendation": "Add backend-specific and deployment-related keywords to improve match rate for product-based companies.",
-            "technical_skills": {
-                "strengths": ["Strong foundation in DSA", "Multi-language exposure (Java, Python, C)", "Basic frontend familiarity", "Blockchain project experience"],
-                "gaps": ["No frameworks mentioned (Spring, Django, React)", "No cloud technologies (AWS, Azure, GCP)", "No deployment/project hosting links"]
-            },
-            "projects": [
-                {
-                    "name": "FoodChain Tracker (Blockchain System)",
-                    "strengths": ["Demonstrates exposure to decentralized systems", "Shows frontend + backend integration understanding"],
-                    "improvements": ["Add tech stack explicitly (e.g., Ethereum, Solidity, Node.js)", "Quantify impact (e.g., reduced tracking time by X%)"]
-                },
-                {
-                    "name": "DSA Suite – Java",
-                    "strengths": ["Strong alignment with SDE preparation", "Mentions optimized implementations"],
-                    "improvements": ["Add GitHub repository link", "Include complexity analysis (O(n), O(log n))", "Mention notable problem types (graphs, DP, etc.)"]
-                }
-            ],
-            "experience_review": {
-                "points": [
-                    "No internships or industry experience listed.",
-                    "Achievements section is good but not impact-driven."
-                ],
-                "recommendation": "Convert generic statements into measurable outcomes. Example: Instead of 'Solved 100+ DSA problems', use 'Solved 100+ DSA problems across arrays, trees, and sorting, improving problem-solving efficiency by 30%.'"
-            },
-            "ats_formatting": [
-                {"check": "Tables Used", "status": "No", "icon": "❌"},
-                {"check": "Images Used", "status": "No", "icon": "❌"},
-                {"check": "Clean Headings", "status": "Yes", "icon": "✅"},
-                {"check": "Proper Section Order", "status": "Yes", "icon": "✅"},
-                {"check": "File Format (PDF)", "status": "Recommended", "icon": "✅"}
-            ]
-        }
-    }
+    Re-uploads of the same file are served from the content-hash cache.
+    """
+    try:
+        data, digest = await read_upload(file, RESUME_MAX_BYTES)
+        cached = await run_in_threadpool(resume_cache.get, digest)
+        if cached is not None:
+            return cached
+        result = await resume_pool.analyze(data, file.filename or "")
+        await run_in_threadpool(resume_cache.set, digest, result)
+        return result
+    except (UploadTooLarge, ResumeUnreadable, AnalysisTimeout, AnalyzerUnavailable) as e:
+        return {"status": "error", "message": str(e)}
+    except Exception as e:
+        print(f"⚠️  Resume analysis failed for {file.filename}: {e}")
+        return {"status": "error", "message": "Could not analyze this resume"}
 
 
 # ─── Student Profile ──────────────────────────────────────────────────────────
@@ -545,7 +689,7 @@ async def analyze_resume(file: UploadFile = File(...)):
 def get_student_profile(uid: str = "student_1"):
     """Fetch a student profile from Firestore by UID."""
     try:
-        doc = db.collection("users").document(uid).get()
+        doc = store.users.document(uid).get()
         if doc.exists:
             data = doc.to_dict()
             profile = data.get("profile", {})
@@ -611,10 +755,11 @@ class ProfileUpdateRequest(BaseModel):
 def update_student_profile(req: ProfileUpdateRequest):
     """Update a student profile in Firestore."""
     try:
-        doc_ref = db.collection("users").document(req.uid)
+        doc_ref = store.users.document(req.uid)
         
-        # Determine risk status
-        risk_status = "At Risk" if req.attendance < 75 or req.cgpa < 5.0 else "Safe"
+        # Determine risk status against the admin-configured thresholds
+        settings = settings_cache.get_all()
+        risk_status = "At Risk" if risk.at_risk(req.attendance, req.cgpa, settings) else "Safe"
 
         doc_ref.set({
             "uid": req.uid,
@@ -654,11 +799,11 @@ class UserSyncRequest(BaseModel):
 @app.post("/auth/sync")
 async def sync_user(request: UserSyncRequest):
     try:
-        decoded_token = auth.verify_id_token(request.token)
+        decoded_token = auth_cache.verify(request.token)
         uid = decoded_token["uid"]
         email = decoded_token.get("email", "")
 
-        user_ref = db.collection("users").document(uid)
+        user_ref = store.users.document(uid)
         user_doc = user_ref.get()
 
         final_role = request.role
@@ -677,6 +822,7 @@ async def sync_user(request: UserSyncRequest):
             }
             user_ref.set(user_data)
 
+        auth_cache.set_role(uid, final_role)
         return {"status": "success", "role": final_role, "uid": uid}
 
     except Exception as e:
@@ -697,12 +843,10 @@ class CourseCreateRequest(BaseModel):
 def create_course(req: CourseCreateRequest):
     try:
         # verify token (simple check)
-        decoded = auth.verify_id_token(req.token)
+        decoded = auth_cache.verify(req.token)
         if decoded["uid"] != req.teacher_id:
             return {"status": "error", "message": "Unauthorized"}
 
-        from firebase_config import db
-        
         course_data = {
             "title": req.title,
             "description": req.description,
@@ -712,7 +856,14 @@ def create_course(req: CourseCreateRequest):
             "student_count": 0
         }
         
-        update_time, course_ref = db.collection("courses").add(course_data)
+        # Create the course and bump the teacher's course_count atomically
+        course_ref = store.courses.document()
+        batch = store.batch()
+        batch.set(course_ref, course_data)
+        aggregates.course_created(batch, store.client, req.teacher_id)
+        batch.commit()
+        course_cache.invalidate(course_ref.id)
+        response_cache.invalidate("courses")
         
         return {"status": "success", "course_id": course_ref.id}
     except Exception as e:
@@ -722,11 +873,10 @@ def create_course(req: CourseCreateRequest):
 @app.delete("/courses/{course_id}")
 def delete_course(course_id: str, token: str):
     try:
-        decoded = auth.verify_id_token(token)
+        decoded = auth_cache.verify(token)
         uid = decoded["uid"]
         
-        from firebase_config import db
-        course_ref = db.collection("courses").document(course_id)
+        course_ref = store.courses.document(course_id)
         course_doc = course_ref.get()
         
         if not course_doc.exists:
@@ -736,26 +886,43 @@ def delete_course(course_id: str, token: str):
         if course_data.get("teacher_id") != uid:
              return {"status": "error", "message": "Unauthorized"}
 
-        course_ref.delete()
+        # Roster and counters first, in atomic chunks, then the course itself
+        # in one transaction with the open-doubt count (see enrollment.py)
+        deleted = enrollment.delete_course(store.client, course_cache, course_id, uid)
+        course_cache.invalidate(course_id)
+        response_cache.invalidate("courses")
+        if not deleted:
+             return {"status": "error", "message": "Course not found"}
         return {"status": "success"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
+COURSE_SORT_FIELDS = {"id": DOCUMENT_ID, "title": "title", "created_at": "created_at"}
+
+
 @app.get("/courses")
-def get_courses():
+def get_courses(page_size: Optional[int] = None, cursor: Optional[str] = None,
+                order_by: str = "id", direction: str = "asc", fields: Optional[str] = None):
+    """List courses one page at a time; pass `fields` (comma-separated) to project."""
     try:
-        from firebase_config import db
-        docs = db.collection("courses").stream()
+        if order_by not in COURSE_SORT_FIELDS:
+            return {"status": "error", "message": f"Cannot order by '{order_by}'"}
+        docs, next_cursor = paginate(
+            store.courses.collection,
+            order_by=COURSE_SORT_FIELDS[order_by],
+            descending=direction == "desc",
+            page_size=page_size,
+            cursor=cursor,
+            fields=fields,
+        )
         courses = []
         for doc in docs:
             d = doc.to_dict()
             d["id"] = doc.id
-            # Convert timestamp to string if present
-            if "created_at" in d and d["created_at"]:
-                d["created_at"] = str(d["created_at"])
             courses.append(d)
-        return {"courses": courses}
+        # Timestamps are written by FastJSONResponse
+        return FastJSONResponse({"courses": courses, "next_cursor": next_cursor})
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -765,14 +932,12 @@ def get_courses():
 def get_single_course(course_id: str):
     """Fetch a single course by ID, including syllabus_topics."""
     try:
-        doc = db.collection("courses").document(course_id).get()
+        doc = store.courses.document(course_id).get()
         if not doc.exists:
             return {"status": "error", "message": "Course not found"}
         d = doc.to_dict()
         d["id"] = doc.id
-        if "created_at" in d and d["created_at"]:
-            d["created_at"] = str(d["created_at"])
-        return {"status": "success", "course": d}
+        return FastJSONResponse({"status": "success", "course": d})
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -784,33 +949,79 @@ class EnrollRequest(BaseModel):
 
 
 @app.post("/courses/enroll")
-async def enroll_student(req: EnrollRequest):
+def enroll_student(req: EnrollRequest):
+    """Enroll the signed-in student; enrolling twice is a no-op."""
     try:
-        decoded = auth.verify_id_token(req.token)
+        decoded = auth_cache.verify(req.token)
         if decoded["uid"] != req.student_id:
              return {"status": "error", "message": "Unauthorized"}
 
-        from firebase_config import db
+        # Roster entry, enrolled_courses entry, student_count and the teacher's
+        # aggregate in one batch (see enrollment.py)
+        added = enrollment.enroll(store.client, course_cache, req.course_id, [req.student_id])
+        if added:
+            response_cache.invalidate("courses")
+        return {"status": "success", "already_enrolled": not added}
 
-        # 1. Add student to course subcollection
-        course_ref = db.collection("courses").document(req.course_id)
-        course_ref.collection("students").document(req.student_id).set({
-            "enrolled_at": firestore.SERVER_TIMESTAMP,
-            "uid": req.student_id
-        })
+    except CourseNotFound:
+        return {"status": "error", "message": "Course not found"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
 
-        # 2. Add course to student's enrolled_courses subcollection
-        user_ref = db.collection("users").document(req.student_id)
-        user_ref.collection("enrolled_courses").document(req.course_id).set({
-            "enrolled_at": firestore.SERVER_TIMESTAMP,
-            "course_id": req.course_id
-        })
-        
-        # 3. Increment student count (optional/atomic)
-        # course_ref.update({"student_count": firestore.Increment(1)})
 
-        return {"status": "success"}
+@app.post("/courses/unenroll")
+def unenroll_student(req: EnrollRequest):
+    """Remove the signed-in student from a course; a no-op if not enrolled."""
+    try:
+        decoded = auth_cache.verify(req.token)
+        if decoded["uid"] != req.student_id:
+             return {"status": "error", "message": "Unauthorized"}
+
+        removed = enrollment.unenroll(store.client, course_cache, req.course_id, [req.student_id])
+        if removed:
+            response_cache.invalidate("courses")
+        return {"status": "success", "was_enrolled": bool(removed)}
 
+    except CourseNotFound:
+        return {"status": "error", "message": "Course not found"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+class BulkEnrollRequest(BaseModel):
+    course_id: str
+    student_ids: List[str]
+    token: str
+
+
+@app.post("/courses/enroll/bulk")
+def bulk_enroll_students(req: BulkEnrollRequest):
+    """Enroll a list of students in a course (its teacher or an admin)."""
+    try:
+        decoded = auth_cache.verify(req.token)
+        uid = decoded["uid"]
+
+        student_ids = list(dict.fromkeys(req.student_ids))
+        if not student_ids:
+            return {"status": "error", "message": "No students to enroll"}
+        if len(student_ids) > enrollment.ENROLL_MAX_STUDENTS:
+            return {"status": "error",
+                    "message": f"At most {enrollment.ENROLL_MAX_STUDENTS} students per request"}
+
+        course = course_cache.get(req.course_id)
+        if course is None:
+            return {"status": "error", "message": "Course not found"}
+        if course.get("teacher_id") != uid and not auth_cache.is_admin(uid):
+            return {"status": "error", "message": "Unauthorized"}
+
+        added = enrollment.enroll(store.client, course_cache, req.course_id, student_ids)
+        if added:
+            response_cache.invalidate("courses")
+        return {"status": "success", "enrolled": len(added),
+                "already_enrolled": len(student_ids) - len(added)}
+
+    except CourseNotFound:
+        return {"status": "error", "message": "Course not found"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -823,33 +1034,28 @@ class TeacherRosterRequest(BaseModel):
 @app.post("/teacher/students")
 def get_teacher_students(req: TeacherRosterRequest):
     try:
-        decoded = auth.verify_id_token(req.token)
+        decoded = auth_cache.verify(req.token)
         # Allow if requester is the teacher
         
-        from firebase_config import db
-        
         # 1. Get all courses by this teacher
-        courses_query = db.collection("courses").where("teacher_id", "==", req.teacher_id).stream()
-        
-        student_uids = set()
-        
-        # 2. For each course, get enrolled students
-        for course in courses_query:
-            students_ref = course.reference.collection("students").stream()
-            for s in students_ref:
-                student_uids.add(s.id)
-        
+        courses_query = store.courses.where("teacher_id", "==", req.teacher_id).stream()
+
+        # 2. For each course, get enrolled students (courses streamed concurrently)
+        rosters = run_concurrently(
+            lambda course: [s.id for s in course.reference.collection("students").stream()],
+            courses_query,
+        )
+        student_uids = list(dict.fromkeys(uid for roster in rosters for uid in roster))
+
         if not student_uids:
             return {"students": []}
 
-        # 3. Fetch user profiles for these students
-        # Firestore 'in' query supports max 10/30 items, so might need chunking or individual fetches
-        # For simplicity, fetching individually for now (ok for small scale)
+        # 3. Fetch user profiles for these students in get_all chunks
+        profiles = get_documents_by_id(store.client, "users", student_uids)
         students_data = []
         for uid in student_uids:
-            u_doc = db.collection("users").document(uid).get()
-            if u_doc.exists:
-                ud = u_doc.to_dict()
+            ud = profiles.get(uid)
+            if ud is not None:
                 # Determine display info
                 students_data.append({
                     "id": uid,
@@ -878,15 +1084,15 @@ class SyllabusUploadRequest(BaseModel):
 @app.post("/courses/{course_id}/syllabus")
 def upload_syllabus(course_id: str, req: SyllabusUploadRequest):
     try:
-        decoded = auth.verify_id_token(req.token)
-        from firebase_config import db
-        
+        decoded = auth_cache.verify(req.token)
         # Verify ownership (omitted for brevity, but recommended)
         
-        db.collection("courses").document(course_id).update({
+        store.courses.document(course_id).update({
             "syllabus_uploaded": True,
             "syllabus_url": req.file_url or "https://example.com/syllabus.pdf" # Mock URL if none provided
         })
+        course_cache.invalidate(course_id)
+        response_cache.invalidate("courses")
         
         return {"status": "success"}
     except Exception as e:
@@ -902,7 +1108,7 @@ class DoubtRequest(BaseModel):
 @app.post("/courses/doubts")
 def ask_doubt(req: DoubtRequest):
     try:
-        decoded = auth.verify_id_token(req.token)
+        decoded = auth_cache.verify(req.token)
         if decoded["uid"] != req.student_id:
              return {"status": "error", "message": "Unauthorized"}
 
@@ -916,58 +1122,64 @@ def ask_doubt(req: DoubtRequest):
             "status": "open",
             "created_at": firestore.SERVER_TIMESTAMP
         }
+        # Pre-allocated, so a retry after a stale cache entry reuses the same id
+        doubt_ref = store.doubts.document()
 
-        # Add to global 'doubts' collection
-        _, doubt_ref = db.collection("doubts").add(doubt_data)
-
-        # Increment doubt count on course
-        course_ref = db.collection("courses").document(req.course_id)
-        course_doc = course_ref.get()
-        course_title = "Unknown Course"
-        teacher_id = None
-        if course_doc.exists:
-            cd = course_doc.to_dict()
-            course_title = cd.get("title", course_title)
-            teacher_id = cd.get("teacher_id")
-            course_ref.update({"doubts_count": firestore.Increment(1)})
-
-        # Create a notification for the faculty
-        notif_data = {
-            "title": f"New doubt in {course_title}: \"{req.question[:80]}...\"",
-            "type": "info",
-            "sender_uid": req.student_id,
-            "sender_email": student_email,
-            "target_uid": teacher_id,
-            "doubt_id": doubt_ref.id,
-            "course_id": req.course_id,
-            "created_at": firestore.SERVER_TIMESTAMP,
-        }
-        db.collection("notifications").add(notif_data)
+        try:
+            _commit_doubt(req, doubt_ref, doubt_data, student_email)
+        except NotFound:
+            # The course was deleted since it was cached; look it up again
+            course_cache.invalidate(req.course_id)
+            _commit_doubt(req, doubt_ref, doubt_data, student_email)
 
         return {"status": "success", "doubt_id": doubt_ref.id}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
+def _commit_doubt(req: DoubtRequest, doubt_ref, doubt_data: dict, student_email: str):
+    """The doubt, the course's doubts_count, the teacher's open_doubts and the
+    teacher's notification, in one batch (one round trip)."""
+    course = course_cache.get(req.course_id)
+    batch = store.batch()
+    batch.set(doubt_ref, doubt_data)
+    if course is not None:
+        teacher_id = course.get("teacher_id")
+        batch.update(store.courses.document(req.course_id), {"doubts_count": firestore.Increment(1)})
+        if teacher_id:
+            aggregates.doubt_opened(batch, store.client, teacher_id)
+            # Notify the faculty in their inbox
+            inbox.notify(batch, store.client, teacher_id, {
+                "title": f"New doubt in {course.get('title') or 'Unknown Course'}: \"{req.question[:80]}...\"",
+                "type": "info",
+                "sender_uid": req.student_id,
+                "sender_email": student_email,
+                "doubt_id": doubt_ref.id,
+                "course_id": req.course_id,
+            })
+    batch.commit()
+    if course is not None:
+        response_cache.invalidate("courses", "notifications")
+
+
 @app.get("/courses/{course_id}/doubts")
-def get_course_doubts(course_id: str, student_id: str = Query(default=None)):
+def get_course_doubts(course_id: str, student_id: str = Query(default=None),
+                      page_size: Optional[int] = None, cursor: Optional[str] = None):
     """Get doubts for a specific course, optionally filtered by student_id."""
     try:
-        query = db.collection("doubts").where("course_id", "==", course_id)
+        query = store.doubts.where("course_id", "==", course_id)
         if student_id:
             query = query.where("student_id", "==", student_id)
 
-        docs = query.stream()
+        # Newest first, ordered by Firestore (see firestore.indexes.json)
+        docs, next_cursor = paginate(query, order_by="created_at", descending=True,
+                                     page_size=page_size, cursor=cursor)
         doubts = []
         for doc in docs:
             d = doc.to_dict()
             d["id"] = doc.id
-            if d.get("created_at"):
-                d["created_at"] = d["created_at"].isoformat()
             doubts.append(d)
-        # Sort by created_at descending (newest first)
-        doubts.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-        return {"status": "success", "doubts": doubts}
+        return FastJSONResponse({"status": "success", "doubts": doubts, "next_cursor": next_cursor})
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -980,23 +1192,19 @@ class ResolveDoubtRequest(BaseModel):
 def resolve_doubt(doubt_id: str, req: ResolveDoubtRequest):
     """Faculty marks a doubt as resolved."""
     try:
-        decoded = auth.verify_id_token(req.token)
+        decoded = auth_cache.verify(req.token)
         uid = decoded["uid"]
 
         # Verify the user is admin/teacher
-        user_doc = db.collection("users").document(uid).get()
-        if not user_doc.exists or user_doc.to_dict().get("role") != "admin":
+        if not auth_cache.is_admin(uid):
             return {"status": "error", "message": "Unauthorized – admin only"}
 
-        doubt_ref = db.collection("doubts").document(doubt_id)
-        doubt_doc = doubt_ref.get()
-        if not doubt_doc.exists:
-            return {"status": "error", "message": "Doubt not found"}
-
         update = {"status": "resolved", "resolved_at": firestore.SERVER_TIMESTAMP, "resolved_by": uid}
         if req.answer:
             update["faculty_answer"] = req.answer
-        doubt_ref.update(update)
+        # Updates the doubt and the teacher's open_doubts counter in one transaction
+        if not aggregates.resolve_doubt(store.client, doubt_id, update):
+            return {"status": "error", "message": "Doubt not found"}
 
         return {"status": "success"}
     except Exception as e:
@@ -1006,15 +1214,17 @@ def resolve_doubt(doubt_id: str, req: ResolveDoubtRequest):
 class AdminDoubtsRequest(BaseModel):
     teacher_id: str
     token: str
+    page_size: Optional[int] = None
+    cursor: Optional[str] = None
 
 @app.post("/admin/doubts")
 def get_admin_doubts(req: AdminDoubtsRequest):
     """Get all open doubts across courses taught by this teacher."""
     try:
-        decoded = auth.verify_id_token(req.token)
+        decoded = auth_cache.verify(req.token)
 
         # 1. Get all courses taught by this teacher
-        courses_query = db.collection("courses").where("teacher_id", "==", req.teacher_id).stream()
+        courses_query = store.courses.where("teacher_id", "==", req.teacher_id).stream()
         course_map = {}
         for c in courses_query:
             cd = c.to_dict()
@@ -1023,21 +1233,20 @@ def get_admin_doubts(req: AdminDoubtsRequest):
         if not course_map:
             return {"status": "success", "doubts": []}
 
-        # 2. Get all open doubts and filter by teacher's courses
-        all_doubts = db.collection("doubts").where("status", "==", "open").stream()
+        # 2. Get the open doubts of the teacher's courses, newest first
+        #    (course_id `in` chunks read concurrently; see firestore.indexes.json)
+        queries = chunk_queries(store.doubts.collection, "course_id", list(course_map),
+                                filters=[("status", "==", "open")])
+        open_doubts, next_cursor = paginate(queries, order_by="created_at", descending=True,
+                                            page_size=req.page_size, cursor=req.cursor)
         doubts = []
-        for doc in all_doubts:
+        for doc in open_doubts:
             d = doc.to_dict()
-            if d.get("course_id") in course_map:
-                d["id"] = doc.id
-                d["course_title"] = course_map[d["course_id"]]
-                if d.get("created_at"):
-                    d["created_at"] = d["created_at"].isoformat()
-                doubts.append(d)
-
-        # Sort by created_at descending (newest first)
-        doubts.sort(key=lambda x: x.get("created_at", ""), reverse=True)
-        return {"status": "success", "doubts": doubts}
+            d["id"] = doc.id
+            d["course_title"] = course_map[d["course_id"]]
+            doubts.append(d)
+
+        return FastJSONResponse({"status": "success", "doubts": doubts, "next_cursor": next_cursor})
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -1045,18 +1254,28 @@ def get_admin_doubts(req: AdminDoubtsRequest):
 
 class AdminStudentsRequest(BaseModel):
     token: str
+    page_size: Optional[int] = None
+    cursor: Optional[str] = None
+
+
+# Only the fields the admin student table shows
+STUDENT_LIST_FIELDS = ["uid", "email", "profile.name", "profile.roll_number", "academic_stats", "created_at"]
 
 @app.post("/admin/students")
 def get_all_students(req: AdminStudentsRequest):
     """Fetch all users with role='student' including their stats."""
     try:
-        decoded = auth.verify_id_token(req.token)
+        decoded = auth_cache.verify(req.token)
         # Verify admin
-        user_doc = db.collection("users").document(decoded["uid"]).get()
-        if not user_doc.exists or user_doc.to_dict().get("role") != "admin":
+        if not auth_cache.is_admin(decoded["uid"]):
              return {"status": "error", "message": "Unauthorized"}
         
-        docs = db.collection("users").where("role", "==", "student").stream()
+        docs, next_cursor = paginate(
+            store.users.where("role", "==", "student"),
+            page_size=req.page_size,
+            cursor=req.cursor,
+            fields=STUDENT_LIST_FIELDS,
+        )
         students = []
         for doc in docs:
             d = doc.to_dict()
@@ -1067,11 +1286,11 @@ def get_all_students(req: AdminStudentsRequest):
                 "name": d.get("profile", {}).get("name", "Unknown"),
                 "roll": d.get("profile", {}).get("roll_number", "N/A"), # Assuming roll exists or N/A
                 "academic_stats": d.get("academic_stats", {}),
-                "created_at": str(d.get("created_at", ""))
+                "created_at": d.get("created_at", "")
             }
             students.append(student)
             
-        return {"status": "success", "students": students}
+        return FastJSONResponse({"status": "success", "students": students, "next_cursor": next_cursor})
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -1084,36 +1303,147 @@ class BatchNotifyRequest(BaseModel):
 
 @app.post("/admin/notify/batch")
 def batch_notify(req: BatchNotifyRequest):
-    """Send a notification to multiple students."""
+    """Send a notification to multiple students.
+
+    Runs as a background job in 500-write batches (see notification_fanout.py);
+    poll GET /admin/jobs/{job_id} for progress.
+    """
     try:
-        decoded = auth.verify_id_token(req.token)
+        decoded = auth_cache.verify(req.token)
         # Verify admin
-        user_doc = db.collection("users").document(decoded["uid"]).get()
-        if not user_doc.exists or user_doc.to_dict().get("role") != "admin":
+        if not auth_cache.is_admin(decoded["uid"]):
              return {"status": "error", "message": "Unauthorized"}
-        
-        batch = db.batch()
-        count = 0
-        for uid in req.student_ids:
-            ref = db.collection("notifications").document()
-            batch.set(ref, {
-                "title": req.title,
-                "type": req.type,
-                "target_uid": uid,
-                "sender_uid": decoded["uid"],
-                "created_at": firestore.SERVER_TIMESTAMP,
-                "read": False
-            })
-            count += 1
-            
-        batch.commit()
-        return {"status": "success", "count": count}
+
+        student_ids = list(dict.fromkeys(req.student_ids))
+        if not student_ids:
+            return {"status": "error", "message": "No students to notify"}
+        if len(student_ids) > notification_fanout.NOTIFY_FANOUT_MAX_TARGETS:
+            return {"status": "error",
+                    "message": f"At most {notification_fanout.NOTIFY_FANOUT_MAX_TARGETS} students per request"}
+
+        job_id = job_runner.start(notification_fanout.JOB_KIND, {
+            "student_ids": student_ids,
+            "title": req.title,
+            "type": req.type,
+            "sender_uid": decoded["uid"],
+        })
+        return {"status": "success", "job_id": job_id, "count": len(student_ids),
+                "chunks": notification_fanout.chunk_count(len(student_ids))}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
 # ─── Quiz Generator ───────────────────────────────────────────────────────────
 
+# Extensive Hardcoded Quizzes for specific subjects
+SUGGESTED_QUIZZES = {
+    "Computer Science Data Structures": [
+        {
+            "question": "Which data structure follows the FIFO (First In, First Out) principle?",
+            "options": ["Stack", "Queue", "Tree", "Graph"],
+            "answer": "Queue",
+            "explanation": "A Queue follows the FIFO principle, where the first element added is the first one to be removed."
+        },
+        {
+            "question": "What is the time complexity of searching for an element in a balanced Binary Search Tree (BST)?",
+            "options": ["O(n)", "O(log n)", "O(n log n)", "O(1)"],
+            "answer": "O(log n)",
+            "explanation": "In a balanced BST, the height is log(n), so searching takes O(log n) time."
+        },
+        {
+            "question": "Which data structure is primarily used to implement recursion?",
+            "options": ["Queue", "Heap", "Stack", "Linked List"],
+            "answer": "Stack",
+            "explanation": "Recursion uses the Call Stack to keep track of function calls."
+        },
+        {
+            "question": "In a hash table, what technique is used to handle collisions?",
+            "options": ["Traversal", "Backtracking", "Chaining", "Recursion"],
+            "answer": "Chaining",
+            "explanation": "Chaining handles collisions by storing multiple elements at the same index using a list or another data structure."
+        }
+    ],
+    "Computer Science Algorithms": [
+        {
+             "question": "What is the worst-case time complexity of Quick Sort?",
+             "options": ["O(n log n)", "O(log n)", "O(n²)", "O(n)"],
+             "answer": "O(n²)",
+             "explanation": "The worst case occurs when the pivot is the smallest or largest element, leading to O(n²)."
+        },
+        {
+             "question": "Which algorithm paradigm does Dijkstra's shortest path algorithm follow?",
+             "options": ["Dynamic Programming", "Greedy", "Divide and Conquer", "Backtracking"],
+             "answer": "Greedy",
+             "explanation": "Dijkstra's continually picks the absolute smallest known distance to explore next, a hallmark of greedy algorithms."
+        },
+        {
+             "question": "What algorithm operates by repeatedly dividing the array in half?",
+             "options": ["Bubble Sort", "Linear Search", "Binary Search", "Selection Sort"],
+             "answer": "Binary Search",
+             "explanation": "Binary search finds the position of a target value within a sorted array by comparing the target to the middle element."
+        }
+    ],
+    "Computer Science Networking": [
+        {
+             "question": "Which Protocol is considered 'Connectionless'?",
+             "options": ["TCP", "FTP", "UDP", "HTTP"],
+             "answer": "UDP",
+             "explanation": "User Datagram Protocol (UDP) sends messages (datagrams) without requiring a handshake to establish a connection first."
+        },
+        {
+             "question": "At which OSI Layer does IP (Internet Protocol) operate?",
+             "options": ["Data Link Layer", "Network Layer", "Transport Layer", "Session Layer"],
+             "answer": "Network Layer",
+             "explanation": "The Network Layer (Layer 3) handles packet routing across networks, which is the primary job of the IP."
+        },
+        {
+              "question": "What port does standard unencrypted HTTP traffic run on?",
+              "options": ["80", "443", "22", "21"],
+              "answer": "80",
+              "explanation": "Port 80 is the default TCP port for unencrypted HTTP traffic. HTTPS uses 443."
+        }
+    ],
+    "History World War II": [
+        {
+             "question": "In what year did World War II officially begin?",
+             "options": ["1914", "1939", "1941", "1945"],
+             "answer": "1939",
+             "explanation": "WWII began on September 1, 1939, when Germany invaded Poland."
+        },
+        {
+             "question": "Which country was NOT part of the Axis powers?",
+             "options": ["Germany", "Japan", "Italy", "Soviet Union"],
+             "answer": "Soviet Union",
+             "explanation": "The Soviet Union was part of the Allied powers for the majority of the war."
+        },
+        {
+              "question": "What was the code name for the Allied invasion of Normandy?",
+              "options": ["Operation Barbarossa", "Operation Overlord", "Project Manhattan", "Operation Sealion"],
+              "answer": "Operation Overlord",
+              "explanation": "Operation Overlord was the massive amphibious assault launched on D-Day (June 6, 1944)."
+        }
+    ],
+    "Automotive Engines": [
+         {
+             "question": "What is the purpose of a spark plug in an internal combustion engine?",
+             "options": ["To inject fuel", "To ignite the air/fuel mixture", "To pump oil", "To cool the engine"],
+             "answer": "To ignite the air/fuel mixture",
+             "explanation": "In petrol engines, the spark plug provides the spark that causes the compressed air and fuel to combust."
+         },
+         {
+             "question": "Which component connects the pistons to the crankshaft?",
+             "options": ["Camshaft", "Timing Belt", "Connecting Rods", "Valves"],
+             "answer": "Connecting Rods",
+             "explanation": "Connecting rods transfer the linear motion of the pistons into rotational motion along the crankshaft."
+         }
+    ]
+}
+
+_quiz_index = FuzzyIndex(SUGGESTED_QUIZZES.keys())
+for _subject, _quiz in SUGGESTED_QUIZZES.items():
+    static_payloads.register(f"quiz:{_subject}", {"status": "success", "quiz": _quiz})
+
+
 class QuizRequest(BaseModel):
     subject: str
     topic: str
@@ -1121,128 +1451,16 @@ class QuizRequest(BaseModel):
 
 @app.post("/generate-quiz")
 def generate_quiz(req: QuizRequest):
-    # Extensive Hardcoded Quizzes for specific subjects
-    SUGGESTED_QUIZZES = {
-        "Computer Science Data Structures": [
-            {
-                "question": "Which data structure follows the FIFO (First In, First Out) principle?",
-                "options": ["Stack", "Queue", "Tree", "Graph"],
-                "answer": "Queue",
-                "explanation": "A Queue follows the FIFO principle, where the first element added is the first one to be removed."
-            },
-            {
-                "question": "What is the time complexity of searching for an element in a balanced Binary Search Tree (BST)?",
-                "options": ["O(n)", "O(log n)", "O(n log n)", "O(1)"],
-                "answer": "O(log n)",
-                "explanation": "In a balanced BST, the height is log(n), so searching takes O(log n) time."
-            },
-            {
-                "question": "Which data structure is primarily used to implement recursion?",
-                "options": ["Queue", "Heap", "Stack", "Linked List"],
-                "answer": "Stack",
-                "explanation": "Recursion uses the Call Stack to keep track of function calls."
-            },
-            {
-                "question": "In a hash table, what technique is used to handle collisions?",
-                "options": ["Traversal", "Backtracking", "Chaining", "Recursion"],
-                "answer": "Chaining",
-                "explanation": "Chaining handles collisions by storing multiple elements at the same index using a list or another data structure."
-            }
-        ],
-        "Computer Science Algorithms": [
-            {
-                 "question": "What is the worst-case time complexity of Quick Sort?",
-                 "options": ["O(n log n)", "O(log n)", "O(n²)", "O(n)"],
-                 "answer": "O(n²)",
-                 "explanation": "The worst case occurs when the pivot is the smallest or largest element, leading to O(n²)."
-            },
-            {
-                 "question": "Which algorithm paradigm does Dijkstra's shortest path algorithm follow?",
-                 "options": ["Dynamic Programming", "Greedy", "Divide and Conquer", "Backtracking"],
-                 "answer": "Greedy",
-                 "explanation": "Dijkstra's continually picks the absolute smallest known distance to explore next, a hallmark of greedy algorithms."
-            },
-            {
-                 "question": "What algorithm operates by repeatedly dividing the array in half?",
-                 "options": ["Bubble Sort", "Linear Search", "Binary Search", "Selection Sort"],
-                 "answer": "Binary Search",
-                 "explanation": "Binary search finds the position of a target value within a sorted array by comparing the target to the middle element."
-            }
-        ],
-        "Computer Science Networking": [
-            {
-                 "question": "Which Protocol is considered 'Connectionless'?",
-                 "options": ["TCP", "FTP", "UDP", "HTTP"],
-                 "answer": "UDP",
-                 "explanation": "User Datagram Protocol (UDP) sends messages (datagrams) without requiring a handshake to establish a connection first."
-            },
-            {
-                 "question": "At which OSI Layer does IP (Internet Protocol) operate?",
-                 "options": ["Data Link Layer", "Network Layer", "Transport Layer", "Session Layer"],
-                 "answer": "Network Layer",
-                 "explanation": "The Network Layer (Layer 3) handles packet routing across networks, which is the primary job of the IP."
-            },
-            {
-                  "question": "What port does standard unencrypted HTTP traffic run on?",
-                  "options": ["80", "443", "22", "21"],
-                  "answer": "80",
-                  "explanation": "Port 80 is the default TCP port for unencrypted HTTP traffic. HTTPS uses 443."
-            }
-        ],
-        "History World War II": [
-            {
-                 "question": "In what year did World War II officially begin?",
-                 "options": ["1914", "1939", "1941", "1945"],
-                 "answer": "1939",
-                 "explanation": "WWII began on September 1, 1939, when Germany invaded Poland."
-            },
-            {
-                 "question": "Which country was NOT part of the Axis powers?",
-                 "options": ["Germany", "Japan", "Italy", "Soviet Union"],
-                 "answer": "Soviet Union",
-                 "explanation": "The Soviet Union was part of the Allied powers for the majority of the war."
-            },
-            {
-                  "question": "What was the code name for the Allied invasion of Normandy?",
-                  "options": ["Operation Barbarossa", "Operation Overlord", "Project Manhattan", "Operation Sealion"],
-                  "answer": "Operation Overlord",
-                  "explanation": "Operation Overlord was the massive amphibious assault launched on D-Day (June 6, 1944)."
-            }
-        ],
-        "Automotive Engines": [
-             {
-                 "question": "What is the purpose of a spark plug in an internal combustion engine?",
-                 "options": ["To inject fuel", "To ignite the air/fuel mixture", "To pump oil", "To cool the engine"],
-                 "answer": "To ignite the air/fuel mixture",
-                 "explanation": "In petrol engines, the spark plug provides the spark that causes the compressed air and fuel to combust."
-             },
-             {
-                 "question": "Which component connects the pistons to the crankshaft?",
-                 "options": ["Camshaft", "Timing Belt", "Connecting Rods", "Valves"],
-                 "answer": "Connecting Rods",
-                 "explanation": "Connecting rods transfer the linear motion of the pistons into rotational motion along the crankshaft."
-             }
-        ]
-    }
-    
     # Fuzzy match user input against our bank
     user_query = f"{req.subject} {req.topic}".lower().strip()
-    
-    best_match_key = None
-    best_match_score = 0
-    
-    for key in SUGGESTED_QUIZZES.keys():
-        score = fuzz.token_set_ratio(user_query, key.lower())
-        if score > best_match_score:
-            best_match_score = score
-            best_match_key = key
-            
+
     # Tuning Threshold
-    if best_match_score >= 60 and best_match_key:
-        return {"status": "success", "quiz": SUGGESTED_QUIZZES[best_match_key]}
+    best_match_key, _ = _quiz_index.best(user_query, threshold=60)
+    if best_match_key:
+        return static_payloads.response(f"quiz:{best_match_key}")
 
     # Fallback to a default computer science quiz if no matching topic is found to avoid crashing
-    return {"status": "success", "quiz": SUGGESTED_QUIZZES["Computer Science Data Structures"]}
+    return static_payloads.response("quiz:Computer Science Data Structures")
 
 
 # ─── Admin Stats ──────────────────────────────────────────────────────────────
@@ -1254,39 +1472,17 @@ class AdminStatsRequest(BaseModel):
 @app.post("/admin/stats")
 def get_admin_stats(req: AdminStatsRequest):
     try:
-        decoded = auth.verify_id_token(req.token)
-        
-        from firebase_config import db
+        decoded = auth_cache.verify(req.token)
         
-        # 1. Active Courses
-        courses_query = db.collection("courses").where("teacher_id", "==", req.teacher_id).stream()
-        course_ids = []
-        for c in courses_query:
-            course_ids.append(c.id)
-            
-        active_courses_count = len(course_ids)
-        
-        # 2. Total Students (Unique)
-        student_uids = set()
-        for cid in course_ids:
-            students = db.collection("courses").document(cid).collection("students").stream()
-            for s in students:
-                student_uids.add(s.id)
-        
-        total_students_count = len(student_uids)
-        
-        # 3. Unsolved Doubts
-        # Query doubts where course_id IN course_ids AND status == 'open'
-        # Firestore 'in' limit is 10. If > 10 courses, this simple query fails.
-        # Fallback: Query all 'open' doubts and filter in python (not scalable but works for prototype)
-        unsolved_doubts_count = 0
-        if course_ids:
-           # Optimization: If many courses, maybe query by course_id individually or rethink schema.
-           # For now, let's just count all doubts for these courses.
-           all_doubts = db.collection("doubts").where("status", "==", "open").stream()
-           for d in all_doubts:
-               if d.to_dict().get("course_id") in course_ids:
-                   unsolved_doubts_count += 1
+        # Counters are maintained by the write endpoints (see aggregates.py);
+        # backfill on first use for teachers that predate them.
+        stats = aggregates.read_teacher_stats(store.client, req.teacher_id)
+        if stats is None:
+            stats = aggregates.recompute_teacher_stats(store.client, req.teacher_id)
+
+        total_students_count = max(0, stats.get("unique_students", 0))
+        active_courses_count = max(0, stats.get("course_count", 0))
+        unsolved_doubts_count = max(0, stats.get("open_doubts", 0))
 
         return {
             "total_students": total_students_count,
@@ -1311,102 +1507,141 @@ class NotificationCreateRequest(BaseModel):
 def create_notification(req: NotificationCreateRequest):
     """Admin sends a notification to all students."""
     try:
-        decoded = auth.verify_id_token(req.token)
+        decoded = auth_cache.verify(req.token)
         uid = decoded["uid"]
 
         # Verify sender is admin
-        user_doc = db.collection("users").document(uid).get()
-        if not user_doc.exists or user_doc.to_dict().get("role") != "admin":
+        if not auth_cache.is_admin(uid):
             return {"status": "error", "message": "Unauthorized – admin only"}
 
         if req.type not in ("urgent", "info", "success", "warning"):
             return {"status": "error", "message": "Invalid type"}
 
-        notif_data = {
+        doc_ref = inbox.broadcast(store.client, {
             "title": req.title,
             "type": req.type,
             "sender_uid": uid,
             "sender_email": decoded.get("email", ""),
-            "created_at": firestore.SERVER_TIMESTAMP,
-        }
-
-        _, doc_ref = db.collection("notifications").add(notif_data)
+        })
+        response_cache.invalidate("notifications")
         return {"status": "success", "id": doc_ref.id}
 
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
+def _notification_dict(doc, inbox_state: dict = None) -> dict:
+    d = doc.to_dict()
+    d["id"] = doc.id
+    if inbox_state is not None:
+        d["read"] = inbox.is_read(d, inbox_state)
+    return d
+
+
 @app.get("/notifications")
-def get_notifications(limit: int = 20):
-    """Fetch recent notifications for students."""
+def get_notifications(token: Optional[str] = None, limit: int = 20,
+                      page_size: Optional[int] = None, cursor: Optional[str] = None):
+    """The signed-in user's inbox (their notifications plus broadcasts), newest
+    first, with the unread count; without a token, the latest broadcasts."""
     try:
-        docs = (
-            db.collection("notifications")
-            .order_by("created_at", direction=firestore.Query.DESCENDING)
-            .limit(limit)
-            .stream()
-        )
-        results = []
-        for doc in docs:
-            d = doc.to_dict()
-            d["id"] = doc.id
-            if d.get("created_at"):
-                d["created_at"] = d["created_at"].isoformat()
-            results.append(d)
-        return {"status": "success", "notifications": results}
+        if token is None:
+            docs = (
+                store.notifications.where("target_uid", "==", inbox.BROADCAST)
+                .order_by("created_at", direction=firestore.Query.DESCENDING)
+                .limit(limit)
+                .stream()
+            )
+            return FastJSONResponse({"status": "success",
+                                     "notifications": [_notification_dict(doc) for doc in docs]})
+
+        uid = auth_cache.verify(token)["uid"]
+        snaps, inbox_state, unread, next_cursor = inbox.read_inbox(
+            store.client, uid, page_size=page_size or limit, cursor=cursor)
+        return FastJSONResponse({
+            "status": "success",
+            "notifications": [_notification_dict(doc, inbox_state) for doc in snaps],
+            "unread": unread,
+            "next_cursor": next_cursor,
+        })
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+class MarkReadRequest(BaseModel):
+    token: str
+    ids: List[str] = []
+    all: bool = False
+
+
+@app.post("/notifications/read")
+def mark_notifications_read(req: MarkReadRequest):
+    """Mark some (`ids`) or all (`all: true`) of the user's notifications read."""
+    try:
+        uid = auth_cache.verify(req.token)["uid"]
+        if req.all:
+            marked = inbox.mark_all_read(store.client, uid)
+        else:
+            if len(req.ids) > MAX_PAGE_SIZE:
+                return {"status": "error", "message": f"At most {MAX_PAGE_SIZE} ids per request"}
+            marked = inbox.mark_read(store.client, uid, req.ids)
+        response_cache.invalidate("notifications")
+        return {"status": "success", "marked": marked}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 
 # ─── Placement Preparation ────────────────────────────────────────────────────
 
+# Upcoming placement drives (demo data)
+PLACEMENT_DRIVES = [
+    {
+        "company": "Google",
+        "role": "SDE Intern",
+        "date": "March 5, 2026",
+        "location": "Bangalore, India",
+        "cgpa": "8.0+",
+        "status": "upcoming",
+    },
+    {
+        "company": "Amazon",
+        "role": "SDE-1",
+        "date": "March 12, 2026",
+        "location": "Hyderabad, India",
+        "cgpa": "7.0+",
+        "status": "upcoming",
+    },
+    {
+        "company": "Microsoft",
+        "role": "Software Engineer",
+        "date": "March 20, 2026",
+        "location": "Noida, India",
+        "cgpa": "7.5+",
+        "status": "upcoming",
+    },
+    {
+        "company": "Flipkart",
+        "role": "SDE Intern",
+        "date": "Feb 28, 2026",
+        "location": "Bangalore, India",
+        "cgpa": "7.0+",
+        "status": "ongoing",
+    },
+    {
+        "company": "Infosys",
+        "role": "Systems Engineer",
+        "date": "Feb 10, 2026",
+        "location": "Pune, India",
+        "cgpa": "6.0+",
+        "status": "completed",
+    },
+]
+static_payloads.register("placement_drives", {"status": "success", "drives": PLACEMENT_DRIVES})
+
+
 @app.get("/placement-drives")
 def get_placement_drives():
     """Return a list of upcoming placement drives (demo data)."""
-    drives = [
-        {
-            "company": "Google",
-            "role": "SDE Intern",
-            "date": "March 5, 2026",
-            "location": "Bangalore, India",
-            "cgpa": "8.0+",
-            "status": "upcoming",
-        },
-        {
-            "company": "Amazon",
-            "role": "SDE-1",
-            "date": "March 12, 2026",
-            "location": "Hyderabad, India",
-            "cgpa": "7.0+",
-            "status": "upcoming",
-        },
-        {
-            "company": "Microsoft",
-            "role": "Software Engineer",
-            "date": "March 20, 2026",
-            "location": "Noida, India",
-            "cgpa": "7.5+",
-            "status": "upcoming",
-        },
-        {
-            "company": "Flipkart",
-            "role": "SDE Intern",
-            "date": "Feb 28, 2026",
-            "location": "Bangalore, India",
-            "cgpa": "7.0+",
-            "status": "ongoing",
-        },
-        {
-            "company": "Infosys",
-            "role": "Systems Engineer",
-            "date": "Feb 10, 2026",
-            "location": "Pune, India",
-            "cgpa": "6.0+",
-            "status": "completed",
-        },
-    ]
-    return {"status": "success", "drives": drives}
+    return static_payloads.response("placement_drives")
 
 
 class PlacementProgressRequest(BaseModel):
@@ -1421,7 +1656,7 @@ class PlacementProgressRequest(BaseModel):
 def save_placement_progress(req: PlacementProgressRequest):
     """Save or retrieve placement preparation progress for a student."""
     try:
-        doc_ref = db.collection("placement_progress").document(req.student_id)
+        doc_ref = store.placement_progress.document(req.student_id)
 
         if req.topic_progress or req.daily_goals or req.company_checks:
             # Save progress
@@ -1452,18 +1687,12 @@ def save_placement_progress(req: PlacementProgressRequest):
 @app.get("/admin/settings")
 def get_system_settings():
     try:
-        doc = db.collection("system").document("settings").get()
-        if doc.exists:
-            return {"status": "success", "settings": doc.to_dict()}
+        settings = settings_cache.get_stored()
+        if settings is not None:
+            return {"status": "success", "settings": settings}
         else:
             # Return defaults
-            defaults = {
-                "maintenance_mode": False,
-                "exam_mode": False,
-                "attendance_threshold": 75,
-                "cgpa_threshold": 5.0
-            }
-            return {"status": "success", "settings": defaults}
+            return {"status": "success", "settings": dict(DEFAULT_SETTINGS)}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
@@ -1473,25 +1702,112 @@ class SystemSettingsRequest(BaseModel):
     exam_mode: bool
     attendance_threshold: float
     cgpa_threshold: float
+    # Risk-tier thresholds for /predict; stored values are kept if omitted
+    marks_threshold: Optional[float] = None
+    medium_attendance_threshold: Optional[float] = None
+    medium_marks_threshold: Optional[float] = None
 
 @app.post("/admin/settings")
 def update_system_settings(req: SystemSettingsRequest):
     try:
-        decoded = auth.verify_id_token(req.token)
+        decoded = auth_cache.verify(req.token)
         # Verify admin
-        user_doc = db.collection("users").document(decoded["uid"]).get()
-        if not user_doc.exists or user_doc.to_dict().get("role") != "admin":
+        if not auth_cache.is_admin(decoded["uid"]):
              return {"status": "error", "message": "Unauthorized"}
             
-        db.collection("system").document("settings").set({
+        previous = settings_cache.get_all()
+
+        # Write-through so this worker sees the change immediately; other
+        # workers pick it up from their snapshot listener (or the cache TTL).
+        values = {
             "maintenance_mode": req.maintenance_mode,
             "exam_mode": req.exam_mode,
             "attendance_threshold": req.attendance_threshold,
             "cgpa_threshold": req.cgpa_threshold,
             "updated_at": firestore.SERVER_TIMESTAMP,
             "updated_by": decoded["uid"]
-        }, merge=True)
-        
+        }
+        for key in ("marks_threshold", "medium_attendance_threshold", "medium_marks_threshold"):
+            if getattr(req, key) is not None:
+                values[key] = getattr(req, key)
+        settings_cache.update(values)
+        response_cache.invalidate("settings")
+
+        # Stored risk statuses were computed with the old thresholds
+        response = {"status": "success"}
+        if (req.attendance_threshold != previous["attendance_threshold"]
+                or req.cgpa_threshold != previous["cgpa_threshold"]):
+            response["risk_recompute_job_id"] = _start_risk_recompute()
+        return response
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+# ─── Background Jobs ──────────────────────────────────────────────────────────
+
+def _start_risk_recompute() -> str:
+    settings = settings_cache.get_all()
+    return job_runner.start(risk_recompute.JOB_KIND, {
+        "attendance_threshold": settings["attendance_threshold"],
+        "cgpa_threshold": settings["cgpa_threshold"],
+    }, supersede=True)
+
+
+class AdminTokenRequest(BaseModel):
+    token: str
+
+
+@app.post("/admin/risk/recompute")
+def recompute_risk_statuses(req: AdminTokenRequest):
+    """Re-derive every student's risk_status from the current thresholds."""
+    try:
+        decoded = auth_cache.verify(req.token)
+        if not auth_cache.is_admin(decoded["uid"]):
+            return {"status": "error", "message": "Unauthorized"}
+        return {"status": "success", "job_id": _start_risk_recompute()}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+@app.get("/admin/jobs/{job_id}")
+def get_job(job_id: str, token: str):
+    """Progress of a background job (processed / total, status, errors)."""
+    try:
+        decoded = auth_cache.verify(token)
+        if not auth_cache.is_admin(decoded["uid"]):
+            return {"status": "error", "message": "Unauthorized"}
+        return {"status": "success", "job": job_runner.status(job_id)}
+    except JobNotFound:
+        return {"status": "error", "message": "Job not found"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+@app.post("/admin/jobs/{job_id}/resume")
+def resume_job(job_id: str, req: AdminTokenRequest):
+    """Continue a failed, cancelled or interrupted job from its last checkpoint."""
+    try:
+        decoded = auth_cache.verify(req.token)
+        if not auth_cache.is_admin(decoded["uid"]):
+            return {"status": "error", "message": "Unauthorized"}
+        return {"status": "success", "job_id": job_runner.resume(job_id)}
+    except JobNotFound:
+        return {"status": "error", "message": "Job not found"}
+    except Exception as e:
+        return {"status": "error", "message": str(e)}
+
+
+@app.post("/admin/jobs/{job_id}/cancel")
+def cancel_job(job_id: str, req: AdminTokenRequest):
+    try:
+        decoded = auth_cache.verify(req.token)
+        if not auth_cache.is_admin(decoded["uid"]):
+            return {"status": "error", "message": "Unauthorized"}
+        if not job_runner.cancel(job_id):
+            return {"status": "error", "message": "Job is not running on this worker"}
         return {"status": "success"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
+
+
+warmup.imported()
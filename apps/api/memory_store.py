@@ -0,0 +1,837 @@
+"""
+memory_store.py — In-process stand-in for the Firestore client
+
+Implements the subset of the `google.cloud.firestore` client API the app
+uses (documents, collections, queries with cursors/projections, batches,
+bulk writers, transactions, `get_all`, count aggregations, field transforms,
+`last_update_time` preconditions and document listeners), backed by Python
+dicts. Every RPC sleeps for a configurable round-trip latency and is counted,
+so hot paths can be profiled and benchmarked without a Firebase project.
+
+Equality (`==` / `in`) filters are served from per-field hash indexes that
+are built the first time a field is queried and maintained on every write.
+"""
+
+import copy
+import itertools
+import random
+import string
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from google.api_core.exceptions import AlreadyExists, FailedPrecondition, NotFound
+from google.cloud.firestore_v1 import transforms
+
+DOCUMENT_ID = "__name__"
+ASCENDING = "ASCENDING"
+DESCENDING = "DESCENDING"
+
+_AUTO_ID_CHARS = string.ascii_letters + string.digits
+
+
+def _auto_id() -> str:
+    return "".join(random.choices(_AUTO_ID_CHARS, k=20))
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+# ─── Values ───────────────────────────────────────────────────────────────────
+
+def _type_rank(value) -> int:
+    # Firestore's cross-type ordering
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return 1
+    if isinstance(value, (int, float)):
+        return 2
+    if isinstance(value, datetime):
+        return 3
+    if isinstance(value, str):
+        return 4
+    if isinstance(value, bytes):
+        return 5
+    if isinstance(value, MemoryDocumentReference):
+        return 6
+    if isinstance(value, (list, tuple)):
+        return 8
+    return 9
+
+
+def _sort_key(value):
+    rank = _type_rank(value)
+    if rank == 6:
+        return (rank, value.path)
+    if rank in (8, 9):
+        return (rank, repr(value))
+    return (rank, value)
+
+
+def _index_key(value):
+    """Hashable key for equality indexes, or None if the value is not indexable."""
+    if isinstance(value, (list, dict, tuple)):
+        return None
+    if isinstance(value, MemoryDocumentReference):
+        return (6, value.path)
+    return (_type_rank(value), value)
+
+
+_MISSING = object()
+
+
+def _get_path(data: dict, field_path: str):
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _apply_value(current, value, now):
+    """Resolve a (possibly transform) value against the field's current value."""
+    if value is transforms.SERVER_TIMESTAMP:
+        return now
+    if isinstance(value, transforms.Increment):
+        base = current if isinstance(current, (int, float)) and not isinstance(current, bool) else 0
+        return base + value.value
+    if isinstance(value, transforms.Maximum):
+        return value.value if not isinstance(current, (int, float)) else max(current, value.value)
+    if isinstance(value, transforms.Minimum):
+        return value.value if not isinstance(current, (int, float)) else min(current, value.value)
+    if isinstance(value, transforms.ArrayUnion):
+        result = list(current) if isinstance(current, list) else []
+        for item in value.values:
+            if item not in result:
+                result.append(item)
+        return result
+    if isinstance(value, transforms.ArrayRemove):
+        result = list(current) if isinstance(current, list) else []
+        return [item for item in result if item not in value.values]
+    if isinstance(value, dict):
+        base = current if isinstance(current, dict) else {}
+        return {k: _apply_value(base.get(k, _MISSING), v, now) for k, v in value.items()
+                if v is not transforms.DELETE_FIELD}
+    return copy.deepcopy(value)
+
+
+def _merge(target: dict, data: dict, now):
+    for key, value in data.items():
+        if value is transforms.DELETE_FIELD:
+            target.pop(key, None)
+        elif isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value, now)
+        else:
+            target[key] = _apply_value(target.get(key, _MISSING), value, now)
+
+
+def _set_path(target: dict, field_path: str, value, now):
+    parts = field_path.split(".")
+    for part in parts[:-1]:
+        child = target.get(part)
+        if not isinstance(child, dict):
+            child = target[part] = {}
+        target = child
+    if value is transforms.DELETE_FIELD:
+        target.pop(parts[-1], None)
+    else:
+        target[parts[-1]] = _apply_value(target.get(parts[-1], _MISSING), value, now)
+
+
+def _project(data: dict, field_paths) -> dict:
+    projected = {}
+    for path in field_paths:
+        value = _get_path(data, path)
+        if value is _MISSING:
+            continue
+        parts = path.split(".")
+        target = projected
+        for part in parts[:-1]:
+            target = target.setdefault(part, {})
+        target[parts[-1]] = copy.deepcopy(value)
+    return projected
+
+
+# ─── Snapshots & references ───────────────────────────────────────────────────
+
+class DocumentSnapshot:
+    def __init__(self, reference, data, create_time=None, update_time=None, read_time=None):
+        self.reference = reference
+        self._data = data
+        self.create_time = create_time
+        self.update_time = update_time
+        self.read_time = read_time
+
+    @property
+    def id(self) -> str:
+        return self.reference.id
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path: str):
+        if field_path == DOCUMENT_ID:
+            return self.reference
+        value = _get_path(self._data or {}, field_path)
+        if value is _MISSING:
+            raise KeyError(field_path)
+        return copy.deepcopy(value)
+
+
+class _Watch:
+    def __init__(self, client, path, callback):
+        self._client, self._path, self._callback = client, path, callback
+
+    def unsubscribe(self):
+        self._client._remove_listener(self._path, self)
+
+
+class MemoryDocumentReference:
+    def __init__(self, client, path: str):
+        self._client = client
+        self.path = path
+
+    @property
+    def id(self) -> str:
+        return self.path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self):
+        return MemoryCollectionReference(self._client, self.path.rsplit("/", 1)[0])
+
+    def __eq__(self, other):
+        return isinstance(other, MemoryDocumentReference) and other.path == self.path
+
+    def __hash__(self):
+        return hash(self.path)
+
+    def collection(self, name: str):
+        return MemoryCollectionReference(self._client, f"{self.path}/{name}")
+
+    def get(self, field_paths=None, transaction=None):
+        self._client._round_trip()
+        snap = self._client._snapshot(self)
+        self._client._count(reads=1)
+        if field_paths is not None and snap.exists:
+            snap._data = _project(snap._data, field_paths)
+        return snap
+
+    def set(self, document_data: dict, merge=False):
+        return self._client._commit([("set", self, document_data, merge, None)])[0]
+
+    def create(self, document_data: dict):
+        return self._client._commit([("create", self, document_data, False, None)])[0]
+
+    def update(self, field_updates: dict, option=None):
+        return self._client._commit([("update", self, field_updates, False, option)])[0]
+
+    def delete(self, option=None):
+        return self._client._commit([("delete", self, None, False, option)])[0]
+
+    def on_snapshot(self, callback):
+        watch = _Watch(self._client, self.path, callback)
+        self._client._add_listener(self.path, watch)
+        # Like Firestore, deliver the current state straight away
+        callback([self._client._snapshot(self)], [], _now())
+        return watch
+
+
+# ─── Queries ──────────────────────────────────────────────────────────────────
+
+def _matches(value, op: str, target) -> bool:
+    if op == "array_contains":
+        return isinstance(value, list) and target in value
+    if op == "array_contains_any":
+        return isinstance(value, list) and any(t in value for t in target)
+    if value is _MISSING:
+        return False
+    if op == "==":
+        return _index_key(value) is not None and _index_key(value) == _index_key(target) \
+            if not isinstance(value, (list, dict)) else value == target
+    if op == "!=":
+        return value != target and value is not None
+    if op == "in":
+        return any(_matches(value, "==", t) for t in target)
+    if op == "not-in":
+        return value is not None and not any(_matches(value, "==", t) for t in target)
+    if _type_rank(value) != _type_rank(target):
+        return False
+    if op == "<":
+        return value < target
+    if op == "<=":
+        return value <= target
+    if op == ">":
+        return value > target
+    if op == ">=":
+        return value >= target
+    raise ValueError(f"Unsupported operator: {op}")
+
+
+class AggregationResult:
+    def __init__(self, alias, value, read_time=None):
+        self.alias, self.value, self.read_time = alias, value, read_time
+
+
+class _CountQuery:
+    def __init__(self, query, alias):
+        self._query, self._alias = query, alias or "count"
+
+    def get(self, transaction=None, **kwargs):
+        client = self._query._client
+        client._round_trip()
+        count = len(client._run_query(self._query))
+        # Billed like Firestore: one read per 1000 index entries (min 1)
+        client._count(reads=max(1, count // 1000 + (1 if count % 1000 else 0)), queries=1)
+        return [[AggregationResult(self._alias, count, _now())]]
+
+
+class MemoryQuery:
+    def __init__(self, client, collection_path: str, filters=(), orders=(), limit=None,
+                 start_after=None, projection=None):
+        self._client = client
+        self._path = collection_path
+        self._filters = list(filters)
+        self._orders = list(orders)
+        self._limit = limit
+        self._start_after = start_after
+        self._projection = projection
+
+    def _copy(self, **changes):
+        fields = {
+            "filters": self._filters, "orders": self._orders, "limit": self._limit,
+            "start_after": self._start_after, "projection": self._projection,
+        }
+        fields.update(changes)
+        return MemoryQuery(self._client, self._path, **fields)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + [(field_path, op_string, value)])
+
+    def order_by(self, field_path: str, direction=ASCENDING):
+        return self._copy(orders=self._orders + [(field_path, direction)])
+
+    def limit(self, count: int):
+        return self._copy(limit=count)
+
+    def start_after(self, document_fields):
+        return self._copy(start_after=document_fields)
+
+    def select(self, field_paths):
+        return self._copy(projection=list(field_paths))
+
+    def count(self, alias=None):
+        return _CountQuery(self, alias)
+
+    def stream(self, transaction=None, **kwargs):
+        self._client._round_trip()
+        snaps = self._client._run_query(self)
+        self._client._count(reads=max(1, len(snaps)), queries=1)
+        return iter(snaps)
+
+    def get(self, transaction=None, **kwargs):
+        return list(self.stream(transaction=transaction))
+
+
+class MemoryCollectionReference(MemoryQuery):
+    def __init__(self, client, path: str):
+        super().__init__(client, path)
+
+    @property
+    def id(self) -> str:
+        return self._path.rsplit("/", 1)[-1]
+
+    @property
+    def parent(self):
+        if "/" not in self._path:
+            return None
+        return MemoryDocumentReference(self._client, self._path.rsplit("/", 1)[0])
+
+    def document(self, document_id: str = None):
+        return MemoryDocumentReference(self._client, f"{self._path}/{document_id or _auto_id()}")
+
+    def add(self, document_data: dict, document_id: str = None):
+        ref = self.document(document_id)
+        result = ref.create(document_data)
+        return result.update_time, ref
+
+    def list_documents(self, page_size=None):
+        return [self.document(doc_id) for doc_id in self._client._collection(self._path).docs]
+
+
+# ─── Writes ───────────────────────────────────────────────────────────────────
+
+class WriteResult:
+    def __init__(self, update_time):
+        self.update_time = update_time
+
+
+class LastUpdateOption:
+    """Precondition: the document still has the `update_time` it was read with."""
+
+    def __init__(self, last_update_time):
+        self.last_update_time = last_update_time
+
+
+class MemoryWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def set(self, reference, document_data, merge=False):
+        self._writes.append(("set", reference, document_data, merge, None))
+        return self
+
+    def create(self, reference, document_data):
+        self._writes.append(("create", reference, document_data, False, None))
+        return self
+
+    def update(self, reference, field_updates, option=None):
+        self._writes.append(("update", reference, field_updates, False, option))
+        return self
+
+    def delete(self, reference, option=None):
+        self._writes.append(("delete", reference, None, False, option))
+        return self
+
+    def __len__(self):
+        return len(self._writes)
+
+    def commit(self):
+        writes, self._writes = self._writes, []
+        return self._client._commit(writes)
+
+
+class _Operation:
+    def __init__(self, reference):
+        self.reference = reference
+        self.attempts = 0
+
+
+class BulkWriteFailure:
+    """Shaped like google.cloud.firestore_v1.bulk_writer.BulkWriteFailure."""
+
+    def __init__(self, operation, code: int, message: str):
+        self.operation = operation
+        self.code = code
+        self.message = message
+
+    @property
+    def attempts(self) -> int:
+        return self.operation.attempts
+
+
+class MemoryBulkWriter(MemoryWriteBatch):
+    """BulkWriter stand-in: sends batches of 20 writes, paced to
+    `max_ops_per_second` like Firestore's BulkWriter throttle. Like the real
+    one, a failed write does not raise: it goes to the `on_write_error`
+    callback, which returns True to retry it."""
+
+    batch_size = 20
+
+    def __init__(self, client, max_ops_per_second: float = 500):
+        super().__init__(client)
+        self._max_ops = max_ops_per_second
+        self._started = time.monotonic()
+        self._sent = 0
+        self._on_error = lambda error, writer: error.attempts < 15
+        self._on_result = lambda reference, result, writer: None
+
+    def on_write_error(self, callback):
+        self._on_error = callback or (lambda error, writer: error.attempts < 15)
+
+    def on_write_result(self, callback):
+        self._on_result = callback or (lambda reference, result, writer: None)
+
+    def _stage(self, write):
+        self._writes.append(write)
+        if len(self._writes) >= self.batch_size:
+            self.flush()
+        return self
+
+    def set(self, reference, document_data, merge=False):
+        return self._stage(("set", reference, document_data, merge, None))
+
+    def create(self, reference, document_data):
+        return self._stage(("create", reference, document_data, False, None))
+
+    def update(self, reference, field_updates, option=None):
+        return self._stage(("update", reference, field_updates, False, option))
+
+    def delete(self, reference, option=None):
+        return self._stage(("delete", reference, None, False, option))
+
+    def flush(self):
+        while self._writes:
+            chunk, self._writes = self._writes[:self.batch_size], self._writes[self.batch_size:]
+            if self._max_ops:
+                wait = self._started + (self._sent + len(chunk)) / self._max_ops - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+            self._send(chunk)
+            self._sent += len(chunk)
+
+    def _send(self, chunk):
+        try:
+            results = self._client._commit(chunk)
+        except Exception:
+            # Firestore applies BulkWriter writes independently, so one bad
+            # write must not take the rest of the batch down with it
+            for write in chunk:
+                self._send_one(write)
+            return
+        for write, result in zip(chunk, results):
+            self._on_result(write[1], result, self)
+
+    def _send_one(self, write):
+        operation = _Operation(write[1])
+        while True:
+            operation.attempts += 1
+            try:
+                result = self._client._commit([write])[0]
+            except Exception as e:
+                status = getattr(e, "grpc_status_code", None)
+                code = status.value[0] if status is not None else 2  # UNKNOWN
+                failure = BulkWriteFailure(operation, code, str(e))
+                if self._on_error(failure, self):
+                    continue
+                return
+            self._on_result(write[1], result, self)
+            return
+
+    def close(self):
+        self.flush()
+
+
+class MemoryTransaction(MemoryWriteBatch):
+    """Works with `firestore.transactional`: the store lock is held from
+    `_begin` to `_commit`/`_rollback`, so transactions are serializable."""
+
+    _read_only = False
+    _max_attempts = 1
+
+    def __init__(self, client):
+        super().__init__(client)
+        self._id = None
+        self._held = False
+
+    def _clean_up(self):
+        self._writes = []
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        # BeginTransaction is an RPC of its own on Firestore
+        self._client._round_trip()
+        self._client._lock.acquire()
+        self._held = True
+        self._id = next(self._client._txn_ids)
+
+    def _release(self):
+        if self._held:
+            self._held = False
+            self._client._lock.release()
+
+    def _commit(self):
+        try:
+            return self.commit()
+        finally:
+            self._clean_up()
+            self._release()
+
+    def _rollback(self):
+        self._clean_up()
+        self._release()
+        self._client._round_trip()
+
+
+# ─── Client ───────────────────────────────────────────────────────────────────
+
+class _Collection:
+    def __init__(self):
+        self.docs = {}     # doc_id -> (data, create_time, update_time)
+        self.indexes = {}  # field_path -> {index_key: set(doc_ids)}
+
+    def index_for(self, field_path: str) -> dict:
+        index = self.indexes.get(field_path)
+        if index is None:
+            index = {}
+            for doc_id, (data, _, _) in self.docs.items():
+                key = _index_key(_get_path(data, field_path))
+                if key is not None:
+                    index.setdefault(key, set()).add(doc_id)
+            self.indexes[field_path] = index
+        return index
+
+    def write(self, doc_id: str, entry):
+        old = self.docs.get(doc_id)
+        for field_path, index in self.indexes.items():
+            if old is not None:
+                key = _index_key(_get_path(old[0], field_path))
+                if key is not None and key in index:
+                    index[key].discard(doc_id)
+            if entry is not None:
+                key = _index_key(_get_path(entry[0], field_path))
+                if key is not None:
+                    index.setdefault(key, set()).add(doc_id)
+        if entry is None:
+            self.docs.pop(doc_id, None)
+        else:
+            self.docs[doc_id] = entry
+
+
+class MemoryClient:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self._lock = threading.RLock()
+        self._collections = {}
+        self._listeners = {}
+        self._txn_ids = itertools.count(1)
+        self._last_commit = _now()
+        self._stats_lock = threading.Lock()
+        self.reset_stats()
+
+    # ── Accounting ───────────────────────────────────────────────────────────
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self._stats = {"round_trips": 0, "reads": 0, "writes": 0, "queries": 0}
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, reads=0, writes=0, queries=0):
+        with self._stats_lock:
+            self._stats["reads"] += reads
+            self._stats["writes"] += writes
+            self._stats["queries"] += queries
+
+    def _round_trip(self):
+        with self._stats_lock:
+            self._stats["round_trips"] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    # ── Public API ───────────────────────────────────────────────────────────
+
+    def collection(self, path: str):
+        return MemoryCollectionReference(self, path)
+
+    def document(self, path: str):
+        return MemoryDocumentReference(self, path)
+
+    def batch(self):
+        return MemoryWriteBatch(self)
+
+    def transaction(self, **kwargs):
+        return MemoryTransaction(self)
+
+    def write_option(self, last_update_time):
+        return LastUpdateOption(last_update_time)
+
+    def bulk_writer(self, options=None):
+        return MemoryBulkWriter(self, getattr(options, "max_ops_per_second", 500))
+
+    def get_all(self, references, field_paths=None, transaction=None):
+        references = list(references)
+        self._round_trip()
+        self._count(reads=len(references))
+        for ref in references:
+            snap = self._snapshot(ref)
+            if field_paths is not None and snap.exists:
+                snap._data = _project(snap._data, field_paths)
+            yield snap
+
+    def close(self):
+        pass
+
+    def load(self, collection_path: str, documents):
+        """Bulk-insert `(doc_id, data)` pairs without latency or accounting,
+        for seeding benchmark datasets. Data is stored as given (not copied)."""
+        now = _now()
+        with self._lock:
+            coll = self._collection(collection_path)
+            for doc_id, data in documents:
+                coll.write(doc_id, (data, now, now))
+
+    # ── Storage ──────────────────────────────────────────────────────────────
+
+    def _collection(self, path: str) -> _Collection:
+        coll = self._collections.get(path)
+        if coll is None:
+            coll = self._collections[path] = _Collection()
+        return coll
+
+    def _snapshot(self, ref) -> DocumentSnapshot:
+        coll_path, doc_id = ref.path.rsplit("/", 1)
+        with self._lock:
+            entry = self._collection(coll_path).docs.get(doc_id)
+            if entry is None:
+                return DocumentSnapshot(ref, None, read_time=_now())
+            # Stored dicts are replaced, never mutated, on write, so snapshots
+            # can share them; to_dict() hands out copies
+            data, created, updated = entry
+            return DocumentSnapshot(ref, data, created, updated, _now())
+
+    def _commit(self, writes) -> list:
+        self._round_trip()
+        results = []
+        changed = []
+        with self._lock:
+            # Strictly increasing, so an update_time identifies one version
+            # of a document (see LastUpdateOption)
+            now = max(_now(), self._last_commit + timedelta(microseconds=1))
+            self._last_commit = now
+            # Validate first so a failing batch applies nothing
+            for op, ref, data, merge, option in writes:
+                coll_path, doc_id = ref.path.rsplit("/", 1)
+                entry = self._collection(coll_path).docs.get(doc_id)
+                if option is not None and (entry is None or entry[2] != option.last_update_time):
+                    raise FailedPrecondition(f"Document changed since it was read: {ref.path}")
+                if op == "create" and entry is not None:
+                    raise AlreadyExists(f"Document already exists: {ref.path}")
+                if op == "update" and entry is None:
+                    raise NotFound(f"No document to update: {ref.path}")
+
+            for op, ref, data, merge, option in writes:
+                coll_path, doc_id = ref.path.rsplit("/", 1)
+                coll = self._collection(coll_path)
+                entry = coll.docs.get(doc_id)
+                if op == "delete":
+                    coll.write(doc_id, None)
+                else:
+                    current = copy.deepcopy(entry[0]) if entry is not None else {}
+                    created = entry[1] if entry is not None else now
+                    if op == "update":
+                        for field_path, value in data.items():
+                            _set_path(current, field_path, value, now)
+                    elif op == "set" and merge:
+                        _merge(current, data, now)
+                    else:
+                        current = {}
+                        _merge(current, data, now)
+                    coll.write(doc_id, (current, created, now))
+                results.append(WriteResult(now))
+                changed.append(ref)
+        self._count(writes=len(writes))
+        self._notify(changed)
+        return results
+
+    def _run_query(self, query: MemoryQuery) -> list:
+        with self._lock:
+            coll = self._collection(query._path)
+
+            # Shortlist candidates from an equality index when possible
+            candidate_ids = None
+            for field_path, op, value in query._filters:
+                if op not in ("==", "in") or field_path == DOCUMENT_ID:
+                    continue
+                index = coll.index_for(field_path)
+                values = value if op == "in" else [value]
+                ids = set()
+                for v in values:
+                    key = _index_key(v)
+                    if key is not None:
+                        ids |= index.get(key, set())
+                candidate_ids = ids if candidate_ids is None else candidate_ids & ids
+            if candidate_ids is None:
+                candidate_ids = coll.docs.keys()
+
+            rows = []
+            for doc_id in candidate_ids:
+                data, created, updated = coll.docs[doc_id]
+                if all(self._filter_ok(doc_id, data, f) for f in query._filters) and \
+                        all(o[0] == DOCUMENT_ID or _get_path(data, o[0]) is not _MISSING
+                            for o in query._orders):
+                    rows.append((doc_id, data, created, updated))
+
+        orders = list(query._orders)
+        if not any(field == DOCUMENT_ID for field, _ in orders):
+            orders.append((DOCUMENT_ID, orders[-1][1] if orders else ASCENDING))
+
+        def value_of(row, field):
+            return row[0] if field == DOCUMENT_ID else _get_path(row[1], field)
+
+        for field, direction in reversed(orders):
+            rows.sort(key=lambda r: _sort_key(value_of(r, field)), reverse=direction == DESCENDING)
+
+        if query._start_after is not None:
+            cursor = self._cursor_values(query._start_after, orders)
+            rows = [r for r in rows if self._after_cursor(r, cursor, orders, value_of)]
+
+        if query._limit is not None:
+            rows = rows[:query._limit]
+
+        read_time = _now()
+        snaps = []
+        for doc_id, data, created, updated in rows:
+            ref = MemoryDocumentReference(self, f"{query._path}/{doc_id}")
+            if query._projection is not None:
+                data = _project(data, query._projection)
+            snaps.append(DocumentSnapshot(ref, data, created, updated, read_time))
+        return snaps
+
+    @staticmethod
+    def _filter_ok(doc_id, data, flt) -> bool:
+        field_path, op, value = flt
+        if field_path == DOCUMENT_ID:
+            target = value.id if isinstance(value, MemoryDocumentReference) else value
+            return _matches(doc_id, op, target)
+        return _matches(_get_path(data, field_path), op, value)
+
+    @staticmethod
+    def _cursor_values(cursor, orders) -> list:
+        if isinstance(cursor, DocumentSnapshot):
+            data = cursor._data or {}
+            return [cursor.id if f == DOCUMENT_ID else _get_path(data, f) for f, _ in orders]
+        if isinstance(cursor, dict):
+            values = []
+            for field, _ in orders:
+                if field not in cursor:
+                    break
+                value = cursor[field]
+                if field == DOCUMENT_ID and isinstance(value, MemoryDocumentReference):
+                    value = value.id
+                values.append(value)
+            return values
+        return list(cursor)
+
+    @staticmethod
+    def _after_cursor(row, cursor, orders, value_of) -> bool:
+        for (field, direction), target in zip(orders, cursor):
+            a, b = _sort_key(value_of(row, field)), _sort_key(target)
+            if a == b:
+                continue
+            return a > b if direction != DESCENDING else a < b
+        return False
+
+    # ── Listeners ────────────────────────────────────────────────────────────
+
+    def _add_listener(self, path: str, watch):
+        with self._lock:
+            self._listeners.setdefault(path, []).append(watch)
+
+    def _remove_listener(self, path: str, watch):
+        with self._lock:
+            watches = self._listeners.get(path, [])
+            if watch in watches:
+                watches.remove(watch)
+
+    def _notify(self, refs):
+        if not self._listeners:
+            return
+        for ref in refs:
+            with self._lock:
+                watches = list(self._listeners.get(ref.path, []))
+            if watches:
+                snap = self._snapshot(ref)
+                for watch in watches:
+                    watch._callback([snap], [], _now())
@@ -0,0 +1,295 @@
+"""
+metrics.py — Prometheus text-format metrics without extra dependencies
+
+Module-level counters, gauges and histograms (recorded by the middleware,
+the Firestore accounting wrapper and the Gemini pool), plus collectors that
+read cache statistics at scrape time. `GET /metrics` renders everything in
+the Prometheus exposition format (text/plain; version=0.0.4).
+
+`MetricsMiddleware` times every HTTP request by route template, tracks the
+requests in flight, and classifies each response as ok / error /
+client_error / server_error. Handlers report failures as
+`{"status": "error"}` with HTTP 200 and put that key first, so the start of
+each JSON body is checked for it (no parsing), as are Server-Sent Event
+streams for an `error` event.
+
+Metrics are per process; with several workers, scrape each one.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; from a cached Firestore read up to a slow Gemini answer
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+FIRESTORE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Bytes at the start of a JSON body checked for {"status": "error"}
+_INSPECTED_PREFIX = 64
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        if not self.labelnames and self.type != "histogram":
+            self._values[()] = 0
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value) -> list:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # per-bucket counts (non-cumulative), +Inf last, then sum
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def _render_sample(self, key, value) -> list:
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [("le", _format_value(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def register_collector(self, collect):
+        """`collect()` returns metrics built on the fly at scrape time."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                for metric in collect():
+                    lines.extend(metric.render())
+            except Exception as e:
+                print(f"⚠️  Metrics collector failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+# ─── HTTP ─────────────────────────────────────────────────────────────────────
+
+HTTP_REQUESTS = registry.counter(
+    "http_requests_total", "HTTP requests by route and outcome.",
+    ["method", "route", "status_code", "outcome"])
+HTTP_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.",
+    ["method", "route"])
+HTTP_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled.",
+    ["method", "route"])
+
+# ─── Upstreams ────────────────────────────────────────────────────────────────
+
+FIRESTORE_DURATION = registry.histogram(
+    "firestore_operation_duration_seconds", "Firestore RPC latency by operation and collection.",
+    ["op", "collection"], buckets=FIRESTORE_BUCKETS)
+FIRESTORE_DOCUMENTS = registry.counter(
+    "firestore_documents_total", "Firestore documents read or written.",
+    ["kind", "collection"])
+GEMINI_DURATION = registry.histogram(
+    "gemini_call_duration_seconds", "Gemini call latency (excluding queue wait).",
+    ["mode", "outcome"])
+GEMINI_REJECTED = registry.counter(
+    "gemini_rejected_total", "Gemini calls turned away because the queue was full or timed out.")
+
+
+def cache_collector(caches: dict):
+    """Collector for caches exposing `stats()` with hits/misses/size.
+
+    `caches` maps a cache label to a zero-argument callable returning stats.
+    """
+    def collect():
+        hits = Counter("cache_hits_total", "Cache hits.", ["cache"])
+        misses = Counter("cache_misses_total", "Cache misses.", ["cache"])
+        size = Gauge("cache_entries", "Entries currently cached.", ["cache"])
+        ratio = Gauge("cache_hit_ratio", "Hits / (hits + misses) since start.", ["cache"])
+        for label, stats in caches.items():
+            s = stats()
+            h = s.get("hits", s.get("exact_hits", 0) + s.get("similar_hits", 0))
+            hits.inc(h, cache=label)
+            misses.inc(s.get("misses", 0), cache=label)
+            size.set(s.get("size", 0), cache=label)
+            ratio.set(s.get("hit_rate", 0.0), cache=label)
+        return [hits, misses, size, ratio]
+    return collect
+
+
+def gauge_collector(name: str, documentation: str, read):
+    """Collector for one unlabelled gauge whose value is read at scrape time."""
+    def collect():
+        gauge = Gauge(name, documentation)
+        gauge.set(read())
+        return [gauge]
+    return collect
+
+
+# ─── Middleware ───────────────────────────────────────────────────────────────
+
+def _classify(status_code: int, content_type: str, body: bytes) -> str:
+    if status_code >= 500:
+        return "server_error"
+    if status_code >= 400:
+        return "client_error"
+    if body and content_type.startswith("application/json"):
+        # Same check as http_cache._is_error; bodies are compact JSON
+        head = body[:_INSPECTED_PREFIX]
+        if b'"status":"error"' in head or b'"status": "error"' in head or head.startswith(b'{"error"'):
+            return "error"
+    return "ok"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording HTTP latency, in-flight requests and outcomes."""
+
+    def __init__(self, app, router=None):
+        self.app = app
+        self.router = router
+
+    def _route(self, scope) -> str:
+        if self.router is not None:
+            from starlette.routing import Match
+            for route in self.router.routes:
+                match, _ = route.matches(scope)
+                if match == Match.FULL:
+                    return getattr(route, "path", scope["path"])
+        return "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = self._route(scope)
+        response = {"status": 500, "content_type": "", "body": bytearray(), "stream_error": False}
+
+        async def send_and_observe(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                for name, value in message.get("headers", []):
+                    if name.lower() == b"content-type":
+                        response["content_type"] = value.decode("latin-1")
+            elif message["type"] == "http.response.body" and response["content_type"].startswith("text/event-stream"):
+                # Each event is sent as its own body message; don't buffer the stream
+                if message.get("body", b"").startswith(b"event: error"):
+                    response["stream_error"] = True
+            elif message["type"] == "http.response.body" and len(response["body"]) < _INSPECTED_PREFIX:
+                response["body"].extend(message.get("body", b"")[:_INSPECTED_PREFIX])
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc(method=method, route=route)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_and_observe)
+        finally:
+            HTTP_DURATION.observe(time.perf_counter() - started, method=method, route=route)
+            HTTP_IN_FLIGHT.dec(method=method, route=route)
+            outcome = _classify(response["status"], response["content_type"], bytes(response["body"]))
+            if outcome == "ok" and response["stream_error"]:
+                outcome = "error"
+            HTTP_REQUESTS.inc(method=method, route=route,
+                              status_code=response["status"], outcome=outcome)
@@ -0,0 +1,137 @@
+"""
+notification_fanout.py — Notify thousands of students as a background job
+
+A Firestore batch holds at most 500 writes, so `/admin/notify/batch` hands
+the target list to this job (kind "notification_fanout", run by
+jobs.JobRunner). Targets are split into chunks of NOTIFY_FANOUT_CHUNK_SIZE
+and each chunk is committed as one batch, with two writes per target: the
+notification and the recipient's unread counter (inbox.py). Up to
+NOTIFY_FANOUT_CONCURRENCY batches are in flight at once. Transient errors
+are retried with exponential backoff.
+
+Notification ids are derived from the job id and target position, and the
+documents are written with create(). A retried or resumed chunk whose
+batch already landed (e.g. a commit that timed out after succeeding)
+therefore fails atomically with AlreadyExists, which counts as done, so
+neither notifications nor unread counters are applied twice. Finished
+chunks are checkpointed as the job's cursor and chunks that still fail are
+listed in `failed_chunks`. The job then ends as failed, and resuming it
+retries only the unfinished chunks.
+"""
+
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from google.api_core import exceptions as gexc
+
+import inbox
+from http_cache import response_cache
+
+# Two writes per target, and a batch holds at most 500
+NOTIFY_FANOUT_CHUNK_SIZE = min(int(os.getenv("NOTIFY_FANOUT_CHUNK_SIZE", "250")), 250)
+NOTIFY_FANOUT_CONCURRENCY = int(os.getenv("NOTIFY_FANOUT_CONCURRENCY", "4"))
+NOTIFY_FANOUT_MAX_RETRIES = int(os.getenv("NOTIFY_FANOUT_MAX_RETRIES", "4"))
+# Target ids are stored in the job document, which Firestore caps at 1 MiB
+NOTIFY_FANOUT_MAX_TARGETS = int(os.getenv("NOTIFY_FANOUT_MAX_TARGETS", "20000"))
+
+JOB_KIND = "notification_fanout"
+
+_RETRYABLE = (
+    gexc.Aborted,
+    gexc.DeadlineExceeded,
+    gexc.InternalServerError,
+    gexc.ResourceExhausted,
+    gexc.ServiceUnavailable,
+)
+
+# Seconds before retry n (1-based) is `_BACKOFF_BASE * 2**(n-1)`, plus jitter
+_BACKOFF_BASE = 0.5
+
+
+class FanoutIncomplete(Exception):
+    pass
+
+
+def chunk_count(targets: int, chunk_size: int = NOTIFY_FANOUT_CHUNK_SIZE) -> int:
+    return (targets + chunk_size - 1) // chunk_size
+
+
+def _commit_with_retry(commit, max_retries: int, sleep=time.sleep) -> int:
+    """Run `commit()`, retrying transient errors; returns the attempts used."""
+    attempt = 1
+    while True:
+        try:
+            commit()
+            return attempt
+        except _RETRYABLE:
+            if attempt > max_retries:
+                raise
+            sleep(_BACKOFF_BASE * 2 ** (attempt - 1) * (1 + random.random()))
+            attempt += 1
+
+
+def make_job(db, chunk_size: int = NOTIFY_FANOUT_CHUNK_SIZE,
+             concurrency: int = NOTIFY_FANOUT_CONCURRENCY,
+             max_retries: int = NOTIFY_FANOUT_MAX_RETRIES):
+    """The job function to register with JobRunner under JOB_KIND.
+
+    Job params: `student_ids`, `title`, `type` and `sender_uid`.
+    """
+    def commit_chunk(job, index: int, targets: list) -> int:
+        params = job.params
+        start = index * chunk_size
+
+        def commit():
+            notifications = db.collection("notifications")
+            batch = db.batch()
+            for offset, uid in enumerate(targets):
+                inbox.notify(batch, db, uid, {
+                    "title": params["title"],
+                    "type": params["type"],
+                    "sender_uid": params["sender_uid"],
+                }, ref=notifications.document(f"{job.id}-{start + offset}"))
+            try:
+                batch.commit()
+            except gexc.AlreadyExists:
+                pass  # an earlier attempt landed; the batch is all-or-nothing
+            response_cache.invalidate("notifications")
+        return _commit_with_retry(commit, max_retries)
+
+    def fan_out_notifications(job):
+        targets = job.params["student_ids"]
+        chunks = chunk_count(len(targets), chunk_size)
+        done = set(job.cursor or [])
+        sent = sum(len(targets[i * chunk_size:(i + 1) * chunk_size]) for i in done)
+        failed = []
+        job.checkpoint(total=len(targets), chunks=chunks, sent=sent, failed_chunks=[])
+
+        pending = [i for i in range(chunks) if i not in done]
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="fanout") as pool:
+            futures = {
+                pool.submit(commit_chunk, job, i, targets[i * chunk_size:(i + 1) * chunk_size]): i
+                for i in pending
+            }
+            for future in as_completed(futures):
+                index = futures[future]
+                if job.cancelled:
+                    for f in futures:
+                        f.cancel()
+                if future.cancelled():
+                    continue
+                try:
+                    future.result()
+                except Exception as e:
+                    failed.append({"chunk": index, "error": str(e)})
+                    job.checkpoint(failed_chunks=failed)
+                    continue
+                done.add(index)
+                sent += len(targets[index * chunk_size:(index + 1) * chunk_size])
+                job.checkpoint(cursor=sorted(done), sent=sent)
+
+        if failed and not job.cancelled:
+            raise FanoutIncomplete(f"{len(failed)} of {chunks} chunks failed; resume the job to retry them")
+        return {"sent": sent}
+
+    return fan_out_notifications
@@ -0,0 +1,126 @@
+"""
+pagination.py — Cursor-based pagination for Firestore list endpoints
+
+Pages are ordered server-side by one field plus the document id as a
+tie-breaker, and resumed with `start_after`, so each request reads at most
+`page_size` documents per query. Cursors are opaque, URL-safe strings that
+encode the last document's sort value and id. Pass `fields` to project
+documents down to the fields the client needs.
+
+Several queries (e.g. `course_id in [...]` chunks) can be paginated together:
+each one is read up to `page_size` and the results are merged in order.
+
+Without `page_size`, a request gets the first DEFAULT_PAGE_SIZE items, so
+clients must follow `next_cursor` to see a whole list (the web app does this
+with apps/web/lib/pagination.js).
+"""
+
+import base64
+import json
+import os
+from datetime import datetime
+
+from firebase_admin import firestore
+
+from firestore_bulk import run_concurrently
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "200"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+
+DOCUMENT_ID = "__name__"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def clamp_page_size(page_size) -> int:
+    if not page_size:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(page_size), MAX_PAGE_SIZE))
+
+
+def parse_fields(fields):
+    """Comma-separated field list from a query string, or None for all fields."""
+    if not fields:
+        return None
+    if isinstance(fields, str):
+        fields = fields.split(",")
+    return [f.strip() for f in fields if f.strip()] or None
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"$ts": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict) and "$ts" in value:
+        return datetime.fromisoformat(value["$ts"])
+    return value
+
+
+def encode_cursor(sort_value, doc_id: str) -> str:
+    raw = json.dumps([_encode_value(sort_value), doc_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort_value, doc_id = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return _decode_value(sort_value), doc_id
+    except Exception:
+        raise InvalidCursor("Invalid cursor")
+
+
+def _sort_value(snap, order_by: str):
+    if order_by == DOCUMENT_ID:
+        return snap.id
+    return snap.get(order_by)
+
+
+def paginate(queries, order_by: str = DOCUMENT_ID, descending: bool = False,
+             page_size: int = None, cursor: str = None, fields=None):
+    """Read one page from a query (or several queries merged).
+
+    Returns (snapshots, next_cursor); next_cursor is None on the last page.
+    """
+    if not isinstance(queries, (list, tuple)):
+        queries = [queries]
+    page_size = clamp_page_size(page_size)
+    direction = firestore.Query.DESCENDING if descending else firestore.Query.ASCENDING
+
+    start_after = None
+    if cursor:
+        sort_value, doc_id = decode_cursor(cursor)
+        start_after = {DOCUMENT_ID: doc_id}
+        if order_by != DOCUMENT_ID:
+            start_after = {order_by: sort_value, DOCUMENT_ID: doc_id}
+
+    fields = parse_fields(fields)
+    if fields is not None and order_by != DOCUMENT_ID and order_by not in fields:
+        fields = fields + [order_by]
+
+    def read(query):
+        if order_by != DOCUMENT_ID:
+            query = query.order_by(order_by, direction=direction)
+        query = query.order_by(DOCUMENT_ID, direction=direction)
+        if fields is not None:
+            query = query.select(fields)
+        if start_after is not None:
+            query = query.start_after(start_after)
+        # One extra document tells us whether there is a next page
+        return list(query.limit(page_size + 1).stream())
+
+    snaps = [snap for chunk in run_concurrently(read, queries) for snap in chunk]
+    if len(queries) > 1:
+        snaps.sort(key=lambda s: (_sort_value(s, order_by), s.id), reverse=descending)
+
+    next_cursor = None
+    if len(snaps) > page_size:
+        snaps = snaps[:page_size]
+        last = snaps[-1]
+        next_cursor = encode_cursor(_sort_value(last, order_by), last.id)
+    return snaps, next_cursor
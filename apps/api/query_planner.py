@@ -0,0 +1,34 @@
+"""
+query_planner.py — Split `field in [...]` queries into Firestore-sized chunks
+
+Firestore caps the `in` operator at 30 values per query. `chunk_queries`
+builds one query per chunk of values (with any extra equality filters
+applied). `pagination.paginate` reads them concurrently as one merged,
+ordered feed, and `count_in_chunks` sums their aggregation counts, so the
+work is proportional to the matching documents rather than to the whole
+collection. The composite indexes these queries need are defined in
+`firestore.indexes.json`.
+"""
+
+from firestore_bulk import chunked, run_concurrently
+
+IN_QUERY_LIMIT = 30
+
+
+def chunk_queries(collection, field: str, values, filters=(), limit: int = IN_QUERY_LIMIT):
+    """One query per `limit`-sized chunk of `values`, each with `filters` applied."""
+    values = list(dict.fromkeys(values))
+    queries = []
+    for chunk in chunked(values, limit):
+        query = collection.where(field, "in", chunk)
+        for f_field, op, f_value in filters:
+            query = query.where(f_field, op, f_value)
+        queries.append(query)
+    return queries
+
+
+def count_in_chunks(collection, field: str, values, filters=(), limit: int = IN_QUERY_LIMIT) -> int:
+    """Number of documents where `field` is one of `values` (and every extra
+    `(field, op, value)` filter matches), from one aggregation query per chunk."""
+    queries = chunk_queries(collection, field, values, filters, limit)
+    return sum(run_concurrently(lambda q: q.count().get()[0][0].value, queries))
@@ -0,0 +1,19 @@
+"""
+recompute_inbox.py — Backfill / repair notification inbox counters
+Run: python recompute_inbox.py
+"""
+
+from firebase_config import db
+from inbox import recompute_inbox_counters
+
+
+def main():
+    result = recompute_inbox_counters(db)
+    print(f"✅ Numbered {result['broadcasts']} broadcast(s); "
+          f"{result['users_with_unread']} user(s) have unread notifications")
+    if result["orphaned"]:
+        print(f"⚠️  Skipped {result['orphaned']} notification(s) with no recipient (target_uid is null)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+recompute_stats.py — Backfill / repair the teacher_stats aggregates
+Run: python recompute_stats.py [teacher_id ...]   (no ids = every teacher with a course)
+"""
+
+import sys
+
+from firebase_config import db
+from aggregates import recompute_teacher_stats
+
+
+def main(teacher_ids):
+    if not teacher_ids:
+        teacher_ids = sorted({
+            c.to_dict().get("teacher_id")
+            for c in db.collection("courses").select(["teacher_id"]).stream()
+        } - {None})
+
+    for teacher_id in teacher_ids:
+        stats = recompute_teacher_stats(db, teacher_id)
+        print(f"{teacher_id}: {stats}")
+    print(f"✅ Recomputed stats for {len(teacher_ids)} teacher(s)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
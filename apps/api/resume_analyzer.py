@@ -0,0 +1,542 @@
+"""
+resume_analyzer.py — Local resume scoring for /analyze-resume
+
+Text is extracted from PDF (pypdf), DOCX (the document XML inside the zip)
+or plain text, split into sections by their headings, and matched against
+per-role keyword dictionaries. The best-matching role drives the keyword
+report, and simple heuristics (quantified bullets, standard headings,
+contact details, length) produce the five `category_scores` the career page
+renders.
+
+The work is CPU-bound, so `ResumeAnalyzerPool` runs `analyze` in a
+`ProcessPoolExecutor` and bounds each request by a deadline; the event loop
+only awaits the result. A worker that misses the deadline may be stuck
+inside a single page, so the pool is torn down (its workers killed) and
+started afresh. The same happens when a worker crashes and the pool breaks,
+but the analysis is not retried: the input may be what crashed it, and a
+retry would take down every other analysis in the pool again.
+
+A DOCX's document XML is capped at DOCX_MAX_XML_BYTES once decompressed, so
+a small zip bomb cannot exhaust a worker's memory.
+"""
+
+import asyncio
+import io
+import multiprocessing
+import os
+import re
+import threading
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from xml.etree import ElementTree
+
+from metrics import registry
+
+RESUME_WORKERS = int(os.getenv("RESUME_WORKERS", "2"))
+RESUME_ANALYSIS_TIMEOUT = float(os.getenv("RESUME_ANALYSIS_TIMEOUT", "10"))
+RESUME_MAX_PAGES = int(os.getenv("RESUME_MAX_PAGES", "8"))
+RESUME_MAX_BYTES = int(os.getenv("RESUME_MAX_BYTES", str(5 * 1024 * 1024)))
+# Text XML compresses well, but a real resume's stays far below this
+DOCX_MAX_XML_BYTES = 4 * RESUME_MAX_BYTES
+
+# Bump when dictionaries or scoring change so cached results (resume_cache.py) are not reused
+ANALYZER_VERSION = 1
+
+RESUME_DURATION = registry.histogram(
+    "resume_analysis_duration_seconds", "Resume analysis latency, including the process hop.",
+    ["outcome"])
+
+
+class ResumeUnreadable(ValueError):
+    """The file is not a supported format or contains no extractable text."""
+
+
+class AnalysisTimeout(Exception):
+    """The analysis did not finish before its deadline."""
+
+
+class AnalyzerUnavailable(Exception):
+    """The worker pool broke (e.g. a worker crashed) during the analysis."""
+
+
+# ─── Dictionaries ─────────────────────────────────────────────────────────────
+
+# Section -> heading spellings (matched case-insensitively on a line of its own)
+SECTION_HEADINGS = {
+    "summary": ["summary", "profile", "objective", "career objective", "about me", "professional summary"],
+    "education": ["education", "academic background", "academics", "academic details", "qualifications"],
+    "experience": ["experience", "work experience", "professional experience", "employment",
+                   "internship", "internships", "work history"],
+    "projects": ["projects", "academic projects", "personal projects", "key projects"],
+    "skills": ["skills", "technical skills", "technologies", "tech stack", "core competencies", "tools"],
+    "achievements": ["achievements", "awards", "honors", "honours", "accomplishments"],
+    "certifications": ["certifications", "certificates", "courses", "training"],
+    "activities": ["activities", "extracurricular activities", "positions of responsibility",
+                   "leadership", "volunteering"],
+}
+
+# Keyword -> patterns (regex, case-insensitive, whole words)
+KEYWORDS = {
+    "Python": [r"python"],
+    "Java": [r"java(?!\s*script)"],
+    "C++": [r"c\+\+", r"cpp"],
+    "JavaScript": [r"javascript", r"js", r"es6"],
+    "TypeScript": [r"typescript"],
+    "SQL": [r"sql", r"mysql", r"postgres(?:ql)?", r"sqlite"],
+    "NoSQL": [r"nosql", r"mongodb", r"firestore", r"redis", r"dynamodb"],
+    "Data Structures and Algorithms": [r"data structures?", r"algorithms?", r"dsa"],
+    "OOP": [r"oops?", r"object[- ]oriented"],
+    "Git / GitHub": [r"git", r"github", r"gitlab"],
+    "REST APIs": [r"rest(?:ful)?(?: apis?)?", r"apis?"],
+    "Flask / FastAPI": [r"flask", r"fastapi"],
+    "Django": [r"django"],
+    "Node.js": [r"node(?:\.?js)?", r"express(?:\.?js)?"],
+    "React": [r"react(?:\.?js)?"],
+    "Next.js": [r"next\.?js"],
+    "HTML / CSS": [r"html5?", r"css3?", r"tailwind(?:css)?"],
+    "Docker": [r"docker", r"containers?"],
+    "Kubernetes": [r"kubernetes", r"k8s"],
+    "AWS / Cloud": [r"aws", r"gcp", r"azure", r"google cloud", r"cloud"],
+    "CI/CD": [r"ci\s*/\s*cd", r"github actions", r"jenkins"],
+    "Linux": [r"linux", r"bash", r"shell scripting"],
+    "Testing": [r"unit tests?", r"testing", r"pytest", r"jest", r"junit"],
+    "System Design": [r"system design", r"microservices", r"distributed systems?"],
+    "Machine Learning": [r"machine learning", r"ml", r"scikit[- ]learn", r"sklearn"],
+    "Deep Learning": [r"deep learning", r"neural networks?", r"dl"],
+    "TensorFlow / Keras": [r"tensorflow", r"keras"],
+    "PyTorch": [r"pytorch", r"torch"],
+    "CNN": [r"cnns?", r"convolutional"],
+    "NLP": [r"nlp", r"natural language processing", r"transformers?", r"bert", r"llms?"],
+    "Computer Vision": [r"computer vision", r"opencv", r"image processing"],
+    "NumPy": [r"numpy"],
+    "Pandas": [r"pandas"],
+    "Model Accuracy (%)": [r"accuracy", r"precision", r"recall", r"f1(?:[- ]score)?", r"auc"],
+    "Deployment": [r"deploy(?:ed|ment|ing)?", r"production", r"hosted"],
+    "Data Visualization": [r"matplotlib", r"seaborn", r"tableau", r"power ?bi", r"visuali[sz]ation"],
+    "Excel": [r"excel", r"spreadsheets?"],
+    "Statistics": [r"statistics", r"statistical", r"hypothesis testing", r"regression"],
+    "ETL": [r"etl", r"data pipelines?", r"airflow", r"spark"],
+}
+
+# Role -> keywords a recruiter screens for, most important first
+ROLE_KEYWORDS = {
+    "Software Developer": [
+        "Data Structures and Algorithms", "OOP", "Java", "C++", "Python", "SQL", "Git / GitHub",
+        "REST APIs", "System Design", "Testing", "Linux", "Docker", "AWS / Cloud", "CI/CD",
+    ],
+    "ML Engineer": [
+        "Python", "Machine Learning", "Deep Learning", "TensorFlow / Keras", "PyTorch", "NumPy",
+        "Pandas", "Model Accuracy (%)", "CNN", "NLP", "Computer Vision", "SQL", "Git / GitHub",
+        "Deployment", "Flask / FastAPI", "AWS / Cloud",
+    ],
+    "Full Stack Web Developer": [
+        "JavaScript", "TypeScript", "React", "Next.js", "Node.js", "HTML / CSS", "REST APIs",
+        "SQL", "NoSQL", "Git / GitHub", "Deployment", "Docker", "AWS / Cloud", "Testing",
+    ],
+    "Data Analyst": [
+        "SQL", "Python", "Pandas", "NumPy", "Excel", "Statistics", "Data Visualization", "ETL",
+        "Machine Learning", "Git / GitHub",
+    ],
+}
+
+ACTION_VERBS = {
+    "achieved", "automated", "built", "created", "delivered", "deployed", "designed", "developed",
+    "engineered", "implemented", "improved", "increased", "launched", "led", "managed", "optimized",
+    "optimised", "reduced", "refactored", "scaled", "shipped", "streamlined", "trained", "migrated",
+    "architected", "integrated", "analyzed", "analysed", "collaborated", "mentored", "organized",
+}
+
+_KEYWORD_RES = {
+    name: re.compile(r"(?<![\w+#])(?:" + "|".join(patterns) + r")(?![\w+#])", re.IGNORECASE)
+    for name, patterns in KEYWORDS.items()
+}
+_HEADING_TO_SECTION = {
+    heading: section for section, headings in SECTION_HEADINGS.items() for heading in headings
+}
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE_RE = re.compile(r"(?:\+?\d[\d\s().-]{8,}\d)")
+_LINK_RE = re.compile(r"(?:https?://|www\.|github\.com|linkedin\.com)\S*", re.IGNORECASE)
+_METRIC_RE = re.compile(r"\d+(?:\.\d+)?\s*(?:%|\+|x\b|k\b|ms\b|users|students|images|records|"
+                        r"hours|days|members|requests|lpa|crore|lakh)|[$₹]\s?\d", re.IGNORECASE)
+_BULLET_RE = re.compile(r"^\s*(?:[•●▪◦‣∙·*\-–—]|\d+[.)])\s+")
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+# ─── Text extraction ──────────────────────────────────────────────────────────
+
+def _check_deadline(deadline):
+    if deadline is not None and time.monotonic() > deadline:
+        raise AnalysisTimeout("Resume analysis took too long")
+
+
+def _pdf_text(data: bytes, deadline) -> str:
+    from pypdf import PdfReader
+    from pypdf.errors import PdfReadError
+
+    try:
+        reader = PdfReader(io.BytesIO(data))
+        pages = []
+        for page in reader.pages[:RESUME_MAX_PAGES]:
+            _check_deadline(deadline)
+            pages.append(page.extract_text() or "")
+    except PdfReadError as e:
+        raise ResumeUnreadable(f"Could not read PDF: {e}")
+    return "\n".join(pages)
+
+
+def _docx_text(data: bytes) -> tuple:
+    """(text, uses_tables) from a .docx; paragraphs become lines."""
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            if archive.getinfo("word/document.xml").file_size > DOCX_MAX_XML_BYTES:
+                raise ResumeUnreadable("Could not read DOCX: document is too large")
+            # file_size comes from the archive itself; reads stop there, and a
+            # lie about it fails the CRC check (BadZipFile)
+            with archive.open("word/document.xml") as member:
+                xml = member.read(DOCX_MAX_XML_BYTES + 1)
+            if len(xml) > DOCX_MAX_XML_BYTES:
+                raise ResumeUnreadable("Could not read DOCX: document is too large")
+            root = ElementTree.fromstring(xml)
+    except (zipfile.BadZipFile, KeyError, ElementTree.ParseError, EOFError) as e:
+        raise ResumeUnreadable(f"Could not read DOCX: {e}")
+
+    lines = []
+    for paragraph in root.iter(f"{_W}p"):
+        parts = []
+        for node in paragraph.iter():
+            if node.tag == f"{_W}t" and node.text:
+                parts.append(node.text)
+            elif node.tag in (f"{_W}tab", f"{_W}br"):
+                parts.append(" ")
+        lines.append("".join(parts))
+    return "\n".join(lines), root.find(f".//{_W}tbl") is not None
+
+
+def extract_text(data: bytes, filename: str = "", deadline: float = None) -> tuple:
+    """(text, format, uses_tables) for a PDF, DOCX or plain-text resume."""
+    name = (filename or "").lower()
+    if data[:5] == b"%PDF-" or name.endswith(".pdf"):
+        return _pdf_text(data, deadline), "pdf", False
+    if data[:2] == b"PK" or name.endswith(".docx"):
+        text, tables = _docx_text(data)
+        return text, "docx", tables
+    if name.endswith((".txt", ".md")) or not name:
+        return data.decode("utf-8", errors="replace"), "text", False
+    raise ResumeUnreadable("Unsupported file type; upload a PDF or DOCX resume")
+
+
+# ─── Structure ────────────────────────────────────────────────────────────────
+
+def _heading(line: str):
+    cleaned = re.sub(r"[^a-z& ]", "", line.lower()).replace("&", "and").strip()
+    cleaned = re.sub(r"\s+", " ", cleaned)
+    if not cleaned or len(cleaned) > 40:
+        return None
+    return _HEADING_TO_SECTION.get(cleaned)
+
+
+def segment(text: str) -> dict:
+    """Section name -> list of lines; text before the first heading is "header"."""
+    sections = {"header": []}
+    current = "header"
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        section = _heading(line)
+        if section:
+            current = section
+            sections.setdefault(current, [])
+        else:
+            sections[current].append(line)
+    return sections
+
+
+def match_keywords(text: str) -> set:
+    return {name for name, pattern in _KEYWORD_RES.items() if pattern.search(text)}
+
+
+def _candidate_name(header: list) -> str:
+    for line in header[:5]:
+        line = line.split("|")[0].strip()
+        words = line.split()
+        if (2 <= len(words) <= 4 and not any(ch.isdigit() for ch in line)
+                and "@" not in line and all(w.replace(".", "").replace("-", "").isalpha() for w in words)):
+            return " ".join(w.capitalize() if w.isupper() else w for w in words)
+    return "Candidate"
+
+
+def _is_quantified(line: str) -> bool:
+    return bool(_METRIC_RE.search(line))
+
+
+def _starts_with_action(line: str) -> bool:
+    words = _BULLET_RE.sub("", line).split()
+    return bool(words) and words[0].lower().strip(",.:") in ACTION_VERBS
+
+
+def _entries(lines: list) -> list:
+    """Group a section's lines into entries: a title line followed by its bullets."""
+    entries = []
+    for line in lines:
+        is_bullet = bool(_BULLET_RE.match(line))
+        if not is_bullet and (not entries or entries[-1]["bullets"] or len(line.split()) <= 10):
+            entries.append({"title": line, "bullets": []})
+        elif entries:
+            entries[-1]["bullets"].append(_BULLET_RE.sub("", line))
+        else:
+            entries.append({"title": "", "bullets": [_BULLET_RE.sub("", line)]})
+    return entries
+
+
+def _clamp(value: float) -> int:
+    return int(max(0, min(100, round(value))))
+
+
+# ─── Review ───────────────────────────────────────────────────────────────────
+
+def _project_review(entry: dict) -> dict:
+    body = " ".join([entry["title"]] + entry["bullets"])
+    stack = match_keywords(body)
+    strengths, improvements = [], []
+    if stack:
+        strengths.append(f"Tech stack stated ({', '.join(sorted(stack)[:4])})")
+    else:
+        improvements.append("Name the languages and frameworks used")
+    if any(_is_quantified(b) for b in entry["bullets"]):
+        strengths.append("Results are quantified")
+    else:
+        improvements.append("Add measurable results (dataset size, accuracy, users, latency)")
+    if any(_starts_with_action(b) for b in entry["bullets"]):
+        strengths.append("Bullets lead with action verbs")
+    else:
+        improvements.append("Start bullets with action verbs (Built, Designed, Optimized)")
+    if _LINK_RE.search(body):
+        strengths.append("Project link included")
+    else:
+        improvements.append("Add a GitHub or live demo link")
+    if len(entry["bullets"]) < 2:
+        improvements.append("Describe your role and the problem solved in 2–3 bullets")
+    name = re.split(r"\s[|–—-]\s|\s\(|:", entry["title"])[0].strip() or "Project"
+    return {"name": name[:80], "strengths": strengths, "improvements": improvements}
+
+
+def _ats_check(check: str, ok, status_ok="Yes", status_bad="No", warn=False) -> dict:
+    if ok:
+        return {"check": check, "status": status_ok, "icon": "✅"}
+    return {"check": check, "status": status_bad, "icon": "⚠️" if warn else "❌"}
+
+
+def analyze(data: bytes, filename: str = "", deadline: float = None) -> dict:
+    """Score a resume; returns the `/analyze-resume` response body.
+
+    `deadline` is a `time.monotonic()` value after which the analysis gives
+    up with AnalysisTimeout.
+    """
+    text, file_format, uses_tables = extract_text(data, filename, deadline)
+    words = text.split()
+    if len(words) < 30:
+        raise ResumeUnreadable("No readable text found; upload a text-based PDF or DOCX, not a scan")
+    _check_deadline(deadline)
+
+    sections = segment(text)
+    found = match_keywords(text)
+
+    # Role: the dictionary with the most (importance-weighted) matches
+    def role_fit(role):
+        keywords = ROLE_KEYWORDS[role]
+        return sum(len(keywords) - i for i, k in enumerate(keywords) if k in found)
+    role = max(ROLE_KEYWORDS, key=role_fit)
+    role_keywords = ROLE_KEYWORDS[role]
+    strong = [k for k in role_keywords if k in found]
+    missing = [k for k in role_keywords if k not in found]
+    strong += sorted(found - set(role_keywords))[:max(0, 8 - len(strong))]
+
+    experience = _entries(sections.get("experience", []))
+    projects = _entries(sections.get("projects", []))
+    bullets = [b for e in experience + projects for b in e["bullets"]]
+    quantified = sum(_is_quantified(b) for b in bullets)
+    action_led = sum(_starts_with_action(b) for b in bullets)
+    has_email = bool(_EMAIL_RE.search(text))
+    has_phone = bool(_PHONE_RE.search(text))
+    has_links = bool(_LINK_RE.search(text))
+    core_sections = [s for s in ("education", "experience", "projects", "skills") if s in sections]
+    is_intern_level = not experience or all("intern" in e["title"].lower() for e in experience)
+
+    # ── Category scores ──
+    keyword_score = _clamp(100 * len(strong[:len(role_keywords)]) / (0.6 * len(role_keywords)))
+    technical_score = _clamp(30 + 4 * len(found) + 8 * min(len(projects), 3))
+    if bullets:
+        impact_score = _clamp(25 + 55 * quantified / len(bullets) + 20 * action_led / len(bullets))
+    else:
+        impact_score = 20
+    length_ok = 250 <= len(words) <= 1000
+    formatting_score = _clamp(
+        60 * len(core_sections) / 4
+        + (20 if bullets else 0)
+        + (20 if length_ok else 0)
+        - (10 if uses_tables else 0)
+    )
+    ats_score = _clamp(
+        40
+        + (15 if has_email else 0)
+        + (10 if has_phone else 0)
+        + 15 * len(core_sections) / 4
+        + (10 if file_format in ("pdf", "docx") else 0)
+        + (10 if not uses_tables else 0)
+    )
+    category_scores = [
+        {"name": "ATS Compatibility", "score": ats_score},
+        {"name": "Keyword Optimization", "score": keyword_score},
+        {"name": "Technical Strength", "score": technical_score},
+        {"name": "Impact & Metrics", "score": impact_score},
+        {"name": "Formatting & Structure", "score": formatting_score},
+    ]
+    weights = (0.25, 0.25, 0.2, 0.15, 0.15)
+    overall = _clamp(sum(w * c["score"] for w, c in zip(weights, category_scores)))
+
+    # ── Narrative ──
+    advice = {
+        "ATS Compatibility": "Use standard section headings and put your email and phone number at the top.",
+        "Keyword Optimization": f"Work in the {role} keywords you genuinely have, e.g. {', '.join(missing[:3]) or 'role-specific tools'}.",
+        "Technical Strength": "List more of your tools and frameworks and back each with a project.",
+        "Impact & Metrics": "Quantify your bullets (accuracy, users, latency, time saved) and lead with action verbs.",
+        "Formatting & Structure": "Keep Education, Experience, Projects and Skills as clear sections on 1–2 pages.",
+    }
+    weakest = min(category_scores, key=lambda c: c["score"])
+    recommendation = advice[weakest["name"]]
+
+    tech_strengths = []
+    if len(strong) >= len(role_keywords) // 2:
+        tech_strengths.append(f"Strong alignment with the {role} profile")
+    if sum(k in found for k in ("Python", "Java", "C++", "JavaScript", "TypeScript")) >= 2:
+        tech_strengths.append("Multi-language exposure")
+    if projects:
+        tech_strengths.append(f"{len(projects)} project{'s' if len(projects) != 1 else ''} listed")
+    if experience:
+        tech_strengths.append("Work or internship experience included")
+    tech_gaps = [f"No mention of {k}" for k in missing[:4]]
+
+    experience_points = []
+    if not experience:
+        experience_points.append("No experience or internship section found.")
+    else:
+        experience_points.append(f"{len(experience)} role{'s' if len(experience) != 1 else ''} listed.")
+        exp_bullets = [b for e in experience for b in e["bullets"]]
+        if exp_bullets:
+            share = sum(_is_quantified(b) for b in exp_bullets) / len(exp_bullets)
+            experience_points.append(
+                "Most bullets are quantified." if share >= 0.5 else
+                f"Only {round(100 * share)}% of bullets carry a measurable result.")
+        else:
+            experience_points.append("Roles have no bullet points describing the work.")
+    experience_recommendation = (
+        "Quantify each contribution and name the specific tools you used."
+        if quantified < max(1, len(bullets) // 2) else
+        "Keep leading with outcomes; trim bullets that do not show impact."
+    )
+
+    ats_formatting = [
+        _ats_check("Tables Used", not uses_tables, "No", "Yes"),
+        _ats_check("Clean Headings", len(core_sections) >= 3, "Yes", "Partial", warn=True),
+        _ats_check("Contact Info Proper", has_email and has_phone, "Yes",
+                   "Missing email" if not has_email else "Missing phone"),
+        _ats_check("Profile Links", has_links, "Yes", "None", warn=True),
+        _ats_check("Length", length_ok, "Good", "Too short" if len(words) < 250 else "Too long", warn=True),
+        _ats_check("File Format", file_format in ("pdf", "docx"), "Good", "Plain text", warn=True),
+    ]
+
+    return {
+        "score": overall,
+        "details": {
+            "candidate_name": _candidate_name(sections["header"]),
+            "role": f"Entry-Level {role} (Fresher)" if is_intern_level else role,
+            "category_scores": category_scores,
+            "keywords": {"strong": strong[:10], "missing": missing[:8]},
+            "recommendation": recommendation,
+            "technical_skills": {"strengths": tech_strengths, "gaps": tech_gaps},
+            "projects": [_project_review(p) for p in projects[:4] if p["title"] or p["bullets"]],
+            "experience_review": {"points": experience_points, "recommendation": experience_recommendation},
+            "ats_formatting": ats_formatting,
+        },
+    }
+
+
+def _warm_up():
+    import pypdf  # noqa: F401  (pay the import once per worker, not on the first upload)
+    return os.getpid()
+
+
+# ─── Process pool ─────────────────────────────────────────────────────────────
+
+class ResumeAnalyzerPool:
+    """Runs `analyze` in worker processes with a per-request deadline."""
+
+    def __init__(self, workers: int = RESUME_WORKERS, timeout: float = RESUME_ANALYSIS_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._executor is None:
+                self._start()
+
+    def _start(self):
+        # spawn, not fork: the parent holds gRPC/Firestore threads that must not be forked
+        self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        for _ in range(self.workers):
+            self._executor.submit(_warm_up)
+
+    def shutdown(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _reset(self, executor):
+        """Kill `executor`'s workers; the next call starts a new pool."""
+        with self._lock:
+            if self._executor is not executor:
+                return  # another request already replaced it
+            self._executor = None
+        # shutdown() alone waits for running tasks, which may never finish
+        for process in list((executor._processes or {}).values()):
+            process.kill()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    async def analyze(self, data: bytes, filename: str = "") -> dict:
+        """The analysis result; raises ResumeUnreadable, AnalysisTimeout or
+        AnalyzerUnavailable."""
+        started = time.monotonic()
+        # The worker checks the deadline between pages, so a stuck job frees its process
+        deadline = started + self.timeout
+        loop = asyncio.get_running_loop()
+        outcome = "error"
+        try:
+            self.start()
+            executor = self._executor
+            try:
+                future = loop.run_in_executor(executor, analyze, data, filename, deadline)
+                result = await asyncio.wait_for(future, max(0.0, deadline - time.monotonic()))
+                outcome = "ok"
+                return result
+            except AnalysisTimeout:
+                # Raised by the worker between pages; its process is free again
+                outcome = "timeout"
+                raise
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                # The worker may be stuck inside one page and never come back
+                self._reset(executor)
+                raise AnalysisTimeout("Resume analysis took too long")
+            except BrokenProcessPool:
+                # Not retried: this input may be the one that crashed the worker
+                outcome = "crashed"
+                self._reset(executor)
+                raise AnalyzerUnavailable("Resume analysis is unavailable right now, please try again")
+        finally:
+            RESUME_DURATION.observe(time.monotonic() - started, outcome=outcome)
@@ -0,0 +1,84 @@
+"""
+resume_cache.py — Resume analyses cached by content hash
+
+Students re-upload the same file many times while iterating on the career
+page. Results are keyed by the SHA-256 of the upload (plus the analyzer
+version, so changing the dictionaries or scoring invalidates old entries),
+kept in an in-memory LRU and, when RESUME_CACHE_DIR is set, also written as
+one JSON file per resume so they survive restarts and are shared by workers
+on the same host.
+"""
+
+import json
+import os
+import tempfile
+import threading
+
+from resume_analyzer import ANALYZER_VERSION
+from ttl_cache import TTLCache
+
+RESUME_CACHE_SIZE = int(os.getenv("RESUME_CACHE_SIZE", "512"))
+RESUME_CACHE_TTL = float(os.getenv("RESUME_CACHE_TTL", str(30 * 24 * 3600)))
+RESUME_CACHE_DIR = os.getenv("RESUME_CACHE_DIR", "")
+
+
+class ResumeCache:
+    def __init__(self, maxsize: int = RESUME_CACHE_SIZE, ttl: float = RESUME_CACHE_TTL,
+                 directory: str = RESUME_CACHE_DIR):
+        self.memory = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.directory = directory
+        self._lock = threading.Lock()
+        self.disk_hits = 0
+
+    def _key(self, digest: str) -> str:
+        return f"v{ANALYZER_VERSION}-{digest}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, digest: str):
+        """The cached analysis for this content hash, or None."""
+        key = self._key(digest)
+        result = self.memory.get(key)
+        if result is not None or not self.directory:
+            return result
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"⚠️  Could not read cached resume analysis {key}: {e}")
+            return None
+        self.memory.set(key, result)
+        with self._lock:
+            self.disk_hits += 1
+        return result
+
+    def set(self, digest: str, result: dict):
+        key = self._key(digest)
+        self.memory.set(key, result)
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Write-then-rename so concurrent workers never read a partial file
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(result, f)
+                os.replace(tmp, self._path(key))
+            except BaseException:
+                os.unlink(tmp)
+                raise
+        except Exception as e:
+            print(f"⚠️  Could not write cached resume analysis {key}: {e}")
+
+    def stats(self) -> dict:
+        stats = self.memory.stats()
+        # A disk hit first counted as a memory miss
+        hits = stats["hits"] + self.disk_hits
+        misses = stats["misses"] - self.disk_hits
+        total = hits + misses
+        return {**stats, "hits": hits, "misses": misses, "disk_hits": self.disk_hits,
+                "hit_rate": round(hits / total, 4) if total else 0.0}
@@ -0,0 +1,105 @@
+"""
+risk.py — Vectorized academic risk scoring
+
+Scores whole cohorts at once with NumPy: attendance and marks are clamped to
+0–100, assigned a risk tier (High / Medium / Low) against the thresholds in
+the `system/settings` document, and mapped to a predicted CGPA. `/predict`
+and `/predict/batch` both go through `score`, so single and batch results
+always agree. `at_risk` is the rule behind the stored
+`academic_stats.risk_status` (see risk_recompute.py).
+"""
+
+import csv
+import io
+
+import numpy as np
+
+RISK_LEVELS = np.array(["Low", "Medium", "High"])
+
+# Settings keys (with defaults) that drive the risk tiers
+THRESHOLD_DEFAULTS = {
+    "attendance_threshold": 75,         # High risk below this attendance...
+    "marks_threshold": 50,              # ...or below these marks
+    "medium_attendance_threshold": 85,  # Medium risk below this attendance...
+    "medium_marks_threshold": 70,       # ...or below these marks
+}
+
+
+# Stored academic_stats.risk_status values, indexed by at_risk()
+RISK_STATUSES = np.array(["Safe", "At Risk"])
+
+
+class InvalidBatch(ValueError):
+    pass
+
+
+def thresholds(settings: dict) -> dict:
+    """The risk thresholds from a settings dict, falling back to the defaults."""
+    return {key: float(settings.get(key, default)) for key, default in THRESHOLD_DEFAULTS.items()}
+
+
+def score(attendance, marks, limits: dict) -> dict:
+    """Risk tiers and predicted CGPA for equally long sequences of scores.
+
+    Returns numpy arrays: clamped `attendance` and `marks`, `risk_index`
+    (0 = Low, 1 = Medium, 2 = High, indexing RISK_LEVELS) and `predicted_cgpa`.
+    """
+    attendance = np.clip(np.asarray(attendance, dtype=np.float64), 0, 100)
+    marks = np.clip(np.asarray(marks, dtype=np.float64), 0, 100)
+    if attendance.shape != marks.shape or attendance.ndim != 1:
+        raise InvalidBatch("attendance and marks must be flat lists of the same length")
+    if not (np.isfinite(attendance).all() and np.isfinite(marks).all()):
+        raise InvalidBatch("attendance and marks must be numbers")
+
+    high = (attendance < limits["attendance_threshold"]) | (marks < limits["marks_threshold"])
+    medium = (attendance < limits["medium_attendance_threshold"]) | (marks < limits["medium_marks_threshold"])
+    risk_index = np.where(high, 2, np.where(medium, 1, 0))
+
+    predicted_cgpa = np.clip(np.round((attendance * 0.03 + marks * 0.07) * 0.1 * 10, 2), 0.0, 10.0)
+    return {
+        "attendance": attendance,
+        "marks": marks,
+        "risk_index": risk_index,
+        "predicted_cgpa": predicted_cgpa,
+    }
+
+
+def at_risk(attendance, cgpa, settings: dict):
+    """True where attendance or CGPA is below the admin thresholds
+    (`attendance_threshold` / `cgpa_threshold`); works on scalars or arrays."""
+    attendance = np.asarray(attendance, dtype=np.float64)
+    cgpa = np.asarray(cgpa, dtype=np.float64)
+    return (attendance < float(settings["attendance_threshold"])) | (cgpa < float(settings["cgpa_threshold"]))
+
+
+def summarize(risk_index) -> dict:
+    counts = np.bincount(risk_index, minlength=len(RISK_LEVELS))
+    return {level: int(n) for level, n in zip(RISK_LEVELS.tolist(), counts)}
+
+
+def parse_csv(data: bytes):
+    """(ids or None, attendance, marks) from CSV with a header row.
+
+    Needs `attendance` and `marks` columns; an `id`, `student_id` or `uid`
+    column is passed through to the response.
+    """
+    text = data.decode("utf-8-sig")
+    reader = csv.reader(io.StringIO(text))
+    try:
+        header = [h.strip().lower() for h in next(reader)]
+    except StopIteration:
+        raise InvalidBatch("CSV is empty")
+    try:
+        a_col, m_col = header.index("attendance"), header.index("marks")
+    except ValueError:
+        raise InvalidBatch("CSV needs 'attendance' and 'marks' columns")
+    id_col = next((header.index(c) for c in ("id", "student_id", "uid") if c in header), None)
+
+    rows = [row for row in reader if row]
+    try:
+        attendance = np.array([row[a_col] for row in rows], dtype=np.float64)
+        marks = np.array([row[m_col] for row in rows], dtype=np.float64)
+    except (IndexError, ValueError):
+        raise InvalidBatch("CSV rows must have numeric attendance and marks")
+    ids = [row[id_col] for row in rows] if id_col is not None else None
+    return ids, attendance, marks
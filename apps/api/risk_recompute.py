@@ -0,0 +1,126 @@
+"""
+risk_recompute.py — Re-derive every student's stored risk_status
+
+`academic_stats.risk_status` is computed when a profile is saved, so it goes
+stale when an admin changes `attendance_threshold` / `cgpa_threshold`. This
+job (kind "risk_recompute", run by jobs.JobRunner) pages through all student
+documents by id, evaluates the thresholds for a whole page at once with
+NumPy, and writes back only the statuses that changed through a throttled
+BulkWriter. The page cursor is checkpointed after each page's writes are
+flushed, so a resumed job continues where the last one stopped.
+
+BulkWriter does not raise when a write fails; it reports it to
+`on_write_error` after retrying. The job counts confirmed writes and
+failures, and only checkpoints a page once all of its writes landed. If any
+failed, the job fails at that page, and resuming it redoes the page.
+"""
+
+import os
+import threading
+
+import numpy as np
+from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions
+
+import risk
+from pagination import paginate
+
+RISK_RECOMPUTE_PAGE_SIZE = int(os.getenv("RISK_RECOMPUTE_PAGE_SIZE", "500"))
+RISK_RECOMPUTE_MAX_OPS_PER_SECOND = int(os.getenv("RISK_RECOMPUTE_MAX_OPS_PER_SECOND", "500"))
+
+JOB_KIND = "risk_recompute"
+
+# Attempts per write before BulkWriter gives up on it (its own default)
+_MAX_WRITE_ATTEMPTS = 15
+
+
+class RecomputeIncomplete(Exception):
+    pass
+
+
+def _stat(stats: dict, *keys):
+    for key in keys:
+        value = stats.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    return np.nan
+
+
+def recompute_page(snaps, settings: dict):
+    """[(reference, new_status)] for the students in `snaps` whose status changes.
+
+    Students without numeric attendance and CGPA are left alone.
+    """
+    stats = [(s.to_dict() or {}).get("academic_stats") or {} for s in snaps]
+    attendance = np.array([_stat(st, "attendance_percent", "attendance") for st in stats])
+    cgpa = np.array([_stat(st, "cgpa") for st in stats])
+    known = ~(np.isnan(attendance) | np.isnan(cgpa))
+
+    statuses = risk.RISK_STATUSES[risk.at_risk(attendance, cgpa, settings).astype(int)]
+    current = np.array([st.get("risk_status", st.get("status")) for st in stats], dtype=object)
+    changed = np.flatnonzero(known & (current != statuses))
+    return [(snaps[i].reference, str(statuses[i])) for i in changed]
+
+
+def make_job(db, page_size: int = RISK_RECOMPUTE_PAGE_SIZE,
+             max_ops_per_second: int = RISK_RECOMPUTE_MAX_OPS_PER_SECOND):
+    """The job function to register with JobRunner under JOB_KIND.
+
+    Job params: `attendance_threshold` and `cgpa_threshold` to apply.
+    """
+    def recompute_risk_statuses(job):
+        settings = job.params
+        processed = job.state.get("processed", 0)
+        changed = job.state.get("changed", 0)
+        if job.state.get("total") is None:
+            students = db.collection("users").where("role", "==", "student")
+            job.checkpoint(total=students.count().get()[0][0].value, processed=0, changed=0)
+
+        writer = db.bulk_writer(options=BulkWriterOptions(
+            initial_ops_per_second=min(max_ops_per_second, 500),
+            max_ops_per_second=max_ops_per_second,
+        ))
+        landed, failures = [0], []
+        lock = threading.Lock()  # BulkWriter may call back from its sender threads
+
+        def on_write_result(reference, result, bulk_writer):
+            with lock:
+                landed[0] += 1
+
+        def on_write_error(error, bulk_writer) -> bool:
+            if error.attempts < _MAX_WRITE_ATTEMPTS:
+                return True
+            with lock:
+                failures.append(f"{error.operation.reference.path}: {error.message}")
+            return False
+
+        writer.on_write_result(on_write_result)
+        writer.on_write_error(on_write_error)
+        cursor = job.cursor
+        try:
+            while not job.cancelled:
+                snaps, next_cursor = paginate(
+                    db.collection("users").where("role", "==", "student"),
+                    page_size=page_size, cursor=cursor, fields=["academic_stats"],
+                )
+                updates = recompute_page(snaps, settings)
+                landed[0] = 0
+                for ref, status in updates:
+                    writer.update(ref, {"academic_stats.risk_status": status})
+                # Only move the cursor once this page's writes have landed
+                writer.flush()
+                if failures or landed[0] != len(updates):
+                    job.checkpoint(failed_writes=failures[:20])
+                    raise RecomputeIncomplete(
+                        f"{len(updates) - landed[0]} of {len(updates)} status writes failed on this page; "
+                        "resume the job to retry it")
+                processed += len(snaps)
+                changed += len(updates)
+                cursor = next_cursor
+                job.checkpoint(cursor=cursor, processed=processed, changed=changed)
+                if cursor is None:
+                    break
+        finally:
+            writer.close()
+        return {"processed": processed, "changed": changed}
+
+    return recompute_risk_statuses
@@ -0,0 +1,127 @@
+"""
+settings_cache.py — Process-local cache for the `system/settings` document
+
+Every worker keeps its own copy of the settings document. A Firestore
+`on_snapshot` listener pushes changes as soon as they happen, and the TTL is
+the upper bound on staleness if the listener is down (e.g. a dropped stream).
+`on_change` is called after each snapshot the listener delivers.
+"""
+
+import os
+import threading
+import time
+
+from google.cloud.firestore_v1.transforms import Sentinel
+
+DEFAULT_SETTINGS = {
+    "maintenance_mode": False,
+    "exam_mode": False,
+    "attendance_threshold": 75,
+    "cgpa_threshold": 5.0,
+    # Risk tiers used by /predict and /predict/batch (see risk.py)
+    "marks_threshold": 50,
+    "medium_attendance_threshold": 85,
+    "medium_marks_threshold": 70,
+}
+
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", "30"))
+
+
+class SettingsCache:
+    def __init__(self, db, ttl: float = SETTINGS_CACHE_TTL, on_change=None):
+        self._db = db
+        self._on_change = on_change
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._settings = None
+        self._exists = False
+        self._loaded_at = 0.0
+        self._watch = None
+
+    @property
+    def _ref(self):
+        return self._db.collection("system").document("settings")
+
+    @property
+    def loaded(self) -> bool:
+        return self._settings is not None
+
+    # ── Listener ─────────────────────────────────────────────────────────────
+
+    def start(self):
+        """Subscribe to live updates of the settings document."""
+        if self._watch is not None:
+            return
+        try:
+            self._watch = self._ref.on_snapshot(self._on_snapshot)
+        except Exception as e:
+            print(f"⚠️  Settings listener not started, falling back to TTL: {e}")
+
+    def stop(self):
+        if self._watch is not None:
+            try:
+                self._watch.unsubscribe()
+            except Exception:
+                pass
+            self._watch = None
+
+    def _on_snapshot(self, doc_snapshots, changes, read_time):
+        for doc in doc_snapshots:
+            self._store(doc.to_dict() if doc.exists else None)
+        # e.g. drop cached /admin/settings responses written by another worker
+        if self._on_change is not None:
+            self._on_change()
+
+    # ── Reads ────────────────────────────────────────────────────────────────
+
+    def _store(self, data):
+        with self._lock:
+            self._exists = data is not None
+            self._settings = dict(data or {})
+            self._loaded_at = time.monotonic()
+
+    def _refresh(self):
+        doc = self._ref.get()
+        self._store(doc.to_dict() if doc.exists else None)
+
+    def _ensure_fresh(self):
+        if self._settings is None or time.monotonic() - self._loaded_at > self._ttl:
+            try:
+                self._refresh()
+            except Exception as e:
+                # Keep serving the last known copy (or defaults) on a DB error
+                print(f"⚠️  Settings refresh failed: {e}")
+                if self._settings is None:
+                    return False
+        return self._exists
+
+    def get_all(self) -> dict:
+        """Settings merged over the defaults."""
+        self._ensure_fresh()
+        with self._lock:
+            return {**DEFAULT_SETTINGS, **(self._settings or {})}
+
+    def get_stored(self):
+        """The raw document, or None if it has never been written."""
+        if not self._ensure_fresh():
+            return None
+        with self._lock:
+            return dict(self._settings)
+
+    def get(self, key: str, default=None):
+        return self.get_all().get(key, default)
+
+    # ── Writes ───────────────────────────────────────────────────────────────
+
+    def update(self, values: dict):
+        """Write-through: persist to Firestore, then update the local copy."""
+        self._ref.set(values, merge=True)
+        # Server-side sentinels (e.g. SERVER_TIMESTAMP) arrive via the listener
+        local = {k: v for k, v in values.items() if not isinstance(v, Sentinel)}
+        with self._lock:
+            merged = {**(self._settings or {}), **local}
+        self._store(merged)
+
+    def invalidate(self):
+        with self._lock:
+            self._loaded_at = 0.0
@@ -0,0 +1,133 @@
+"""
+startup.py — Background warm-up, health/readiness state and an import-time report
+
+The FastAPI lifespan is the only startup path. It hands a list of named
+warm-up steps (connect to Firestore, start the settings listener, build the
+fuzzy indexes, create the Gemini client, spawn the resume workers) to
+`Warmup`. The steps run in a background thread, so uvicorn starts accepting
+connections (and `/healthz` answers) straight away. `/readyz` reports 503
+until the required steps have finished and Firestore answers a read.
+
+`python startup.py` imports main.py under `python -X importtime` in a fresh
+interpreter and prints how long each of main's direct imports took.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# Seconds a readiness check result is reused, so frequent probes cost one read
+READY_CHECK_INTERVAL = float(os.getenv("READY_CHECK_INTERVAL", "5"))
+
+# Imported first by main.py, so this is (almost) when main started importing
+IMPORT_STARTED = time.perf_counter()
+
+
+class Warmup:
+    def __init__(self):
+        self.import_seconds = None
+        self.steps = {}  # name -> {"status", "seconds", "error"}
+        self.required = set()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._check = None  # (checked_at, ok, error)
+
+    def imported(self):
+        """Record how long importing main.py took."""
+        self.import_seconds = round(time.perf_counter() - IMPORT_STARTED, 4)
+
+    # ── Warm-up ──────────────────────────────────────────────────────────────
+
+    def start(self, steps, required=()):
+        """Run `steps` ((name, fn) pairs) in order on a background thread."""
+        self.required = set(required)
+        for name, _ in steps:
+            self.steps[name] = {"status": "pending", "seconds": None, "error": None}
+        self._thread = threading.Thread(target=self._run, args=(steps,),
+                                        name="warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self, steps):
+        for name, fn in steps:
+            started = time.perf_counter()
+            try:
+                fn()
+                status, error = "ok", None
+            except Exception as e:
+                # A failed step is retried on first use by the component itself
+                print(f"⚠️  Warm-up step {name} failed: {e}")
+                status, error = "failed", str(e)
+            with self._lock:
+                self.steps[name] = {"status": status,
+                                    "seconds": round(time.perf_counter() - started, 4),
+                                    "error": error}
+
+    def join(self, timeout: float = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def warm(self) -> bool:
+        with self._lock:
+            return all(self.steps.get(name, {}).get("status") == "ok" for name in self.required)
+
+    # ── Probes ───────────────────────────────────────────────────────────────
+
+    def check(self, probe) -> tuple:
+        """(ok, error) of `probe()`, reused for READY_CHECK_INTERVAL seconds."""
+        now = time.monotonic()
+        cached = self._check
+        if cached is not None and now - cached[0] < READY_CHECK_INTERVAL:
+            return cached[1], cached[2]
+        try:
+            probe()
+            ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        self._check = (now, ok, error)
+        return ok, error
+
+    def report(self) -> dict:
+        with self._lock:
+            return {"import_seconds": self.import_seconds,
+                    "steps": {name: dict(step) for name, step in self.steps.items()}}
+
+
+# ─── Import-time report ───────────────────────────────────────────────────────
+
+def import_times(module: str = "main") -> list:
+    """(name, cumulative seconds) for each direct import of `module`, slowest first."""
+    env = {**os.environ, "DATASTORE_BACKEND": os.getenv("DATASTORE_BACKEND", "memory")}
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, env=env,
+                          cwd=os.path.dirname(os.path.abspath(__file__)))
+    # Lines look like "import time:   self [us] | cumulative | <indent>name",
+    # children before their parent; depth is the indent in pairs of spaces
+    rows, depth_of_module = [], None
+    for line in reversed(proc.stderr.splitlines()):
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        name = name.strip()
+        if name == module:
+            depth_of_module = depth
+            rows.append((name, int(cumulative) / 1e6))
+        elif depth_of_module is not None:
+            if depth <= depth_of_module:
+                break
+            if depth == depth_of_module + 1:
+                rows.append((name, int(cumulative) / 1e6))
+    return sorted(rows, key=lambda row: row[1], reverse=True)
+
+
+if __name__ == "__main__":
+    rows = import_times()
+    if not rows:
+        sys.exit("import failed; run `python -c 'import main'` to see the error")
+    total = rows[0][1]
+    print(f"{'module':<32} {'seconds':>8} {'share':>6}")
+    for name, seconds in rows:
+        print(f"{name:<32} {seconds:>8.3f} {seconds / total:>6.0%}")
@@ -0,0 +1,101 @@
+"""
+uploads.py — Bounded, hashed reads of uploaded files
+
+`read_upload` pulls an `UploadFile` in fixed-size chunks, hashing with
+SHA-256 as it goes and giving up as soon as the size cap is passed, so the
+content hash is ready without a second pass over the data.
+
+`UploadSizeLimitMiddleware` protects upload routes before the multipart body
+is parsed: a request whose Content-Length is over the route's limit is
+answered with 413 without reading it, and a chunked body is cut off with 413
+as soon as it passes the limit.
+"""
+
+import hashlib
+
+from starlette.responses import JSONResponse
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Room for multipart boundaries and part headers on top of the file itself
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+class UploadTooLarge(ValueError):
+    def __init__(self, limit: int):
+        super().__init__(f"File is larger than the {_describe(limit)} limit")
+        self.limit = limit
+
+
+async def read_upload(file, max_bytes: int, chunk_size: int = UPLOAD_CHUNK_SIZE) -> tuple:
+    """(data, sha256 hex digest) of an UploadFile; raises UploadTooLarge past `max_bytes`."""
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLarge(max_bytes)
+    digest = hashlib.sha256()
+    data = bytearray()
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        if len(data) + len(chunk) > max_bytes:
+            raise UploadTooLarge(max_bytes)
+        digest.update(chunk)
+        data.extend(chunk)
+    return bytes(data), digest.hexdigest()
+
+
+def _describe(limit: int) -> str:
+    if limit >= 1024 * 1024:
+        return f"{limit / (1024 * 1024):.0f} MB"
+    return f"{max(1, limit // 1024)} KB"
+
+
+class UploadSizeLimitMiddleware:
+    """ASGI middleware capping request bodies for selected paths.
+
+    `limits` maps a request path to the largest file (in bytes) it accepts.
+    """
+
+    def __init__(self, app, limits: dict):
+        self.app = app
+        self.limits = {path: size + MULTIPART_OVERHEAD for path, size in limits.items()}
+
+    def _response(self, limit: int):
+        message = str(UploadTooLarge(limit - MULTIPART_OVERHEAD))
+        return JSONResponse({"status": "error", "message": message}, status_code=413)
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                if value.isdigit() and int(value) > limit:
+                    await self._response(limit)(scope, receive, send)
+                    return
+                break
+
+        # Chunked bodies: once past the limit, end the body early (the parser
+        # fails on the truncated form) and answer 413 instead of its response.
+        state = {"received": 0, "too_large": False}
+
+        async def limited_receive():
+            if state["too_large"]:
+                return {"type": "http.request", "body": b"", "more_body": False}
+            message = await receive()
+            if message["type"] == "http.request":
+                state["received"] += len(message.get("body", b""))
+                if state["received"] > limit:
+                    state["too_large"] = True
+                    return {"type": "http.request", "body": b"", "more_body": False}
+            return message
+
+        async def limited_send(message):
+            if not state["too_large"]:
+                await send(message)
+            elif message["type"] == "http.response.start":
+                await self._response(limit)(scope, receive, send)
+
+        await self.app(scope, limited_receive, limited_send)
@@ -3,6 +3,7 @@
 import { useState, useEffect } from "react";
 import { Plus, BookOpen, User } from "lucide-react";
 import { useAuth } from "../../../context/AuthContext";
+import { fetchAllPages, withCursor } from "../../../lib/pagination";
 
 const API_BASE = "https://manan-383u.onrender.com";
 
@@ -21,8 +22,10 @@ export default function AdminCoursesPage() {
     const fetchCourses = async () => {
         setLoading(true);
         try {
-            const res = await fetch(`${API_BASE}/courses`);
-            const data = await res.json();
+            const data = await fetchAllPages(async (cursor) => {
+                const res = await fetch(withCursor(`${API_BASE}/courses`, cursor));
+                return res.json();
+            }, "courses");
             if (data.courses) {
                 setCourses(data.courses);
             }
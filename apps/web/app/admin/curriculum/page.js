@@ -3,6 +3,7 @@
 import { Book, FileUp, MoreVertical, TrendingUp, AlertTriangle, CheckCircle } from "lucide-react";
 import { useState, useEffect } from "react";
 import { useAuth } from "../../../context/AuthContext";
+import { fetchAllPages, withCursor } from "../../../lib/pagination";
 
 export default function CurriculumPage() {
     const [courses, setCourses] = useState([]);
@@ -11,8 +12,8 @@ export default function CurriculumPage() {
 
     useEffect(() => {
         if (user) {
-            fetch("https://manan-383u.onrender.com/courses")
-                .then(res => res.json())
+            fetchAllPages(cursor => fetch(withCursor("https://manan-383u.onrender.com/courses", cursor))
+                .then(res => res.json()), "courses")
                 .then(data => {
                     if (data.courses) {
                          const mapped = data.courses.map(c => ({
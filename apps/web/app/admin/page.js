@@ -4,6 +4,7 @@ import { useState, useEffect } from "react";
 import { Users, AlertCircle, HelpCircle, Send, TrendingUp, AlertTriangle, BookOpen, GraduationCap, CheckCircle, Clock, MessageCircle, Bell } from "lucide-react";
 import { BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, ResponsiveContainer, Cell } from 'recharts';
 import { useAuth } from "../../context/AuthContext";
+import { fetchAllPages } from "../../lib/pagination";
 
 const API_BASE = "https://manan-383u.onrender.com";
 
@@ -67,12 +68,14 @@ export default function AdminDashboardPage() {
         setLoadingDoubts(true);
         try {
             const token = await user.getIdToken();
-            const res = await fetch(`${API_BASE}/admin/doubts`, {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({ token, teacher_id: user.uid })
-            });
-            const data = await res.json();
+            const data = await fetchAllPages(async (cursor) => {
+                const res = await fetch(`${API_BASE}/admin/doubts`, {
+                    method: "POST",
+                    headers: { "Content-Type": "application/json" },
+                    body: JSON.stringify({ token, teacher_id: user.uid, cursor })
+                });
+                return res.json();
+            }, "doubts");
             if (data.status === "success") {
                 setRecentDoubts(data.doubts || []);
             }
@@ -147,12 +150,14 @@ export default function AdminDashboardPage() {
         setLoadingStudents(true);
         try {
             const token = await user.getIdToken();
-            const res = await fetch(`${API_BASE}/admin/students`, {
-                method: "POST",
-                headers: { "Content-Type": "application/json" },
-                body: JSON.stringify({ token })
-            });
-            const data = await res.json();
+            const data = await fetchAllPages(async (cursor) => {
+                const res = await fetch(`${API_BASE}/admin/students`, {
+                    method: "POST",
+                    headers: { "Content-Type": "application/json" },
+                    body: JSON.stringify({ token, cursor })
+                });
+                return res.json();
+            }, "students");
             if (data.status === "success") {
                 setStudents(data.students || []);
             }
@@ -3,6 +3,7 @@
 import { useState, useEffect } from "react";
 import { useParams, useRouter } from "next/navigation";
 import { useAuth } from "../../../../context/AuthContext";
+import { fetchAllPages, withCursor } from "../../../../lib/pagination";
 import { BookOpen, FileText, ArrowLeft, HelpCircle, Send, CheckCircle, Clock, X, MessageCircle } from "lucide-react";
 
 const API_BASE = "https://manan-383u.onrender.com";
@@ -38,17 +39,9 @@ export default function CourseDetailPage() {
             if (data.status === "success" && data.course) {
                 setCourse(data.course);
             } else {
-                // Fallback: try fetching from /courses list
-                const listRes = await fetch(`${API_BASE}/courses`);
-                const listData = await listRes.json();
-                if (listData.courses) {
-                    const found = listData.courses.find(c => c.id === id);
-                    if (found) setCourse(found);
-                    else {
-                        alert("Course not found");
-                        router.push("/dashboard/courses");
-                    }
-                }
+                // /courses/{id} reads the same document the list does, so there is nothing to fall back to
+                alert("Course not found");
+                router.push("/dashboard/courses");
             }
         } catch (error) {
             console.error("Error fetching course:", error);
@@ -61,8 +54,10 @@ export default function CourseDetailPage() {
         if (!user) return;
         setLoadingDoubts(true);
         try {
-            const res = await fetch(`${API_BASE}/courses/${id}/doubts?student_id=${user.uid}`);
-            const data = await res.json();
+            const data = await fetchAllPages(async (cursor) => {
+                const res = await fetch(withCursor(`${API_BASE}/courses/${id}/doubts?student_id=${user.uid}`, cursor));
+                return res.json();
+            }, "doubts");
             if (data.status === "success") {
                 setMyDoubts(data.doubts || []);
             }
@@ -3,6 +3,7 @@
 import { useState, useEffect } from "react";
 import { BookOpen, PlayCircle, Clock, Calendar, CheckCircle, ArrowRight, X } from "lucide-react";
 import { useAuth } from "../../../context/AuthContext";
+import { fetchAllPages, withCursor } from "../../../lib/pagination";
 
 const API_BASE = "https://manan-383u.onrender.com";
 
@@ -63,8 +64,10 @@ export default function CoursesPage() {
 
     const fetchCourses = async () => {
         try {
-            const res = await fetch(`${API_BASE}/courses`);
-            const data = await res.json();
+            const data = await fetchAllPages(async (cursor) => {
+                const res = await fetch(withCursor(`${API_BASE}/courses`, cursor));
+                return res.json();
+            }, "courses");
             if (data.courses) {
                 setCourses(data.courses);
             }
@@ -2,10 +2,12 @@
 
 import { useState, useEffect, useRef } from "react";
 import { TrendingUp, AlertTriangle, CheckCircle, Clock, Loader2, ArrowRight } from "lucide-react";
+import { useAuth } from "../../context/AuthContext";
 
 const API_BASE = "https://manan-383u.onrender.com";
 
 export default function DashboardPage() {
+    const { user } = useAuth();
     // --- Widget A: Academic Predictor State ---
     const [attendance, setAttendance] = useState(85);
     const [cgpa, setCgpa] = useState(8.0);
@@ -53,9 +55,11 @@ export default function DashboardPage() {
     const [notifsLoading, setNotifsLoading] = useState(true);
 
     useEffect(() => {
+        if (!user) return;
         const fetchNotifications = async () => {
             try {
-                const res = await fetch(`${API_BASE}/notifications?limit=10`);
+                const token = await user.getIdToken();
+                const res = await fetch(`${API_BASE}/notifications?limit=10&token=${encodeURIComponent(token)}`);
                 const data = await res.json();
                 if (data.status === "success" && data.notifications) {
                     setNotifications(data.notifications.map(n => ({
@@ -72,7 +76,7 @@ export default function DashboardPage() {
             }
         };
         fetchNotifications();
-    }, []);
+    }, [user]);
 
     const getRelativeTime = (isoStr) => {
         if (!isoStr) return "";
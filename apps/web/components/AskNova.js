@@ -32,7 +32,7 @@ export default function AskManan() {
     setLoading(true);
 
     try {
-      const response = await fetch("https://manan-383u.onrender.com/solve-doubt", {
+      const response = await fetch("https://manan-383u.onrender.com/solve-doubt/stream", {
         method: "POST",
         headers: {
           "Content-Type": "application/json",
@@ -43,19 +43,44 @@ export default function AskManan() {
         }),
       });
 
-      if (!response.ok) {
+      if (!response.ok || !response.body) {
         throw new Error("Failed to fetch response");
       }
 
-      const data = await response.json();
-
-      const aiMessage = {
-        role: 'ai',
-        text: data.answer,
-        sources: data.citations || []
-      };
-
-      setMessages((prev) => [...prev, aiMessage]);
+      // Append an empty AI message and grow it as chunks arrive
+      setMessages((prev) => [...prev, { role: 'ai', text: "", sources: [] }]);
+      const updateLast = (fn) =>
+        setMessages((prev) => [...prev.slice(0, -1), fn(prev[prev.length - 1])]);
+
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        // Server-Sent Events are separated by a blank line
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+
+        for (const raw of events) {
+          const event = raw.match(/^event: (.*)$/m)?.[1];
+          const dataLine = raw.match(/^data: (.*)$/m)?.[1];
+          if (!event || !dataLine) continue;
+          const data = JSON.parse(dataLine);
+
+          if (event === "chunk") {
+            updateLast((msg) => ({ ...msg, text: msg.text + data.text }));
+          } else if (event === "done") {
+            updateLast((msg) => ({ ...msg, sources: data.citations || [] }));
+          } else if (event === "error") {
+            updateLast((msg) => ({ ...msg, text: data.message }));
+          }
+        }
+        setLoading(false);
+      }
     } catch (error) {
       console.error("Error asking Manan:", error);
       const errorMessage = {
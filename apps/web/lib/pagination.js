@@ -0,0 +1,26 @@
+// List endpoints (/courses, /courses/{id}/doubts, /admin/students, /admin/doubts)
+// return one page at a time plus a `next_cursor`. fetchAllPages follows the
+// cursors and returns the first page's response with `key` holding every item.
+//
+// fetchPage(cursor) must request the page after `cursor` (undefined for the
+// first) and resolve to the parsed JSON body.
+export async function fetchAllPages(fetchPage, key) {
+    let data = await fetchPage(undefined);
+    if (!Array.isArray(data[key])) return data;
+
+    const items = [...data[key]];
+    let cursor = data.next_cursor;
+    while (cursor) {
+        const page = await fetchPage(cursor);
+        if (!Array.isArray(page[key])) return page;
+        items.push(...page[key]);
+        cursor = page.next_cursor;
+    }
+    return { ...data, [key]: items, next_cursor: null };
+}
+
+// `url` with `?cursor=...` (or `&cursor=...`) appended when there is one
+export function withCursor(url, cursor) {
+    if (!cursor) return url;
+    return `${url}${url.includes("?") ? "&" : "?"}cursor=${encodeURIComponent(cursor)}`;
+}